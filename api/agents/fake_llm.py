@@ -0,0 +1,205 @@
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from utils.chart_engine import infer_chart_spec
+from utils.logger import setup_logger
+import hashlib, json, re, time
+
+logger = setup_logger(__name__)
+
+# Offline stand-in for the chat model (LLM_PROVIDER=fake). Each tool prompt is recognized by a
+# marker phrase and answered by a deterministic rule; a recordings file captured from a real
+# provider (keyed by prompt hash) takes precedence, so benchmarks can replay real answers.
+
+TODAY_PATTERN = re.compile(r"Today is (\d{4}-\d{2}-\d{2})")
+QUERY_PATTERN = re.compile(r"Query: '(.*)'", re.S)
+JSON_LIST_PATTERN = re.compile(r"^(Allowed categories|Inputs): (\[.*\])$", re.M)
+
+DEFAULT_RANGE_DAYS = 30
+DEFAULT_FIELDS = ["amount", "initiated_at", "merchant.name", "merchant.category", "transaction_type"]
+CATEGORIZE_PATTERN = re.compile(r"\bcategori[sz]e\b|\bpatterns?\b|\brecommend|\bsav(?:e|ings?)\b|\bunnecessary\b")
+
+# Engine dimension -> planner group_by, mirroring the planner's own mapping
+DIMENSION_GROUP_BY = {"merchant": "merchant", "category": "category", "mode": "mode"}
+
+
+def prompt_key(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def render_messages(messages: Sequence[BaseMessage]) -> str:
+    return "\n".join(str(m.content) for m in messages)
+
+
+def _today(prompt: str) -> datetime:
+    match = TODAY_PATTERN.search(prompt)
+    return datetime.strptime(match.group(1), "%Y-%m-%d") if match else datetime.now()
+
+
+def _default_range(prompt: str) -> Dict[str, str]:
+    today = _today(prompt)
+    return {
+        "start_date": (today - timedelta(days=DEFAULT_RANGE_DAYS)).strftime("%Y-%m-%d"),
+        "end_date": today.strftime("%Y-%m-%d"),
+    }
+
+
+def _json_list(prompt: str, label: str) -> List[str]:
+    for name, value in JSON_LIST_PATTERN.findall(prompt):
+        if name == label:
+            return json.loads(value)
+    return []
+
+
+def _classify(prompt: str) -> str:
+    choices = _json_list(prompt, "Allowed categories") or ["Others"]
+    fallback = "Others" if "Others" in choices else choices[0]
+    answer = {}
+    for name in _json_list(prompt, "Inputs"):
+        lowered = name.lower()
+        answer[name] = next((c for c in choices if c.lower() in lowered), fallback)
+    return json.dumps(answer)
+
+
+def _spending_analysis(prompt: str) -> str:
+    return json.dumps({
+        "unnecessary_patterns": ["Frequent small purchases at the same merchants"],
+        "recommendations": ["Set a monthly budget for the top spending category"],
+    })
+
+
+def _chart_summary(prompt: str) -> str:
+    return (
+        "Spending is concentrated in a few groups, with the largest accounting for most of the total. "
+        "The remaining groups contribute smaller, steadier amounts over the period."
+    )
+
+
+def _date_range(prompt: str) -> str:
+    return json.dumps(_default_range(prompt))
+
+
+def _filters(prompt: str) -> str:
+    return json.dumps({
+        **_default_range(prompt),
+        "transaction_mode": [], "currency": None, "amount_min": None, "amount_max": None,
+        "status": None, "merchant_category": [], "merchant_type": [], "counterparty_name": None,
+    })
+
+
+def _projection(prompt: str) -> str:
+    return json.dumps({"fields": DEFAULT_FIELDS, "reasoning": "Amounts, dates and merchant details answer most spending questions."})
+
+
+def _conversation_summary(prompt: str) -> str:
+    questions = re.findall(r"^User: (.*)$", prompt, re.M)
+    return "The user asked: " + "; ".join(questions) if questions else "No earlier questions."
+
+
+def _agent_reply(prompt: str) -> str:
+    return "I can only answer questions about your transactions while running offline."
+
+
+# First matching marker wins; markers are phrases unique to each tool's prompt
+RULES: List[Tuple[str, Callable[[str], str]]] = [
+    ("Assign each merchant or transaction description", _classify),
+    ("Analyze the user's aggregated spending", _spending_analysis),
+    ("Write a text_summary", _chart_summary),
+    ("Extract the start and end date", _date_range),
+    ("extract as many filters as possible", _filters),
+    ("data selection assistant", _projection),
+    ("Update the running summary", _conversation_summary),
+]
+
+
+def _query_plan(prompt: str) -> Dict[str, Any]:
+    match = QUERY_PATTERN.search(prompt)
+    query = match.group(1) if match else ""
+    spec = infer_chart_spec(query)
+    group_by = (spec.granularity or "month") if spec.dimension == "time" else DIMENSION_GROUP_BY.get(spec.dimension)
+    return {
+        "intent": "data",
+        "filters": _default_range(prompt),
+        "fields": DEFAULT_FIELDS,
+        "group_by": group_by,
+        "preferred_chart": None,
+        "objective": query or "spending overview",
+        "needs_categorization": bool(CATEGORIZE_PATTERN.search(query.lower())),
+    }
+
+
+def load_recordings(path: Optional[str]) -> Dict[str, str]:
+    if not path:
+        return {}
+    try:
+        with open(path) as f:
+            recordings = json.load(f)
+        logger.info(f"Loaded {len(recordings)} recorded LLM responses from {path}")
+        return recordings
+    except FileNotFoundError:
+        logger.warning(f"LLM recordings file {path} not found, using rule-generated responses")
+        return {}
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic chat model for offline runs and benchmarks; no network access"""
+
+    recordings: Dict[str, str] = {}
+    latency_ms: float = 0.0
+    model: str = "fake"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-finance"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model, "latency_ms": self.latency_ms}
+
+    def bind_tools(self, tools: Sequence[Any], tool_choice: Optional[Any] = None, **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], tool_choice=tool_choice, **kwargs)
+
+    def _respond(self, messages: List[BaseMessage], tools: Optional[List[Dict[str, Any]]], tool_choice: Any) -> AIMessage:
+        prompt = render_messages(messages)
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        # Structured output: a forced call of a single tool/schema
+        if tools and tool_choice:
+            name = tools[0]["function"]["name"]
+            args = _query_plan(prompt) if name == "QueryPlan" else {}
+            return AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": f"call_{prompt_key(prompt)[:12]}"}])
+
+        recorded = self.recordings.get(prompt_key(prompt))
+        if recorded is not None:
+            return AIMessage(content=recorded)
+
+        # Agent turns bind every tool without forcing one; answer directly to end the loop
+        if tools:
+            return AIMessage(content=_agent_reply(prompt))
+
+        for marker, rule in RULES:
+            if marker in prompt:
+                return AIMessage(content=rule(prompt))
+        logger.warning(f"No fake response rule matches prompt: {prompt[:80]!r}")
+        return AIMessage(content="")
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        message = self._respond(messages, kwargs.get("tools"), kwargs.get("tool_choice"))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        message = self._respond(messages, kwargs.get("tools"), kwargs.get("tool_choice"))
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": 0} for c in message.tool_calls
+            ]))
+            return
+        for word in re.findall(r"\S+\s*", message.content):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word))
+            if run_manager:
+                run_manager.on_llm_new_token(word, chunk=chunk)
+            yield chunk
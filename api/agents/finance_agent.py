@@ -2,7 +2,7 @@ from langchain.agents import create_openai_functions_agent, AgentExecutor, creat
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_openai import ChatOpenAI
 from langchain_ollama import ChatOllama
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from config.settings import settings
 from tools.date_extractor import get_date_range_tool
 from tools.mongo_query_tool import get_mongo_query_tool  
@@ -10,11 +10,13 @@ from tools.category_mapper import get_category_mapper_tool
 from tools.chart_data_preparer import get_chart_data_preparer_tool
 from tools.query_filter_extractor import get_query_filter_extractor_tool
 from tools.mongo_projection_tool import get_mongo_projection_tool
+from tools.query_planner import get_query_planner_tool
 from agents.memory import conversation_memory
 from utils.logger import setup_logger
 from agents.llm import llm
 from utils.helper import enhance_response
 from agents.prompt import FINANCE_AGENT_SYSTEM_PROMPT
+from agents.pipeline import insight_pipeline
 
 logger = setup_logger(__name__)
 
@@ -36,6 +38,7 @@ class FinanceAgent:
     
     def _get_tools(self) -> List:
         return [
+            get_query_planner_tool(),
             get_date_range_tool(),
             get_mongo_query_tool(),
             get_category_mapper_tool(),
@@ -68,20 +71,26 @@ class FinanceAgent:
             )
 
     
-    def process_query(self, user_input: str, session_id: str = "default") -> Dict[str, Any]:
+    def process_query(self, user_input: str, session_id: str = "default", preferred_chart: Optional[str] = None) -> Dict[str, Any]:
         logger.info(f"Processing query: {user_input}")
         
         try:
-            # Get conversation context
-            context = conversation_memory.get_context(session_id)
-            
-            # Process with agent
-            result = self.executor.invoke({
-                "input": user_input,
-                "chat_history": context
-            })
+            # Get conversation context, bounded by the history token budget
+            context, history_stats = conversation_memory.get_context_with_stats(session_id)
+            logger.info(f"History for session {session_id}: {history_stats}")
 
-            resp = enhance_response(result)
+            resp = None
+            if settings.AGENT_MODE == "pipeline" and insight_pipeline.is_on_script(user_input, bool(context)):
+                resp = insight_pipeline.run(user_input, preferred_chart)
+
+            if resp is None:
+                # Off-script or follow-up query: let the agent decide the tool order
+                agent_input = f"{user_input}\nPreferred chart: {preferred_chart}" if preferred_chart else user_input
+                result = self.executor.invoke({
+                    "input": agent_input,
+                    "chat_history": context
+                })
+                resp = enhance_response(result)
 
             # Store in memory
             if isinstance(resp, dict) and "visualization" in resp and "text_summary" in resp["visualization"]:
@@ -89,7 +98,7 @@ class FinanceAgent:
 
             logger.info(f"Query processed successfully")
             return resp
-            
+
         except Exception as e:
             logger.exception(f"Error processing query: {e}")
             return self._error_response(str(e), user_input)
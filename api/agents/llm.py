@@ -1,6 +1,15 @@
 from config.settings import settings
 from langchain_openai import ChatOpenAI
 from langchain_ollama import ChatOllama
+from agents.llm_cache import LLMResponseCache
+from agents.fake_llm import FakeChatModel, load_recordings
+from utils.metrics import llm_metrics_callback
+
+# Shared by every model below; identical prompts to the same model configuration are answered once
+llm_cache = LLMResponseCache(
+    max_bytes=settings.LLM_CACHE_MAX_BYTES,
+    ttl=settings.LLM_CACHE_TTL,
+) if settings.LLM_CACHE_ENABLED else None
 
 # Initialize LLM based on configuration
 def get_llm():
@@ -8,13 +17,24 @@ def get_llm():
         return ChatOpenAI(
             model="gpt-4o-mini",
             temperature=0,
-            openai_api_key=settings.OPENAI_API_KEY
+            openai_api_key=settings.OPENAI_API_KEY,
+            cache=llm_cache,
+            callbacks=[llm_metrics_callback],
+        )
+    elif settings.LLM_PROVIDER == "fake":
+        return FakeChatModel(
+            recordings=load_recordings(settings.FAKE_LLM_RECORDINGS),
+            latency_ms=settings.FAKE_LLM_LATENCY_MS,
+            cache=llm_cache,
+            callbacks=[llm_metrics_callback],
         )
     else:
         return ChatOllama(
             model=settings.OLLAMA_MODEL,
             base_url=settings.OLLAMA_BASE_URL,
-            temperature=0
+            temperature=0,
+            cache=llm_cache,
+            callbacks=[llm_metrics_callback],
         )
 
 def get_llm_json():
@@ -24,6 +44,8 @@ def get_llm_json():
             temperature=0,
             openai_api_key=settings.OPENAI_API_KEY,
             response_format={"type": "json_object"},
+            cache=llm_cache,
+            callbacks=[llm_metrics_callback],
         )
     else:
         return None
@@ -0,0 +1,102 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Optional
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+from utils.redis_utils import redis_client
+from utils.context import current_tool
+from utils.counters import get_counter
+from utils.logger import setup_logger
+import hashlib
+
+logger = setup_logger(__name__)
+
+memory_tier_counter = get_counter("llm_cache_memory")
+
+# Calls made outside any tool are the agent's own reasoning turns
+AGENT_SCOPE = "agent"
+
+
+class LLMResponseCache(BaseCache):
+    """Two-tier LangChain cache: an in-process LRU bounded by bytes in front of Redis.
+
+    Keys hash the model configuration (provider class, model, temperature, bound tools)
+    together with the serialized prompt, so only identical requests share an answer.
+    """
+
+    def __init__(self, max_bytes: int, ttl: int):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        digest = hashlib.sha256(f"{llm_string}|{prompt}".encode("utf-8")).hexdigest()
+        return f"llmcache:{digest}"
+
+    def _remember(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.encode("utf-8"))
+            self._entries[key] = value
+            self._bytes += size
+            # Evict least recently used entries until the tier fits its byte budget
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.encode("utf-8"))
+
+    def _recall(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._key(prompt, llm_string)
+        tool_counter = get_counter(f"llm_cache:{current_tool.get() or AGENT_SCOPE}")
+
+        value = self._recall(key)
+        if value is not None:
+            memory_tier_counter.hit()
+        else:
+            memory_tier_counter.miss()
+            try:
+                value = redis_client.get_data(key)
+            except Exception as e:
+                logger.warning(f"LLM cache Redis tier unavailable: {e}")
+                value = None
+            if value is not None:
+                self._remember(key, value)
+
+        if value is None:
+            tool_counter.miss()
+            return None
+
+        tool_counter.hit()
+        return loads(value)
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = self._key(prompt, llm_string)
+        value = dumps(return_val)
+        self._remember(key, value)
+        try:
+            redis_client.set_data(key, value, self.ttl)
+        except Exception as e:
+            logger.warning(f"Failed to store LLM response in Redis: {e}")
+
+    def clear(self, **kwargs: Any) -> None:
+        # Only the local tier; Redis entries expire on their own TTL
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
@@ -1,48 +1,235 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from utils.logger import setup_logger
-from langchain.schema import HumanMessage, AIMessage
+from utils.redis_utils import redis_client
+from utils.tokens import count_message_tokens
+from utils.context import tool_scope
+from utils.counters import get_stats
+from agents.llm import llm
+from config.settings import settings
+from langchain.schema import HumanMessage, AIMessage, SystemMessage
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import contextvars, json, time
 
 logger = setup_logger(__name__)
 
+history_token_stats = get_stats("history_tokens")
+
+# Sorted set of session ids scored by last access, used to evict idle sessions
+SESSIONS_KEY = "conv:sessions"
+
+# Seconds a session's fold marker lives; bounds how long a crashed fold blocks the next one
+FOLD_MARKER_TTL = 120
+
+# Summary folds are background LLM calls; a pool of their own keeps them off tool_executor
+summary_executor = ThreadPoolExecutor(max_workers=settings.MEMORY_SUMMARY_WORKERS, thread_name_prefix="summary")
+
 class ConversationMemory:
-    
-    def __init__(self, max_history: int = 10):
+    """Per-session interaction history in Redis lists, shared by every worker process.
+
+    Prompts get the newest turns verbatim within a token budget; turns that leave the
+    verbatim window are folded into a running summary in the background.
+    """
+
+    def __init__(
+        self,
+        max_history: int = 10,
+        session_ttl: int = 86400,
+        max_sessions: int = 10000,
+        verbatim_turns: int = 3,
+        token_budget: int = 1000,
+        summary_max_tokens: int = 200,
+    ):
         self.max_history = max_history
-        self.conversations: Dict[str, List[Dict[str, Any]]] = {}
-    
+        self.session_ttl = session_ttl
+        self.max_sessions = max_sessions
+        self.verbatim_turns = verbatim_turns
+        self.token_budget = token_budget
+        self.summary_max_tokens = summary_max_tokens
+
+    def _key(self, session_id: str) -> str:
+        return f"conv:{session_id}"
+
+    def _summary_key(self, session_id: str) -> str:
+        return f"conv:{session_id}:summary"
+
+    def _fold_marker_key(self, session_id: str) -> str:
+        return f"conv:{session_id}:folding"
+
+    def _load_summary(self, session_id: str) -> Dict[str, Any]:
+        # {"text": running summary, "through": timestamp of the newest folded turn}
+        try:
+            cached = redis_client.get_data(self._summary_key(session_id))
+        except Exception as e:
+            logger.warning(f"Failed to load history summary for session {session_id}: {e}")
+            cached = None
+        return json.loads(cached) if cached else {"text": "", "through": ""}
+
+    @tool_scope("conversation_summary")
+    def _fold_into_summary(self, session_id: str) -> None:
+        history = self.get_history(session_id)
+        summary = self._load_summary(session_id)
+
+        older = history[:-self.verbatim_turns] if self.verbatim_turns else history
+        pending = [t for t in older if t["timestamp"] > summary["through"]]
+        if not pending:
+            return
+
+        turns = "\n".join(f"User: {t['user_input']}\nAssistant: {t['assistant_response']}" for t in pending)
+        prompt = (
+            "Update the running summary of a personal finance conversation with the new turns below.\n"
+            f"Keep it under {self.summary_max_tokens} tokens. Keep the user's questions, date ranges, "
+            "filters and key figures that later questions may refer to; drop wording and pleasantries.\n"
+            "Respond with the summary text only.\n\n"
+            f"Current summary: {summary['text'] or '(none)'}\n\n"
+            f"New turns:\n{turns}"
+        )
+
+        try:
+            text = (llm.invoke(prompt).content or "").strip()
+            if not text:
+                return
+            redis_client.set_data(
+                self._summary_key(session_id),
+                json.dumps({"text": text, "through": pending[-1]["timestamp"]}),
+                self.session_ttl,
+            )
+            logger.info(f"Folded {len(pending)} turns into the summary for session {session_id}")
+        except Exception as e:
+            logger.warning(f"Failed to summarize history for session {session_id}: {e}")
+
+    def _run_fold(self, session_id: str) -> None:
+        try:
+            self._fold_into_summary(session_id)
+        finally:
+            redis_client.delete(self._fold_marker_key(session_id))
+
+    def _evict_idle_sessions(self) -> None:
+        # Sessions past their TTL have already lost their list; drop them from the index too
+        expired = redis_client.members_below(SESSIONS_KEY, time.time() - self.session_ttl)
+
+        overflow = redis_client.count_members(SESSIONS_KEY) - len(expired) - self.max_sessions
+        idle = []
+        if overflow > 0:
+            idle = redis_client.members_below(SESSIONS_KEY, "+inf", limit=len(expired) + overflow)[len(expired):]
+            logger.info(f"Evicting {len(idle)} least recently used sessions")
+
+        evicted = expired + idle
+        if evicted:
+            redis_client.delete_many([self._key(s) for s in evicted] + [self._summary_key(s) for s in evicted])
+            redis_client.remove_members(SESSIONS_KEY, evicted)
+
     def add_interaction(self, session_id: str, user_input: str, assistant_response: str) -> None:
-        
-        # If session_id doesnt exists, create new
-        if session_id not in self.conversations:
-            self.conversations[session_id] = []
-        
+
         interaction = {
             "user_input": user_input,
             "assistant_response": assistant_response,
             "timestamp": datetime.now().isoformat()
         }
-        
-        # Add conversation
-        self.conversations[session_id].append(interaction)
-        
-        # Keep only last N interactions
-        if len(self.conversations[session_id]) > self.max_history:
-            self.conversations[session_id] = self.conversations[session_id][-self.max_history:]
-        
+
+        try:
+            # Add conversation, keeping only last N interactions
+            redis_client.append_capped_list(
+                self._key(session_id), json.dumps(interaction), self.max_history, self.session_ttl
+            )
+            redis_client.touch_member(SESSIONS_KEY, session_id, time.time())
+            self._evict_idle_sessions()
+            history_length = redis_client.list_length(self._key(session_id))
+        except Exception as e:
+            logger.warning(f"Failed to store interaction for session {session_id}: {e}")
+            return
+
+        if history_length > self.verbatim_turns:
+            try:
+                # One fold per session at a time, across workers; a running fold picks up every
+                # turn stored before it reads the history, later ones wait for the next interaction
+                start_fold = redis_client.set_if_absent(self._fold_marker_key(session_id), "1", FOLD_MARKER_TTL)
+            except Exception as e:
+                logger.warning(f"Failed to claim the summary fold for session {session_id}: {e}")
+                start_fold = False
+            if start_fold:
+                # Off the request path, in a fresh context so no stream or user state leaks in
+                summary_executor.submit(contextvars.Context().run, self._run_fold, session_id)
+
         logger.info(f"Added interaction to memory for session {session_id}")
-    
-    def get_context(self, session_id: str) -> List:
-        
-        # If no previous conversations
-        if session_id not in self.conversations:
+
+    def get_history(self, session_id: str) -> List[Dict[str, Any]]:
+        try:
+            items = redis_client.get_list(self._key(session_id), self.session_ttl)
+            if items:
+                redis_client.touch_member(SESSIONS_KEY, session_id, time.time())
+        except Exception as e:
+            logger.warning(f"Failed to load history for session {session_id}: {e}")
             return []
-        
-        messages = []
-        for interaction in self.conversations[session_id]:
-            messages.append(HumanMessage(content=interaction["user_input"]))
-            messages.append(AIMessage(content=interaction["assistant_response"]))
-        
-        return messages
-
-conversation_memory = ConversationMemory()
\ No newline at end of file
+        return [json.loads(item) for item in items]
+
+    def has_history(self, session_id: str) -> bool:
+        # One LLEN; no list read, summary load or token counting
+        try:
+            return redis_client.list_length(self._key(session_id)) > 0
+        except Exception as e:
+            logger.warning(f"Failed to check history for session {session_id}: {e}")
+            return False
+
+    def get_context_with_stats(self, session_id: str) -> Tuple[List, Dict[str, int]]:
+        history = self.get_history(session_id)
+        if not history:
+            return [], {"history_tokens": 0, "summary_tokens": 0, "turns_verbatim": 0, "turns_summarized": 0, "turns_dropped": 0}
+
+        summary = self._load_summary(session_id)
+        summary_messages = []
+        if summary["text"]:
+            summary_messages.append(SystemMessage(content=f"Summary of the earlier conversation: {summary['text']}"))
+        summary_tokens = count_message_tokens(summary_messages)
+
+        # Turns not yet folded into the summary, newest first, while they fit the budget
+        unfolded = [t for t in history if t["timestamp"] > summary["through"]]
+        budget = self.token_budget - summary_tokens
+        kept: List[List] = []
+        for interaction in reversed(unfolded):
+            pair = [
+                HumanMessage(content=interaction["user_input"]),
+                AIMessage(content=interaction["assistant_response"]),
+            ]
+            cost = count_message_tokens(pair)
+            if cost > budget:
+                break
+            kept.append(pair)
+            budget -= cost
+
+        messages = list(summary_messages)
+        for pair in reversed(kept):
+            messages.extend(pair)
+
+        history_tokens = count_message_tokens(messages)
+        stats = {
+            "history_tokens": history_tokens,
+            "summary_tokens": summary_tokens,
+            "turns_verbatim": len(kept),
+            "turns_summarized": len(history) - len(unfolded),
+            "turns_dropped": len(unfolded) - len(kept),
+        }
+        history_token_stats.observe("history_tokens", history_tokens)
+        history_token_stats.observe("summary_tokens", summary_tokens)
+        return messages, stats
+
+    def get_context(self, session_id: str) -> List:
+        return self.get_context_with_stats(session_id)[0]
+
+    def clear(self, session_id: str) -> bool:
+        existed = redis_client.list_length(self._key(session_id)) > 0
+        redis_client.delete_many([self._key(session_id), self._summary_key(session_id)])
+        redis_client.remove_members(SESSIONS_KEY, [session_id])
+        return existed
+
+    def session_count(self) -> int:
+        return redis_client.count_members(SESSIONS_KEY)
+
+conversation_memory = ConversationMemory(
+    max_history=settings.MEMORY_MAX_HISTORY,
+    session_ttl=settings.MEMORY_SESSION_TTL,
+    max_sessions=settings.MEMORY_MAX_SESSIONS,
+    verbatim_turns=settings.MEMORY_VERBATIM_TURNS,
+    token_budget=settings.MEMORY_TOKEN_BUDGET,
+    summary_max_tokens=settings.MEMORY_SUMMARY_MAX_TOKENS,
+)
@@ -0,0 +1,101 @@
+from typing import Dict, Any, Optional
+import re, time
+from utils.logger import setup_logger
+from utils.counters import get_counter, get_stats
+from utils.chart_engine import infer_chart_spec
+from utils.context import raise_if_cancelled
+from utils.tool_runner import ToolCall, run_concurrently
+from tools.query_planner import _plan_query
+from tools.mongo_query_tool import _mongo_query
+from tools.category_mapper import _map_categories
+from tools.chart_data_preparer import _prepare_chart_data
+
+logger = setup_logger(__name__)
+
+pipeline_counter = get_counter("pipeline_mode")
+pipeline_stats = get_stats("pipeline_ms")
+
+# Queries that lean on the previous answer need the chat history, which only the agent loop reads
+FOLLOW_UP_PATTERN = re.compile(
+    r"\b(?:same|again|instead|previous|above|those)\b|\bwhat about\b|\bhow about\b|\band for\b"
+)
+
+
+class InsightPipeline:
+    """Runs the fixed planner -> query -> categorize/chart graph without LLM decision turns"""
+
+    def _timed(self, step: str, timings: Dict[str, float], fn, *args):
+        raise_if_cancelled()
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            timings[step] = round(elapsed, 1)
+            pipeline_stats.observe(step, elapsed)
+
+    def is_on_script(self, user_input: str, has_history: bool) -> bool:
+        return not (has_history and FOLLOW_UP_PATTERN.search(user_input.lower()))
+
+    def run(self, user_input: str, preferred_chart: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        # Returns None when the query does not fit the fixed graph, so the caller can use the agent loop
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+
+        plan = self._timed("plan", timings, _plan_query, user_input)
+        if not plan.get("parsed_successfully") or plan.get("intent") != "data":
+            logger.info(f"Query is off-script for the pipeline (intent={plan.get('intent')})")
+            pipeline_counter.miss()
+            return None
+        if preferred_chart:
+            plan["preferred_chart"] = preferred_chart
+
+        query_result = self._timed(
+            "query", timings, _mongo_query, plan["query_filter"], plan["query_projection"], plan["group_by"]
+        )
+        if "error" in query_result:
+            logger.warning(f"Pipeline query failed, deferring to the agent loop: {query_result['error']}")
+            pipeline_counter.miss()
+            return None
+        handle = query_result["handle"]
+
+        spec = infer_chart_spec(plan["objective"], plan["preferred_chart"], plan["group_by"])
+        # Raw rows without merchant.category need the mapper's output to label a category chart
+        chart_needs_categories = not plan["group_by"] and spec.dimension == "category"
+
+        category_result = None
+        if plan["needs_categorization"] and chart_needs_categories:
+            category_result = self._timed("categorize", timings, _map_categories, handle)
+            visualization = self._timed(
+                "chart", timings, _prepare_chart_data,
+                handle, plan["objective"], plan["preferred_chart"], category_result,
+            )
+        else:
+            calls = [ToolCall("chart", _prepare_chart_data, (handle, plan["objective"], plan["preferred_chart"]))]
+            if plan["needs_categorization"]:
+                calls.insert(0, ToolCall("categorize", _map_categories, (handle,)))
+            raise_if_cancelled()
+            results, report = run_concurrently(calls)
+            for step, elapsed in report["durations_ms"].items():
+                timings[step] = elapsed
+                pipeline_stats.observe(step, elapsed)
+            visualization = results["chart"]
+            category_result = results.get("categorize")
+
+        total = (time.perf_counter() - started) * 1000
+        pipeline_stats.observe("total", total)
+        pipeline_counter.hit()
+        logger.info(f"Pipeline served query in {total:.0f}ms: {timings}")
+
+        category_result = category_result or {}
+        return {
+            "query": user_input,
+            "visualization": visualization,
+            "analysis": {
+                "unnecessary_patterns": category_result.get("unnecessary_patterns", []),
+                "recommendations": category_result.get("recommendations", []),
+            },
+        }
+
+
+insight_pipeline = InsightPipeline()
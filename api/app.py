@@ -1,13 +1,16 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 from config.settings import settings
 from routes.transactions import transactions_bp
 from routes.insights import insights_bp
 from routes.users import users_bp
 from db.connection import mongo_conn
+from db.indexes import ensure_indexes
 from utils.logger import setup_logger
-from utils.context import current_user_id
-import atexit
+from utils.context import current_user_id, current_mongo_timings
+from utils.metrics import CONTENT_TYPE_LATEST, observe_request, render_metrics, request_finished, request_started, track_memory_sessions
+from agents.memory import conversation_memory
+import atexit, time
 
 logger = setup_logger(__name__)
 
@@ -15,7 +18,7 @@ def create_app() -> Flask:
     app = Flask(__name__)
     
     # Enable CORS
-    CORS(app)
+    CORS(app, expose_headers=["X-Cache", "Server-Timing"])
     
     # Register blueprints
     app.register_blueprint(insights_bp, url_prefix='/api/insights')
@@ -44,6 +47,28 @@ def create_app() -> Flask:
             }
         }), 500
     
+    # Registered before attach_user_id, whose early OPTIONS return skips later hooks
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        # A list shared with tool worker threads, which run in copies of this context
+        current_mongo_timings.set([])
+        request_started()
+
+    @app.after_request
+    def record_request_latency(response):
+        if "request_started" in g:
+            elapsed = time.perf_counter() - g.request_started
+            # Route template, not the raw path, keeps label cardinality bounded
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            observe_request(request.method, route, response.status_code, elapsed)
+
+            mongo = current_mongo_timings.get() or []
+            response.headers["Server-Timing"] = (
+                f'mongo;dur={sum(mongo):.1f};desc="{len(mongo)} commands", app;dur={elapsed * 1000:.1f}'
+            )
+        return response
+
     @app.before_request
     def attach_user_id():
         if request.method == "OPTIONS":
@@ -57,11 +82,27 @@ def create_app() -> Flask:
     @app.teardown_request
     def clear_user_id(exc):
         current_user_id.set(None)
+        current_mongo_timings.set(None)
+
+    @app.teardown_request
+    def finish_request(exc):
+        if "request_started" in g:
+            request_finished()
+
+    @app.route('/metrics')
+    def metrics():
+        body = render_metrics()
+        if body is None:
+            return Response("prometheus_client is not installed\n", status=503, mimetype="text/plain")
+        return Response(body, mimetype=CONTENT_TYPE_LATEST)
+
+    track_memory_sessions(conversation_memory.session_count)
     
     # Initialize database connection
     try:
-        mongo_conn.connect()
+        db = mongo_conn.connect()
         logger.info("Database connection established")
+        ensure_indexes(db)
     except Exception as e:
         logger.error(f"Failed to connect to database: {e}")
         raise
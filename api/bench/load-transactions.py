@@ -0,0 +1,218 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+# Replays a mixed workload against a running API server (python app.py) and reports throughput,
+# latency percentiles and MongoDB time (from the Server-Timing header) per request shape.
+
+STATUSES = ["initiated", "success", "failed", "refunded"]
+MODES = ["UPI", "Card", "BankTransfer", "Cash"]
+TYPES = ["credit", "debit", "refund"]
+WINDOW_DAYS = [7, 30, 90, 365]
+
+# Relative weight of each request shape in the mix
+DEFAULT_MIX = {
+    "users_all": 1,
+    "tx_first_page": 4,
+    "tx_filtered": 4,
+    "tx_offset_deep": 2,
+    "tx_keyset_walk": 2,
+}
+
+PERCENTILES = (50, 95, 99)
+MONGO_TIMING = re.compile(r"mongo;dur=([\d.]+)")
+KEYSET_WALK_PAGES = 10
+
+_local = threading.local()
+
+
+def _session() -> requests.Session:
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+
+def _random_filters() -> dict:
+    # Any combination of the criteria services.transactions.build_query understands
+    criteria = {}
+    if random.random() < 0.7:
+        end = datetime.now() - timedelta(days=random.randint(0, 60))
+        criteria["fromDate"] = (end - timedelta(days=random.choice(WINDOW_DAYS))).isoformat(timespec="seconds")
+        criteria["toDate"] = end.isoformat(timespec="seconds")
+    if random.random() < 0.5:
+        criteria["status"] = random.choice(STATUSES)
+    if random.random() < 0.5:
+        criteria["transactionMode"] = random.choice(MODES)
+    if random.random() < 0.3:
+        criteria["transactionType"] = random.choice(TYPES)
+    return criteria
+
+
+class LoadTest:
+
+    def __init__(self, base_url: str, users: list, page_size: int, deep_pages: tuple):
+        self.base_url = base_url.rstrip("/")
+        self.users = users
+        self.page_size = page_size
+        self.deep_pages = deep_pages
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def _record(self, shape: str, elapsed_ms: float, response) -> dict:
+        ok = response is not None and response.status_code == 200
+        mongo = MONGO_TIMING.search(response.headers.get("Server-Timing", "")) if response is not None else None
+        with self.lock:
+            entry = self.samples.setdefault(shape, {"latency_ms": [], "mongo_ms": [], "errors": 0})
+            entry["latency_ms"].append(elapsed_ms)
+            if mongo:
+                entry["mongo_ms"].append(float(mongo.group(1)))
+            if not ok:
+                entry["errors"] += 1
+        return response.json() if ok else {}
+
+    def _call(self, shape: str, method: str, path: str, body: dict = None) -> dict:
+        started = time.perf_counter()
+        try:
+            response = _session().request(method, f"{self.base_url}{path}", json=body, timeout=30)
+        except requests.RequestException:
+            response = None
+        return self._record(shape, (time.perf_counter() - started) * 1000, response)
+
+    def _transactions(self, shape: str, criteria: dict) -> dict:
+        body = {"userId": random.choice(self.users), "pageSize": self.page_size, **criteria}
+        return self._call(shape, "POST", "/api/transactions/get", body)
+
+    def run_shape(self, shape: str) -> None:
+        if shape == "users_all":
+            self._call(shape, "GET", "/api/users/all")
+        elif shape == "tx_first_page":
+            self._transactions(shape, {"pageNumber": 1})
+        elif shape == "tx_filtered":
+            self._transactions(shape, {"pageNumber": 1, **_random_filters()})
+        elif shape == "tx_offset_deep":
+            self._transactions(shape, {"pageNumber": random.randint(*self.deep_pages)})
+        elif shape == "tx_keyset_walk":
+            # Follow next_cursor page by page; each page is its own sample
+            user_id = random.choice(self.users)
+            body = {"userId": user_id, "pageSize": self.page_size, "cursor": None}
+            for _ in range(KEYSET_WALK_PAGES):
+                data = self._call(shape, "POST", "/api/transactions/get", body).get("data") or {}
+                if not data.get("next_cursor"):
+                    break
+                body = {**body, "cursor": data["next_cursor"]}
+
+    def run(self, mix: dict, concurrency: int, duration: float) -> float:
+        shapes, weights = zip(*mix.items())
+        deadline = time.perf_counter() + duration
+
+        def worker():
+            while time.perf_counter() < deadline:
+                self.run_shape(random.choices(shapes, weights)[0])
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for _ in range(concurrency):
+                pool.submit(worker)
+        return time.perf_counter() - started
+
+
+def _percentiles(values: list) -> dict:
+    if not values:
+        return {}
+    arr = np.asarray(values, dtype=float)
+    return {f"p{p}": round(float(np.percentile(arr, p)), 1) for p in PERCENTILES}
+
+
+def build_report(test: LoadTest, elapsed: float, args) -> dict:
+    shapes = {}
+    for shape, entry in sorted(test.samples.items()):
+        count = len(entry["latency_ms"])
+        shapes[shape] = {
+            "requests": count,
+            "errors": entry["errors"],
+            "rps": round(count / elapsed, 1),
+            "latency_ms": _percentiles(entry["latency_ms"]),
+            "mongo_ms": _percentiles(entry["mongo_ms"]),
+        }
+    total = sum(s["requests"] for s in shapes.values())
+    return {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "base_url": args.base_url,
+        "concurrency": args.concurrency,
+        "duration_s": round(elapsed, 1),
+        "page_size": args.page_size,
+        "users": len(test.users),
+        "requests": total,
+        "rps": round(total / elapsed, 1),
+        "shapes": shapes,
+    }
+
+
+def print_report(report: dict, baseline: dict = None) -> None:
+    print(f"\n{report['requests']} requests in {report['duration_s']}s ({report['rps']} req/s, concurrency {report['concurrency']})")
+    print(f"{'shape':<18}{'req/s':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'mongo p50':>11}{'mongo p95':>11}{'errors':>8}")
+    for shape, s in report["shapes"].items():
+        lat, mongo = s["latency_ms"], s["mongo_ms"]
+        line = (f"{shape:<18}{s['rps']:>8}{lat.get('p50', 0):>9}{lat.get('p95', 0):>9}{lat.get('p99', 0):>9}"
+                f"{mongo.get('p50', 0):>11}{mongo.get('p95', 0):>11}{s['errors']:>8}")
+        previous = (baseline or {}).get("shapes", {}).get(shape)
+        if previous and previous["latency_ms"].get("p95"):
+            change = 100 * (lat.get("p95", 0) - previous["latency_ms"]["p95"]) / previous["latency_ms"]["p95"]
+            line += f"   p95 {change:+.0f}% vs baseline"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test /api/transactions/get and /api/users/all")
+    parser.add_argument("--base-url", default="http://localhost:5000")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--page-size", type=int, default=25)
+    parser.add_argument("--deep-pages", type=int, nargs=2, default=(20, 200), metavar=("MIN", "MAX"),
+                        help="page number range for deep offset pages")
+    parser.add_argument("--mix", type=json.loads, default=DEFAULT_MIX, help="JSON object of shape -> weight")
+    parser.add_argument("--output", help="report path (default: bench/results/transactions-<timestamp>.json)")
+    parser.add_argument("--baseline", help="earlier report to compare p95 latency against")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    unknown = set(args.mix) - set(DEFAULT_MIX)
+    if unknown:
+        print(f"Unknown shapes in --mix: {', '.join(sorted(unknown))}")
+        sys.exit(1)
+
+    users = [u["_id"] for u in requests.get(f"{args.base_url.rstrip('/')}/api/users/all", timeout=30).json()["data"]["items"]]
+    if not users:
+        print("No users found; seed the database with setup/prepare-data.py first")
+        sys.exit(1)
+
+    test = LoadTest(args.base_url, users, args.page_size, tuple(args.deep_pages))
+    elapsed = test.run(args.mix, args.concurrency, args.duration)
+    report = build_report(test, elapsed, args)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "results", f"transactions-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {output}")
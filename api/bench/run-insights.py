@@ -0,0 +1,149 @@
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser(description="Benchmark FinanceAgent.process_query over a fixed query corpus")
+parser.add_argument("--queries", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "queries.json"))
+parser.add_argument("--iterations", type=int, default=5, help="measured runs per query")
+parser.add_argument("--warmup", type=int, default=1, help="unmeasured runs per query before measuring")
+parser.add_argument("--user", help="user_id to query as (default: first user in the database)")
+parser.add_argument("--output", help="write the report as JSON to this path")
+parser.add_argument("--record", help="run against the configured real provider and save its responses here for FAKE_LLM_RECORDINGS")
+parser.add_argument("--llm-cache", action="store_true", help="keep the LLM response cache enabled")
+args = parser.parse_args()
+
+# Offline by default: deterministic LLM, no LLM cache so every iteration runs each stage.
+# Must be set before settings are imported.
+if not args.record:
+    os.environ["LLM_PROVIDER"] = "fake"
+if not args.llm_cache:
+    os.environ["LLM_CACHE_ENABLED"] = "False"
+
+import numpy as np
+from langchain_core.callbacks import BaseCallbackHandler
+
+from db.connection import mongo_conn
+from agents.fake_llm import prompt_key, render_messages
+from agents.llm import llm, llm_json
+from agents.finance_agent import finance_agent
+from agents.memory import conversation_memory
+from config.settings import settings
+from utils.context import current_user_id, current_tool_timings
+
+PERCENTILES = (50, 95, 99)
+
+
+class ResponseRecorder(BaseCallbackHandler):
+    """Captures prompt -> response text pairs in the fake provider's recordings format"""
+
+    def __init__(self):
+        self.prompts = {}
+        self.recordings = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self.prompts[run_id] = render_messages(messages[0])
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        prompt = self.prompts.pop(run_id, None)
+        text = response.generations[0][0].text if response.generations else ""
+        # Structured-output calls answer with tool calls and no text; the fake's rules cover them
+        if prompt is not None and text:
+            self.recordings[prompt_key(prompt)] = text
+
+
+def summarize(samples):
+    values = np.asarray(samples, dtype=float)
+    report = {f"p{p}": round(float(np.percentile(values, p)), 1) for p in PERCENTILES}
+    report.update({"mean": round(float(values.mean()), 1), "count": int(values.size)})
+    return report
+
+
+def run_query(query, stage_samples):
+    # Fresh session per run, so no query is treated as a follow-up of the previous one
+    session_id = f"bench-{uuid.uuid4().hex[:8]}"
+    # Not an event sink: with one installed, chart summaries stream and the SSE path is measured
+    stages = {}
+
+    token = current_tool_timings.set(stages)
+    started = time.perf_counter()
+    try:
+        result = finance_agent.process_query(query, session_id)
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        current_tool_timings.reset(token)
+        conversation_memory.clear(session_id)
+
+    if stage_samples is not None:
+        for stage, ms in stages.items():
+            stage_samples.setdefault(stage, []).append(ms)
+    return elapsed, bool(result.get("error"))
+
+
+if __name__ == "__main__":
+    with open(args.queries) as f:
+        queries = json.load(f)
+
+    db = mongo_conn.connect()
+    user_id = args.user or (db["users"].find_one({}, {"_id": 1}) or {}).get("_id")
+    if not user_id:
+        print("No users found; seed the database with setup/prepare-data.py first")
+        sys.exit(1)
+    current_user_id.set(user_id)
+
+    recorder = None
+    if args.record:
+        recorder = ResponseRecorder()
+        for model in (llm, llm_json):
+            if model is not None:
+                model.callbacks = [*(model.callbacks or []), recorder]
+
+    overall, stage_samples, per_query, errors = [], {}, {}, 0
+    for query in queries:
+        for _ in range(args.warmup):
+            run_query(query, None)
+
+        samples = []
+        for _ in range(args.iterations):
+            elapsed, failed = run_query(query, stage_samples)
+            samples.append(elapsed)
+            errors += failed
+        overall.extend(samples)
+        per_query[query] = summarize(samples)
+        print(f"{per_query[query]['p50']:>9.1f} ms p50  {query}")
+
+    report = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "provider": settings.LLM_PROVIDER,
+        "agent_mode": settings.AGENT_MODE,
+        "user_id": user_id,
+        "iterations": args.iterations,
+        "warmup": args.warmup,
+        "errors": errors,
+        "overall_ms": summarize(overall),
+        "stages_ms": {stage: summarize(ms) for stage, ms in sorted(stage_samples.items())},
+        "queries_ms": per_query,
+    }
+
+    print(f"\n{'stage':<28}{'p50':>9}{'p95':>9}{'p99':>9}{'runs':>7}")
+    for stage, s in [*report["stages_ms"].items(), ("overall", report["overall_ms"])]:
+        print(f"{stage:<28}{s['p50']:>9.1f}{s['p95']:>9.1f}{s['p99']:>9.1f}{s['count']:>7}")
+    if errors:
+        print(f"{errors} runs returned an error response")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    if recorder:
+        with open(args.record, "w") as f:
+            json.dump(recorder.recordings, f, indent=2)
+        print(f"Recorded {len(recorder.recordings)} responses to {args.record}")
+
+    mongo_conn.close()
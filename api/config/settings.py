@@ -11,10 +11,15 @@ class Settings:
     OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
     OLLAMA_MODEL: str = os.getenv("OLLAMA_MODEL", "llama2")
     OLLAMA_BASE_URL: str = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    FAKE_LLM_RECORDINGS: Optional[str] = os.getenv("FAKE_LLM_RECORDINGS")
+    FAKE_LLM_LATENCY_MS: float = float(os.getenv("FAKE_LLM_LATENCY_MS", 0))
+    # Token savings of the compact prompt encoding are measured on 1 in N prompts (0 = never)
+    PROMPT_STATS_SAMPLE_RATE: int = int(os.getenv("PROMPT_STATS_SAMPLE_RATE", 20))
     
     # Database Settings
     MONGO_URI: str = os.getenv("MONGO_URI", "mongodb://localhost:27017/finance_db")
     LIMIT_FETCH_ROWS: int = int(os.getenv("LIMIT_FETCH_ROWS", 10))
+    LIMIT_GROUP_ROWS: int = int(os.getenv("LIMIT_GROUP_ROWS", 100))
     
     # Flask Settings
     FLASK_DEBUG: bool = os.getenv("FLASK_DEBUG", "True").lower() == "true"
@@ -30,5 +35,47 @@ class Settings:
     REDIS_PASSWORD=os.getenv("REDIS_PASSWORD")
     REDIS_TTL=os.getenv("REDIS_TTL", 300)
     REDIS_NAMESPACE=os.getenv("REDIS_NAMESPACE", "finance_agent")
+    HANDLE_CODEC: str = os.getenv("HANDLE_CODEC", "msgpack+zstd")
+    HANDLE_ZSTD_LEVEL: int = int(os.getenv("HANDLE_ZSTD_LEVEL", 3))
+
+    # Agent execution: "pipeline" runs the fixed tool graph directly, "agent" always uses the ReAct loop
+    AGENT_MODE: str = os.getenv("AGENT_MODE", "pipeline")
+    # PIPELINE_WORKERS is the older name of this setting, still honoured when TOOL_WORKERS is unset
+    TOOL_WORKERS: int = int(os.getenv("TOOL_WORKERS", os.getenv("PIPELINE_WORKERS", 4)))
+
+    # Conversation memory (Redis lists per session)
+    MEMORY_MAX_HISTORY: int = int(os.getenv("MEMORY_MAX_HISTORY", 10))
+    MEMORY_SESSION_TTL: int = int(os.getenv("MEMORY_SESSION_TTL", 24 * 3600))
+    MEMORY_MAX_SESSIONS: int = int(os.getenv("MEMORY_MAX_SESSIONS", 10000))
+    MEMORY_VERBATIM_TURNS: int = int(os.getenv("MEMORY_VERBATIM_TURNS", 3))
+    MEMORY_TOKEN_BUDGET: int = int(os.getenv("MEMORY_TOKEN_BUDGET", 1000))
+    MEMORY_SUMMARY_MAX_TOKENS: int = int(os.getenv("MEMORY_SUMMARY_MAX_TOKENS", 200))
+    MEMORY_SUMMARY_WORKERS: int = int(os.getenv("MEMORY_SUMMARY_WORKERS", 1))
+
+    # Full /api/insights/query responses per user, query and data version
+    INSIGHT_CACHE_TTL: int = int(os.getenv("INSIGHT_CACHE_TTL", 300))
+
+    # Streaming insights: worker threads; streams beyond this wait for a free one
+    STREAM_WORKERS: int = int(os.getenv("STREAM_WORKERS", 8))
+
+    # Insight pre-warming: background threads and queued users, bounded so live traffic keeps priority
+    PREWARM_WORKERS: int = int(os.getenv("PREWARM_WORKERS", 1))
+    PREWARM_MAX_PENDING: int = int(os.getenv("PREWARM_MAX_PENDING", 20))
+
+    # LLM response cache: in-process LRU (bytes) in front of Redis (seconds)
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "True").lower() == "true"
+    LLM_CACHE_MAX_BYTES: int = int(os.getenv("LLM_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+    LLM_CACHE_TTL: int = int(os.getenv("LLM_CACHE_TTL", 24 * 3600))
+
+    # Projection memo (normalized query -> LLM-chosen projection)
+    PROJECTION_MEMO_TTL: int = int(os.getenv("PROJECTION_MEMO_TTL", 7 * 24 * 3600))
+
+    # Spending rollups
+    ROLLUPS_ENABLED: bool = os.getenv("ROLLUPS_ENABLED", "True").lower() == "true"
+
+    # Transaction listing
+    COUNT_CACHE_TTL: int = int(os.getenv("COUNT_CACHE_TTL", 600))
+    COUNT_MAX_TIME_MS: int = int(os.getenv("COUNT_MAX_TIME_MS", 500))
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
 
 settings = Settings()
\ No newline at end of file
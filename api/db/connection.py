@@ -4,6 +4,7 @@ from typing import Optional
 from urllib.parse import urlparse
 from config.settings import settings
 from utils.logger import setup_logger
+from utils.metrics import mongo_command_metrics
 
 logger = setup_logger(__name__)
 
@@ -20,7 +21,7 @@ class MongoConnection:
     def connect(self) -> Database:
         if self._db is None:
             try:
-                self._client = MongoClient(settings.MONGO_URI)
+                self._client = MongoClient(settings.MONGO_URI, event_listeners=[mongo_command_metrics])
 
                 # Extract database name
                 parsed = urlparse(settings.MONGO_URI)
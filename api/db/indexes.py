@@ -0,0 +1,123 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.database import Database
+from pymongo.errors import OperationFailure
+from typing import Dict, Any, List, Tuple
+from datetime import datetime
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Declarative index registry: collection name -> indexes to keep in place.
+# Equality fields come first, then the `initiated_at` + `_id` sort key, so every listing
+# and insight query (including keyset seeks) can walk the index in order instead of sorting in memory.
+INDEX_REGISTRY: Dict[str, List[IndexModel]] = {
+    "transactions": [
+        IndexModel([("user_id", ASCENDING), ("initiated_at", DESCENDING), ("_id", DESCENDING)], name="user_initiated"),
+        IndexModel([("user_id", ASCENDING), ("status", ASCENDING), ("initiated_at", DESCENDING), ("_id", DESCENDING)], name="user_status_initiated"),
+        IndexModel([("user_id", ASCENDING), ("transaction_mode", ASCENDING), ("initiated_at", DESCENDING), ("_id", DESCENDING)], name="user_mode_initiated"),
+        IndexModel([("user_id", ASCENDING), ("transaction_type", ASCENDING), ("initiated_at", DESCENDING), ("_id", DESCENDING)], name="user_type_initiated"),
+        IndexModel([("user_id", ASCENDING), ("merchant.category", ASCENDING), ("initiated_at", DESCENDING), ("_id", DESCENDING)], name="user_category_initiated"),
+        IndexModel([("user_id", ASCENDING), ("to_account.user_name", ASCENDING), ("initiated_at", DESCENDING), ("_id", DESCENDING)], name="user_payee_initiated"),
+    ],
+    "spending_rollups": [
+        IndexModel([("user_id", ASCENDING), ("month", ASCENDING)], name="user_month"),
+    ],
+}
+
+PROBE_USER_ID = "explain-probe"
+
+# Listing order shared with services/transactions; every index above ends with these keys
+LIST_SORT = [("initiated_at", DESCENDING), ("_id", DESCENDING)]
+
+# Server error codes for an existing index whose name or keys no longer match the registry
+INDEX_CONFLICT_CODES = {85, 86}
+
+# Canonical query shapes served by services/transactions and tools/mongo_query_tool.
+# Each entry: (name, collection, filter without user_id, sort)
+CANONICAL_QUERIES: List[Tuple[str, str, Dict[str, Any], List[Tuple[str, int]]]] = [
+    ("list_by_user", "transactions", {}, LIST_SORT),
+    ("list_by_date_range", "transactions", {"initiated_at": {"$gte": datetime(2024, 1, 1), "$lte": datetime(2024, 12, 31)}}, LIST_SORT),
+    ("list_by_status", "transactions", {"status": "failed"}, LIST_SORT),
+    ("list_by_mode", "transactions", {"transaction_mode": "UPI"}, LIST_SORT),
+    ("list_by_type", "transactions", {"transaction_type": "debit"}, LIST_SORT),
+    ("insight_by_category", "transactions", {"merchant.category": {"$in": ["Food", "Shopping"]}}, LIST_SORT),
+    ("list_seek_page", "transactions", {"initiated_at": {"$lte": datetime(2024, 6, 1)}, "$or": [{"initiated_at": {"$lt": datetime(2024, 6, 1)}}, {"_id": {"$lt": "ffffffff"}}]}, LIST_SORT),
+    ("insight_by_payee", "transactions", {"to_account.user_name": "John Doe"}, LIST_SORT),
+    ("rollups_by_month", "spending_rollups", {"month": {"$gte": "2024-01", "$lt": "2025-01"}}, [("month", ASCENDING)]),
+]
+
+
+def ensure_indexes(db: Database, rebuild: bool = False) -> Dict[str, List[str]]:
+    # Creates missing registry indexes. An existing index whose spec conflicts is only logged,
+    # unless rebuild is set (setup/check-indexes.py --rebuild): dropping and rebuilding a large
+    # index blocks writes and belongs in a maintenance step, not in API startup.
+    created: Dict[str, List[str]] = {}
+    for collection_name, indexes in INDEX_REGISTRY.items():
+        collection = db[collection_name]
+        created[collection_name] = []
+        for index in indexes:
+            name = index.document["name"]
+            try:
+                # create_indexes is a no-op for indexes that already exist with the same spec
+                created[collection_name] += collection.create_indexes([index])
+            except OperationFailure as e:
+                if e.code not in INDEX_CONFLICT_CODES:
+                    raise
+                if not rebuild:
+                    logger.warning(
+                        f"Index '{name}' on '{collection_name}' conflicts with the registry; "
+                        f"run setup/check-indexes.py --rebuild to replace it: {e}"
+                    )
+                    continue
+                # A registry entry changed shape: drop whatever holds its name or keys, then recreate
+                logger.warning(f"Index spec conflict on '{collection_name}', rebuilding '{name}': {e}")
+                keys = list(index.document["key"].items())
+                for existing, info in collection.index_information().items():
+                    if existing == name or (existing != "_id_" and list(info["key"]) == keys):
+                        collection.drop_index(existing)
+                created[collection_name] += collection.create_indexes([index])
+        logger.info(f"Ensured {len(indexes)} indexes on '{collection_name}'")
+    return created
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    stages: List[str] = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(_plan_stages(value))
+    return stages
+
+
+def _probe_user_id(db: Database) -> str:
+    doc = db.transactions.find_one({}, {"user_id": 1})
+    return doc["user_id"] if doc else PROBE_USER_ID
+
+
+def verify_query_plans(db: Database) -> List[Dict[str, Any]]:
+    user_id = _probe_user_id(db)
+    report = []
+    for name, collection_name, query_filter, sort in CANONICAL_QUERIES:
+        query = {"user_id": user_id, **query_filter}
+        explain = db[collection_name].find(query).sort(sort).limit(25).explain()
+        winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+        stages = _plan_stages(winning_plan)
+
+        problems = []
+        if "COLLSCAN" in stages:
+            problems.append("COLLSCAN")
+        if "SORT" in stages:
+            problems.append("in-memory SORT")
+
+        report.append({
+            "name": name,
+            "collection": collection_name,
+            "stages": stages,
+            "ok": not problems,
+            "problems": problems,
+        })
+    return report
@@ -1,9 +1,13 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response
 from typing import Dict, Any
-from agents.finance_agent import finance_agent
+from services.insights import get_insight, stream_insight
+from services.prewarm import schedule_prewarm, DASHBOARD_QUERIES
+from utils.context import current_user_id
 from utils.response_formatter import ResponseFormatter
 from utils.logger import setup_logger
 from agents.memory import conversation_memory
+from utils.counters import counters_snapshot
+from agents.llm import llm_cache
 
 logger = setup_logger(__name__)
 
@@ -20,6 +24,8 @@ def process_financial_query() -> Dict[str, Any]:
         
         user_query = request.json.get('query', '').strip()
         session_id = request.json.get('session_id', 'default')
+        preferred_chart = request.json.get('preferred_chart')
+        bypass_cache = request.headers.get('X-Cache-Bypass', '').lower() in ('1', 'true', 'yes')
         
         if not user_query:
             return jsonify(ResponseFormatter.error_response(
@@ -28,8 +34,10 @@ def process_financial_query() -> Dict[str, Any]:
         
         logger.info(f"Received query: '{user_query}' for session: {session_id}")
         
-        # Process query with AI agent
-        result = finance_agent.process_query(user_query, session_id)
+        # Process query with AI agent, or serve a cached answer for a repeated question
+        result, cache_status = get_insight(
+            user_query, session_id, current_user_id.get() or session_id, preferred_chart, bypass_cache
+        )
         
         # Validate response structure
         if not ResponseFormatter.validate_query_response(result):
@@ -38,7 +46,9 @@ def process_financial_query() -> Dict[str, Any]:
                 "Internal processing error - invalid response format"
             )), 500
         
-        return jsonify(ResponseFormatter.success_response(result))
+        response = jsonify(ResponseFormatter.success_response(result))
+        response.headers['X-Cache'] = cache_status
+        return response
         
     except Exception as e:
         logger.error(f"Unexpected error in /query endpoint: {e}")
@@ -47,13 +57,68 @@ def process_financial_query() -> Dict[str, Any]:
             str(e)
         )), 500
     
+@insights_bp.route('/query/stream', methods=['POST'])
+def stream_financial_query():
+    # Same input as /query; emits SSE events (tool_start, tool_end, chart, summary_token, result, done)
+    if not request.json:
+        return jsonify(ResponseFormatter.error_response(
+            "Request body must be JSON"
+        )), 400
+
+    user_query = request.json.get('query', '').strip()
+    session_id = request.json.get('session_id', 'default')
+    preferred_chart = request.json.get('preferred_chart')
+    bypass_cache = request.headers.get('X-Cache-Bypass', '').lower() in ('1', 'true', 'yes')
+
+    if not user_query:
+        return jsonify(ResponseFormatter.error_response(
+            "Query parameter is required"
+        )), 400
+
+    logger.info(f"Received streaming query: '{user_query}' for session: {session_id}")
+
+    stream = stream_insight(
+        user_query, session_id, current_user_id.get() or session_id, preferred_chart, bypass_cache
+    )
+    return Response(
+        stream,
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@insights_bp.route('/warmup', methods=['POST'])
+def warmup_insights():
+    # Precomputes the standard dashboard questions for a user in the background
+    try:
+        user_id = (request.get_json(silent=True) or {}).get('userId')
+
+        if not user_id:
+            return jsonify(ResponseFormatter.error_response(
+                "User ID is required"
+            )), 400
+
+        status = schedule_prewarm(user_id)
+        logger.info(f"Warm-up for user {user_id}: {status}")
+
+        return jsonify(ResponseFormatter.success_response({
+            "status": status,
+            "queries": DASHBOARD_QUERIES
+        })), 202
+
+    except Exception as e:
+        logger.error(f"Unexpected error in /warmup endpoint: {e}")
+        return jsonify(ResponseFormatter.error_response(
+            "Internal server error",
+            str(e)
+        )), 500
+
 @insights_bp.route('/memory/<session_id>', methods=['GET'])
 def get_conversation_history(session_id: str) -> Dict[str, Any]:
     try:
         # Get conversation history for a session
-        context = conversation_memory.get_context(session_id)
+        history = conversation_memory.get_history(session_id)
         
-        if not context:
+        if not history:
             return jsonify(ResponseFormatter.success_response({
                 "session_id": session_id,
                 "history": [],
@@ -62,7 +127,7 @@ def get_conversation_history(session_id: str) -> Dict[str, Any]:
         
         return jsonify(ResponseFormatter.success_response({
             "session_id": session_id,
-            "history": conversation_memory.conversations.get(session_id, [])
+            "history": history
         }))
         
     except Exception as e:
@@ -76,8 +141,7 @@ def get_conversation_history(session_id: str) -> Dict[str, Any]:
 def clear_conversation_history(session_id: str) -> Dict[str, Any]:
     try:
         # Delete conversation history for a session
-        if session_id in conversation_memory.conversations:
-            del conversation_memory.conversations[session_id]
+        if conversation_memory.clear(session_id):
             logger.info(f"Cleared conversation history for session: {session_id}")
         
         return jsonify(ResponseFormatter.success_response({
@@ -89,4 +153,12 @@ def clear_conversation_history(session_id: str) -> Dict[str, Any]:
         return jsonify(ResponseFormatter.error_response(
             "Failed to clear conversation history",
             str(e)
-        )), 500
\ No newline at end of file
+        )), 500
+
+@insights_bp.route('/stats', methods=['GET'])
+def get_fast_path_stats() -> Dict[str, Any]:
+    # Hit rates of the rule-based and cached fast paths that bypass LLM calls
+    return jsonify(ResponseFormatter.success_response({
+        "counters": counters_snapshot(),
+        "llm_cache": llm_cache.stats() if llm_cache else None
+    }))
@@ -1,8 +1,8 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from typing import Dict, Any
 from utils.response_formatter import ResponseFormatter
 from utils.logger import setup_logger
-from services.transactions import get_transactions
+from services.transactions import get_transactions, stream_transactions, EXPORT_FORMATS
 
 logger = setup_logger(__name__)
 
@@ -38,3 +38,46 @@ def transactions() -> Dict[str, Any]:
             "Internal server error",
             str(e)
         )), 500
+
+@transactions_bp.route('/export', methods=['POST'])
+def export_transactions():
+    try:
+        # Validate request
+        if not request.json:
+            return jsonify(ResponseFormatter.error_response(
+                "Request body must be JSON"
+            )), 400
+        
+        user_id = request.json.get('userId')
+        export_format = (request.json.get('format') or 'ndjson').lower()
+        
+        if not user_id:
+            return jsonify(ResponseFormatter.error_response(
+                "User ID is required"
+            )), 400
+        
+        if export_format not in EXPORT_FORMATS:
+            return jsonify(ResponseFormatter.error_response(
+                "Unsupported export format",
+                f"Use one of: {', '.join(sorted(EXPORT_FORMATS))}"
+            )), 400
+        
+        logger.info(f"Received export request ({export_format}) for session: {user_id}")
+        
+        rows = stream_transactions(user_id, request.json, export_format)
+        
+        return Response(
+            stream_with_context(rows),
+            mimetype=EXPORT_FORMATS[export_format],
+            headers={
+                "Content-Disposition": f'attachment; filename="transactions-{user_id}.{export_format}"',
+                "X-Accel-Buffering": "no",
+            },
+        )
+        
+    except Exception as e:
+        logger.error(f"Unexpected error in /transactions/export endpoint: {e}")
+        return jsonify(ResponseFormatter.error_response(
+            "Internal server error",
+            str(e)
+        )), 500
@@ -0,0 +1,151 @@
+from agents.finance_agent import finance_agent
+from agents.memory import conversation_memory
+from agents.pipeline import insight_pipeline
+from utils.logger import setup_logger
+from utils.redis_utils import redis_client
+from utils.data_version import get_data_version
+from utils.mongo_utils import json_default
+from utils.counters import get_counter
+from config.settings import settings
+from utils.context import current_event_sink, current_cancel_event, raise_if_cancelled, RequestCancelled
+from utils.response_formatter import ResponseFormatter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Dict, Any, Iterator, Optional, Tuple
+import contextvars, hashlib, json, queue, re, threading
+
+logger = setup_logger(__name__)
+
+response_cache_counter = get_counter("insight_response_cache")
+
+CACHE_HIT = "HIT"
+CACHE_MISS = "MISS"
+CACHE_BYPASS = "BYPASS"
+
+# Comment line sent when no event arrived for this long, so proxies keep the stream open
+SSE_KEEPALIVE_SECONDS = 15
+_STREAM_END = object()
+
+# Bounded: a burst of streams queues here instead of starting a thread per request
+stream_executor = ThreadPoolExecutor(max_workers=settings.STREAM_WORKERS, thread_name_prefix="insight-stream")
+
+
+def normalize_query(query: str) -> str:
+    # Case, spacing and trailing punctuation do not change the answer
+    return re.sub(r"\s+", " ", query.strip().lower()).rstrip("?.! ")
+
+
+def _response_cache_key(user_id: str, query: str, preferred_chart: Optional[str]) -> str:
+    # Today's date is part of the key so relative ranges ("last 30 days") never outlive their day;
+    # the data version makes every cached answer for the user stale after a write
+    parts = [normalize_query(query), preferred_chart or "", date.today().isoformat()]
+    digest = hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()[:24]
+    return f"insight:{user_id}:v{get_data_version(user_id)}:{digest}"
+
+
+def _is_cacheable(result: Dict[str, Any]) -> bool:
+    visualization = result.get("visualization") or {}
+    return not result.get("error") and not visualization.get("error") and bool(visualization)
+
+
+def get_insight(
+    user_query: str,
+    session_id: str,
+    user_id: Optional[str],
+    preferred_chart: Optional[str] = None,
+    bypass_cache: bool = False,
+) -> Tuple[Dict[str, Any], str]:
+    # Returns (result, cache status). Follow-ups depend on the conversation, so they are never cached.
+    has_history = conversation_memory.has_history(session_id)
+    cacheable = bool(user_id) and insight_pipeline.is_on_script(user_query, has_history)
+
+    key = None
+    if cacheable and not bypass_cache:
+        try:
+            key = _response_cache_key(user_id, user_query, preferred_chart)
+            cached = redis_client.get_data(key)
+        except Exception as e:
+            logger.warning(f"Insight response cache unavailable: {e}")
+            cached = None
+
+        if cached:
+            response_cache_counter.hit()
+            result = json.loads(cached)
+            text_summary = (result.get("visualization") or {}).get("text_summary")
+            if text_summary:
+                conversation_memory.add_interaction(session_id, user_query, text_summary)
+            logger.info(f"Served insight for session {session_id} from cache")
+            return result, CACHE_HIT
+        response_cache_counter.miss()
+
+    result = finance_agent.process_query(user_query, session_id, preferred_chart)
+
+    if cacheable and _is_cacheable(result):
+        try:
+            key = key or _response_cache_key(user_id, user_query, preferred_chart)
+            redis_client.set_data(key, json.dumps(result, default=json_default), settings.INSIGHT_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"Failed to cache insight response: {e}")
+
+    return result, CACHE_BYPASS if bypass_cache else CACHE_MISS
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=json_default)}\n\n"
+
+
+def stream_insight(
+    user_query: str,
+    session_id: str,
+    user_id: Optional[str],
+    preferred_chart: Optional[str] = None,
+    bypass_cache: bool = False,
+) -> Iterator[str]:
+    # Runs get_insight on a worker thread and relays its tool/chart/token events as SSE.
+    # The caller's context is captured now, before the request tears down current_user_id.
+    events: "queue.Queue" = queue.Queue()
+    cancelled = threading.Event()
+    ctx = contextvars.copy_context()
+
+    def sink(event: str, data: Dict[str, Any]) -> None:
+        # Every tool and token event passes through here, so a gone client stops the work quickly
+        if cancelled.is_set():
+            raise RequestCancelled("client disconnected")
+        events.put((event, data))
+
+    def work():
+        current_event_sink.set(sink)
+        current_cancel_event.set(cancelled)
+        try:
+            raise_if_cancelled()
+            result, cache_status = get_insight(user_query, session_id, user_id, preferred_chart, bypass_cache)
+            events.put(("result", {**ResponseFormatter.success_response(result), "cache": cache_status}))
+        except RequestCancelled:
+            logger.info(f"Streaming insight for session {session_id} cancelled: client disconnected")
+        except Exception as e:
+            logger.exception(f"Streaming insight failed: {e}")
+            events.put(("error", ResponseFormatter.error_response("Internal server error", str(e))))
+        finally:
+            events.put(_STREAM_END)
+
+    stream_executor.submit(ctx.run, work)
+
+    def relay() -> Iterator[str]:
+        try:
+            yield _sse("start", {"query": user_query, "session_id": session_id})
+            while True:
+                try:
+                    item = events.get(timeout=SSE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is _STREAM_END:
+                    yield _sse("done", {})
+                    return
+                yield _sse(*item)
+        except GeneratorExit:
+            # The server closes the generator when the client disconnects
+            cancelled.set()
+            raise
+
+    return relay()
@@ -0,0 +1,91 @@
+from concurrent.futures import ThreadPoolExecutor
+from services.insights import get_insight, CACHE_HIT
+from agents.memory import conversation_memory
+from utils.logger import setup_logger
+from utils.redis_utils import redis_client
+from utils.data_version import get_data_version
+from utils.counters import get_counter
+from utils.context import current_user_id
+from utils.tool_runner import current_tool_executor
+from config.settings import settings
+from datetime import date
+from threading import Lock
+from typing import List, Set
+import contextvars, uuid
+
+logger = setup_logger(__name__)
+
+prewarm_counter = get_counter("insight_prewarm")
+
+# Standard first questions, answered ahead of time into the insight response cache when a user
+# is selected. The UI offers the same list as suggestions, so the cached answers get asked.
+DASHBOARD_QUERIES: List[str] = [
+    "Show my spending by category in the last 30 days",
+    "Show my top merchants in the last 30 days",
+    "Show my monthly spending trend for the last 6 months",
+    "Show my failed transactions in the last 30 days",
+]
+
+PREWARM_QUEUED = "queued"
+PREWARM_WARM = "warm"
+PREWARM_BUSY = "busy"
+
+prewarm_executor = ThreadPoolExecutor(max_workers=settings.PREWARM_WORKERS, thread_name_prefix="prewarm")
+# Concurrent tool calls inside a warm-up run here instead of on the shared tool_executor, so
+# warm-ups never take threads from live requests. Each warm-up has at most one call in flight.
+prewarm_tool_executor = ThreadPoolExecutor(max_workers=settings.PREWARM_WORKERS, thread_name_prefix="prewarm-tools")
+
+_pending: Set[str] = set()
+_pending_lock = Lock()
+
+
+def _marker_key(user_id: str) -> str:
+    # Same lifetime as the cached answers; a data write or a new day warms again
+    return f"prewarm:{user_id}:v{get_data_version(user_id)}:{date.today().isoformat()}"
+
+
+def _warm(user_id: str) -> None:
+    current_user_id.set(user_id)
+    current_tool_executor.set(prewarm_tool_executor)
+    try:
+        for query in DASHBOARD_QUERIES:
+            # Throwaway session so warm-up turns never show up in the user's conversation
+            session_id = f"prewarm-{uuid.uuid4().hex[:8]}"
+            try:
+                _, cache_status = get_insight(query, session_id, user_id)
+                if cache_status == CACHE_HIT:
+                    prewarm_counter.hit()
+                else:
+                    prewarm_counter.miss()
+            except Exception as e:
+                logger.warning(f"Pre-warming '{query}' failed for user {user_id}: {e}")
+            finally:
+                conversation_memory.clear(session_id)
+        logger.info(f"Pre-warmed {len(DASHBOARD_QUERIES)} insights for user {user_id}")
+    finally:
+        with _pending_lock:
+            _pending.discard(user_id)
+
+
+def schedule_prewarm(user_id: str) -> str:
+    # Cap check and claim under one lock, so concurrent selections cannot overshoot the cap
+    with _pending_lock:
+        if user_id in _pending:
+            return PREWARM_QUEUED
+        if len(_pending) >= settings.PREWARM_MAX_PENDING:
+            return PREWARM_BUSY
+        _pending.add(user_id)
+
+    submitted = False
+    try:
+        # Claimed in Redis, so repeated selections and other workers do not warm the same user twice
+        if not redis_client.set_if_absent(_marker_key(user_id), "1", settings.INSIGHT_CACHE_TTL):
+            return PREWARM_WARM
+        # Fresh context: nothing from the triggering request (event sink, user) leaks into the worker
+        prewarm_executor.submit(contextvars.Context().run, _warm, user_id)
+        submitted = True
+    finally:
+        if not submitted:
+            with _pending_lock:
+                _pending.discard(user_id)
+    return PREWARM_QUEUED
@@ -0,0 +1,101 @@
+from db.connection import mongo_conn
+from utils.logger import setup_logger
+from pymongo import UpdateOne
+from pymongo.database import Database
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = setup_logger(__name__)
+
+# Per-user monthly spending totals, one document per
+# (user_id, month, category, merchant, mode, currency). Breakdowns and monthly trends over
+# whole months read these instead of every matching transaction.
+
+ROLLUPS_COLLECTION = "spending_rollups"
+
+# Rollup dimension -> expression over a transaction document. category/merchant use the same
+# fallbacks as mongo_query_tool's group keys, so both sources label groups identically.
+ROLLUP_KEYS: Dict[str, Any] = {
+    "user_id": "$user_id",
+    "month": {"$dateToString": {"format": "%Y-%m", "date": "$initiated_at"}},
+    "category": {"$ifNull": ["$merchant.category", "Transfers"]},
+    "merchant": {"$ifNull": ["$merchant.name", "$to_account.user_name"]},
+    "mode": "$transaction_mode",
+    "currency": "$currency",
+}
+
+
+def _rollup_pipeline(match: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {"$match": match},
+        {
+            "$group": {
+                "_id": ROLLUP_KEYS,
+                "total_amount": {"$sum": "$amount"},
+                "transaction_count": {"$sum": 1},
+                "min_amount": {"$min": "$amount"},
+                "max_amount": {"$max": "$amount"},
+                "first_at": {"$min": "$initiated_at"},
+                "last_at": {"$max": "$initiated_at"},
+            }
+        },
+        # Dimensions are also stored flat so rollup reads can filter and group on them directly
+        {"$addFields": {key: f"$_id.{key}" for key in ROLLUP_KEYS}},
+    ]
+
+
+def rebuild_rollups(db: Optional[Database] = None, user_id: Optional[str] = None) -> int:
+    # Full rebuild replaces the collection in one step; a per-user rebuild rewrites only that user's rows
+    db = db if db is not None else mongo_conn.connect()
+    rollups = db[ROLLUPS_COLLECTION]
+
+    if user_id is None:
+        db.transactions.aggregate(_rollup_pipeline({}) + [{"$out": ROLLUPS_COLLECTION}], allowDiskUse=True)
+    else:
+        rollups.delete_many({"user_id": user_id})
+        db.transactions.aggregate(
+            _rollup_pipeline({"user_id": user_id})
+            + [{"$merge": {"into": ROLLUPS_COLLECTION, "whenMatched": "replace", "whenNotMatched": "insert"}}],
+            allowDiskUse=True,
+        )
+
+    count = rollups.count_documents({"user_id": user_id} if user_id else {})
+    logger.info(f"Rebuilt {count} rollup rows" + (f" for user {user_id}" if user_id else ""))
+    return count
+
+
+def _rollup_key(txn: Dict[str, Any]) -> Dict[str, Any]:
+    merchant = txn.get("merchant") or {}
+    to_account = txn.get("to_account") or {}
+    return {
+        "user_id": txn["user_id"],
+        "month": txn["initiated_at"].strftime("%Y-%m"),
+        "category": merchant.get("category") or "Transfers",
+        "merchant": merchant.get("name") or to_account.get("user_name"),
+        "mode": txn.get("transaction_mode"),
+        "currency": txn.get("currency"),
+    }
+
+
+def apply_transactions(transactions: Iterable[Dict[str, Any]], db: Optional[Database] = None) -> int:
+    # Incremental upkeep for newly inserted transactions. Updates and deletes change totals in
+    # ways $inc cannot undo; call rebuild_rollups(user_id=...) for those users instead.
+    ops = []
+    for txn in transactions:
+        key = _rollup_key(txn)
+        amount = txn.get("amount", 0)
+        ops.append(UpdateOne(
+            {"_id": key},
+            {
+                "$setOnInsert": key,
+                "$inc": {"total_amount": amount, "transaction_count": 1},
+                "$min": {"min_amount": amount, "first_at": txn["initiated_at"]},
+                "$max": {"max_amount": amount, "last_at": txn["initiated_at"]},
+            },
+            upsert=True,
+        ))
+
+    if not ops:
+        return 0
+    db = db if db is not None else mongo_conn.connect()
+    db[ROLLUPS_COLLECTION].bulk_write(ops, ordered=False)
+    return len(ops)
@@ -1,11 +1,68 @@
 from db.connection import mongo_conn
 from utils.logger import setup_logger
 from datetime import datetime
-from pymongo import DESCENDING
-from utils.mongo_utils import serialize
+from bson import ObjectId
+from utils.mongo_utils import serialize, json_default
+from utils.redis_utils import redis_client
+from utils.data_version import get_data_version
+from config.settings import settings
+from db.indexes import LIST_SORT
+from pymongo.errors import ExecutionTimeout
+import base64, json, hashlib, csv, io
 
 logger = setup_logger(__name__)
 
+# LIST_SORT is newest first with `_id` breaking ties, so keyset pages never skip or repeat rows
+
+LIST_PROJECTION = {
+    "_id": 1,
+    "transaction_id": 1,
+    "user_id": 1,
+    "from_account": {
+        "_id": 1,
+        "user_id": 1,
+        "user_name": 1,
+        "account_number": 1,
+    },
+    "to_account": 1,
+    "merchant": {
+        "_id": 1,
+        "name": 1,
+        "type": 1,
+        "category": 1,
+    },
+    "amount": 1,
+    "currency": 1,
+    "transaction_type": 1,
+    "transaction_mode": 1,
+    "status": 1,
+    "initiated_at": 1,
+    "completed_at": 1,
+    "failed_at": 1,
+    "remarks": 1,
+    "description": 1,
+    "reference_number": 1,
+    "order_id": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
+
+# Flat CSV columns in LIST_PROJECTION order; nested fields use dotted paths
+EXPORT_COLUMNS = [
+    "_id", "transaction_id", "user_id",
+    "from_account._id", "from_account.user_id", "from_account.user_name", "from_account.account_number",
+    "to_account._id", "to_account.user_id", "to_account.user_name", "to_account.account_number",
+    "merchant._id", "merchant.name", "merchant.type", "merchant.category",
+    "amount", "currency", "transaction_type", "transaction_mode", "status",
+    "initiated_at", "completed_at", "failed_at",
+    "remarks", "description", "reference_number", "order_id", "created_at", "updated_at",
+]
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
 def build_query(user_id: str, criteria: dict):
 
     from_date = criteria.get("fromDate")
@@ -33,8 +90,105 @@ def build_query(user_id: str, criteria: dict):
     return query
 
 
+def encode_cursor(doc: dict) -> str:
+    doc_id = doc["_id"]
+    raw = {
+        "t": doc["initiated_at"].isoformat(),
+        "id": str(doc_id),
+        "oid": isinstance(doc_id, ObjectId),
+    }
+    return base64.urlsafe_b64encode(json.dumps(raw, separators=(",", ":")).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        initiated_at = datetime.fromisoformat(raw["t"])
+        doc_id = ObjectId(raw["id"]) if raw.get("oid") else raw["id"]
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+    # Seek strictly past (initiated_at, _id) in LIST_SORT order.
+    # The $lte bound keeps this a single index range; the $or only re-checks ties.
+    return {
+        "initiated_at": {"$lte": initiated_at},
+        "$or": [
+            {"initiated_at": {"$lt": initiated_at}},
+            {"_id": {"$lt": doc_id}},
+        ],
+    }
+
+
+def _count_cache_key(user_id: str, base_query: dict) -> str:
+    # Normalized filter: everything but user_id, keys sorted, datetimes as ISO strings
+    normalized = {k: v for k, v in base_query.items() if k != "user_id"}
+    digest = hashlib.sha256(json.dumps(normalized, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:24]
+    return f"txcount:{user_id}:v{get_data_version(user_id)}:{digest}"
+
+
+def _count_user_transactions(tx, user_id: str) -> int:
+    # Every registry index leads with user_id, so the planner answers this with an index-only
+    # COUNT_SCAN. No hint: a hinted index that is missing (e.g. a logged name conflict) fails the query.
+    return tx.count_documents({"user_id": user_id})
+
+
+def count_transactions(tx, user_id: str, base_query: dict):
+    key = _count_cache_key(user_id, base_query)
+    cached = redis_client.get_data(key)
+    if cached:
+        entry = json.loads(cached)
+        return entry["total"], entry["exact"]
+
+    if set(base_query) == {"user_id"}:
+        total, exact = _count_user_transactions(tx, user_id), True
+    else:
+        try:
+            total, exact = tx.count_documents(base_query, maxTimeMS=settings.COUNT_MAX_TIME_MS), True
+        except ExecutionTimeout:
+            # Too expensive to count exactly right now: the user's total is an upper bound
+            logger.warning(f"Exact count exceeded {settings.COUNT_MAX_TIME_MS}ms for {key}, using estimate")
+            total, exact = _count_user_transactions(tx, user_id), False
+
+    # Estimates are retried sooner so an exact count replaces them once load allows
+    ttl = settings.COUNT_CACHE_TTL if exact else max(settings.COUNT_CACHE_TTL // 10, 1)
+    redis_client.set_data(key, json.dumps({"total": total, "exact": exact}), ttl)
+    return total, exact
+
+
+def get_transactions_page(user_id: str, criteria: dict):
+    page_size = int(criteria.get("pageSize", 25))
+    cursor = criteria.get("cursor")
+
+    base_query = build_query(user_id, criteria)
+    query = {"$and": [base_query, decode_cursor(cursor)]} if cursor else base_query
+
+    db = mongo_conn.connect()
+    tx = db.transactions
+
+    # Fetch one extra row to learn whether another page exists without counting
+    docs = list(tx.find(query, LIST_PROJECTION).sort(LIST_SORT).limit(page_size + 1))
+    has_more = len(docs) > page_size
+    docs = docs[:page_size]
+
+    total_records, total_is_exact = count_transactions(tx, user_id, base_query)
+
+    return {
+        "items": [serialize(doc) for doc in docs],
+        "page_size": page_size,
+        "next_cursor": encode_cursor(docs[-1]) if has_more else None,
+        "has_more": has_more,
+        "total_records": total_records,
+        "total_is_exact": total_is_exact,
+    }
+
+
 def get_transactions(user_id: str, criteria: dict):
     try:
+        # Keyset mode: any request carrying a `cursor` key (null/empty for the first page)
+        if "cursor" in criteria:
+            return get_transactions_page(user_id, criteria)
+
         page_size = int(criteria.get("pageSize", 25))
         page_number = int(criteria.get("pageNumber", 1))
         skip_count = max(page_number - 1, 0) * page_size
@@ -45,76 +199,13 @@ def get_transactions(user_id: str, criteria: dict):
         db = mongo_conn.connect()
         tx = db.transactions
 
-        pipeline = [
-            {"$match": base_query},
-            {
-                "$facet": {
-                    "items": [
-                        {"$sort": {"initiated_at": DESCENDING}},
-                        {"$skip": skip_count},
-                        {"$limit": page_size},
-                        {
-                            "$project": {
-                                "_id": 1,
-                                "transaction_id": 1,
-                                "user_id": 1,
-                                "from_account": {
-                                    "_id": 1,
-                                    "user_id": 1,
-                                    "user_name": 1,
-                                    "account_number": 1,
-                                },
-                                "to_account": 1,
-                                "merchant": {
-                                    "_id": 1,
-                                    "name": 1,
-                                    "type": 1,
-                                    "category": 1,
-                                },
-                                "amount": 1,
-                                "currency": 1,
-                                "transaction_type": 1,
-                                "transaction_mode": 1,
-                                "status": 1,
-                                "initiated_at": 1,
-                                "completed_at": 1,
-                                "failed_at": 1,
-                                "remarks": 1,
-                                "description": 1,
-                                "reference_number": 1,
-                                "order_id": 1,
-                                "created_at": 1,
-                                "updated_at": 1,
-                            }
-                        },
-                    ],
-                    "count": [
-                        {"$count": "total_records"}
-                    ],
-                }
-            },
-            {
-                "$project": {
-                    "items": 1,
-                    "total_records": {
-                        "$ifNull": [{"$arrayElemAt": ["$count.total_records", 0]}, 0]
-                    },
-                }
-            },
-        ]
-
-        agg = list(tx.aggregate(pipeline, allowDiskUse=True))
-        if not agg:
-            return {
-                "items": [],
-                "total_records": 0,
-                "page_number": page_number,
-                "page_size": page_size,
-                "total_pages": 0,
-            }
-
-        items = agg[0].get("items", [])
-        total_records = int(agg[0].get("total_records", 0))
+        items = list(tx.find(base_query, LIST_PROJECTION).sort(LIST_SORT).skip(skip_count).limit(page_size))
+
+        # Totals come from the count cache instead of a $count over every matching row
+        total_records, total_is_exact = count_transactions(tx, user_id, base_query)
+
+        # Lets offset clients switch to keyset paging from any page
+        next_cursor = encode_cursor(items[-1]) if items and skip_count + len(items) < total_records else None
 
         items = [serialize(doc) for doc in items]
 
@@ -124,8 +215,64 @@ def get_transactions(user_id: str, criteria: dict):
             "page_number": page_number,
             "page_size": page_size,
             "total_pages": (total_records + page_size - 1) // page_size,
+            "total_is_exact": total_is_exact,
+            "next_cursor": next_cursor,
         }
 
     except Exception as e:
-        logger.exception(f"MongoDB aggregation failed: {e}")
+        logger.exception(f"MongoDB query failed: {e}")
         return {"error": str(e)}
+
+
+def _csv_value(doc: dict, path: str):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return json_default(value) if value is not None and not isinstance(value, (str, int, float, bool)) else value
+
+
+def stream_transactions(user_id: str, criteria: dict, fmt: str = "ndjson"):
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'. Use one of: {sorted(EXPORT_FORMATS)}")
+
+    base_query = build_query(user_id, criteria)
+    batch_size = settings.EXPORT_BATCH_SIZE
+
+    def generate():
+        db = mongo_conn.connect()
+        cursor = db.transactions.find(base_query, LIST_PROJECTION).sort(LIST_SORT).batch_size(batch_size)
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if fmt == "csv" else None
+        if writer:
+            writer.writerow(EXPORT_COLUMNS)
+            # Send the header right away so the client sees bytes before the first batch
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        rows = 0
+        try:
+            for doc in cursor:
+                if writer:
+                    writer.writerow([_csv_value(doc, c) for c in EXPORT_COLUMNS])
+                else:
+                    buffer.write(json.dumps(doc, default=json_default))
+                    buffer.write("\n")
+                rows += 1
+
+                # One chunk per Mongo batch keeps memory flat regardless of history size
+                if rows % batch_size == 0:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+
+            if buffer.tell():
+                yield buffer.getvalue()
+        finally:
+            cursor.close()
+            logger.info(f"Exported {rows} transactions for user {user_id} as {fmt}")
+
+    return generate()
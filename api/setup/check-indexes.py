@@ -0,0 +1,30 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connection import mongo_conn
+from db.indexes import ensure_indexes, verify_query_plans
+
+if __name__ == "__main__":
+    db = mongo_conn.connect()
+
+    # --rebuild replaces indexes whose spec drifted from the registry; API startup only logs them
+    if "--no-create" not in sys.argv:
+        ensure_indexes(db, rebuild="--rebuild" in sys.argv)
+
+    report = verify_query_plans(db)
+    failed = [r for r in report if not r["ok"]]
+
+    for r in report:
+        status = "OK  " if r["ok"] else "FAIL"
+        detail = ", ".join(r["problems"]) if r["problems"] else " -> ".join(r["stages"])
+        print(f"[{status}] {r['name']:<22} {detail}")
+
+    mongo_conn.close()
+
+    if failed:
+        print(f"{len(failed)} of {len(report)} query shapes are not fully index-backed")
+        sys.exit(1)
+
+    print(f"All {len(report)} query shapes are index-backed")
@@ -1,13 +1,29 @@
+import os
+import sys
+import time
 import uuid
 import random
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from faker import Faker
 from pymongo import MongoClient
+import numpy as np
 import bson
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.indexes import ensure_indexes
+from utils.data_version import bump_data_version
+from services.rollups import rebuild_rollups
+
+MONGO_URI = "mongodb://localhost:27017/"
+DB_NAME = "finadvisor"
+
 fake = Faker()
-client = MongoClient("mongodb://localhost:27017/")
-db = client["finadvisor"]
+client = MongoClient(MONGO_URI)
+db = client[DB_NAME]
 
 users_collection = db["users"]          
 transactions_collection = db["transactions"]  
@@ -16,6 +32,12 @@ numberOfRecords = 30000
 num_users = max(30, numberOfRecords // 1000)  
 num_merchants = 750
 
+# Scale-factor mode: rows per unit of --scale-factor, and how much work each pool task gets
+ROWS_PER_SCALE_FACTOR = 1_000_000
+SCALE_BATCH_SIZE = 20_000
+SCALE_CHUNKS_PER_WORKER = 4
+REMARKS_POOL_SIZE = 1000
+
 transaction_types = ["credit", "debit", "refund"]
 transaction_modes = ["UPI", "Card", "BankTransfer", "Cash"]
 statuses = ["initiated", "success", "failed", "refunded"]
@@ -36,18 +58,22 @@ merchant_categories = {
 
 merchant_types = [m for types in merchant_categories.values() for m in types]
 
+def random_uuid():
+    # Drawn from `random` so --seed reproduces ids too
+    return str(uuid.UUID(int=random.getrandbits(128), version=4))
+
 def random_timestamp():
     return fake.date_time_between(start_date="-365d", end_date="now")
 
-def create_users_if_empty():
+def create_users_if_empty(count=num_users):
     existing = users_collection.estimated_document_count()
-    if existing >= num_users:
+    if existing >= count:
         return [doc["_id"] for doc in users_collection.find({}, {"_id": 1})]
 
     users = []
-    for _ in range(num_users - existing):
+    for _ in range(count - existing):
         users.append({
-            "_id": str(uuid.uuid4()),
+            "_id": random_uuid(),
             "name": fake.name(),
             "email": fake.email(),
             "created_at": datetime.now(),
@@ -63,7 +89,7 @@ def create_accounts(user_ids):
     accounts = []
     for uid in user_ids:
         accounts.append({
-            "_id": str(uuid.uuid4()),
+            "_id": random_uuid(),
             "user_id": uid,
             "account_number": fake.iban(),
         })
@@ -74,7 +100,7 @@ def create_merchants():
     for _ in range(num_merchants):
         m_type = random.choice(merchant_types)
         merchants.append({
-            "_id": str(uuid.uuid4()),
+            "_id": random_uuid(),
             "name": f"{fake.company()} {m_type}",
             "type": m_type,
             "category": next(cat for cat, vals in merchant_categories.items() if m_type in vals),
@@ -105,7 +131,9 @@ def create_transactions_merged(user_ids, accounts, merchants):
             description = f"Payment to {merchant_obj['name']}"
             remarks = f"{merchant_obj['type']} expense"
         else:
-            to_user_id = random.choice([uid for uid in user_ids if uid != user_id])
+            to_user_id = user_id
+            while to_user_id == user_id:
+                to_user_id = random.choice(user_ids)
             to_acc = account_by_user[to_user_id]
             to_account_obj = {
                 "_id": to_acc["_id"],
@@ -126,8 +154,8 @@ def create_transactions_merged(user_ids, accounts, merchants):
         amount = round(random.uniform(10, 10000), 2) if currency == "INR" else round(random.uniform(1, 1000), 2)
 
         txn_doc = {
-            "_id": str(uuid.uuid4()),
-            "transaction_id": str(uuid.uuid4()),
+            "_id": random_uuid(),
+            "transaction_id": random_uuid(),
             "user_id": user_id,
 
             "from_account": {
@@ -162,7 +190,7 @@ def create_transactions_merged(user_ids, accounts, merchants):
             "remarks": remarks,
             "description": description,
             "reference_number": str(bson.ObjectId()),
-            "order_id": str(uuid.uuid4()) if is_merchant_payment else None,
+            "order_id": random_uuid() if is_merchant_payment else None,
 
             "created_at": initiated_at,
             "updated_at": datetime.now(),
@@ -180,14 +208,184 @@ def create_transactions_merged(user_ids, accounts, merchants):
 
     return total
 
+# --- Scale-factor mode ---------------------------------------------------------------
+# Columns are drawn in NumPy batches; only the final dict assembly is per row. Each pool
+# process owns a MongoClient and inserts batch k (unordered) on a writer thread while it
+# generates batch k+1.
+
+_worker = {}
+
+def _init_worker(user_ids, accounts, users_by_id, merchants, remarks, now):
+    account_by_user = {a["user_id"]: a for a in accounts}
+    _worker.update({
+        "collection": MongoClient(MONGO_URI)[DB_NAME]["transactions"],
+        "user_ids": user_ids,
+        # Embedded subdocuments are built once per user/merchant and shared by every row
+        "from_accounts": [{
+            "_id": account_by_user[uid]["_id"],
+            "user_id": uid,
+            "user_name": users_by_id.get(uid),
+            "account_number": account_by_user[uid]["account_number"],
+        } for uid in user_ids],
+        "merchants": [{k: m[k] for k in ("_id", "name", "type", "category")} for m in merchants],
+        "remarks": remarks,
+        "now": now,
+    })
+
+def _uuids(rng, n):
+    raw = rng.bytes(16 * n)
+    return [str(uuid.UUID(bytes=raw[i * 16:(i + 1) * 16], version=4)) for i in range(n)]
+
+def _vectorized_batch(rng, n):
+    users = _worker["user_ids"]
+    from_accounts = _worker["from_accounts"]
+    merchants = _worker["merchants"]
+    remarks = _worker["remarks"]
+    now = _worker["now"]
+
+    user_idx = rng.integers(0, len(users), n)
+    # An offset in [1, users) never lands on the sender
+    to_user_idx = (user_idx + rng.integers(1, len(users), n)) % len(users)
+    is_merchant = rng.random(n) < 0.7
+    merchant_idx = rng.integers(0, len(merchants), n)
+    remark_idx = rng.integers(0, len(remarks), n)
+
+    initiated = np.datetime64(now, "s") - rng.integers(0, 365 * 86400, n).astype("timedelta64[s]")
+    settled = initiated + rng.integers(60, 3601, n).astype("timedelta64[s]")
+    status_idx = rng.integers(0, len(statuses), n)
+
+    is_inr = rng.random(n) < 0.9
+    currency = np.where(is_inr, "INR", rng.choice(["USD", "EUR"], n))
+    amount = np.where(is_inr, rng.uniform(10, 10000, n), rng.uniform(1, 1000, n)).round(2)
+    type_idx = rng.integers(0, len(transaction_types), n)
+    mode_idx = rng.integers(0, len(transaction_modes), n)
+
+    ids, transaction_ids, order_ids = _uuids(rng, n), _uuids(rng, n), _uuids(rng, n)
+    refs = rng.bytes(12 * n).hex()
+
+    # Plain Python values for BSON
+    cols = [c.tolist() for c in (
+        user_idx, to_user_idx, is_merchant, merchant_idx, remark_idx, status_idx, currency, amount, type_idx, mode_idx,
+        initiated.astype("datetime64[us]"), settled.astype("datetime64[us]"),
+    )]
+
+    docs = []
+    for i, (u, to_u, merchant_pay, m, r, st, cur, amt, ty, mo, init_at, settle_at) in enumerate(zip(*cols)):
+        status = statuses[st]
+        merchant = merchants[m] if merchant_pay else None
+        to_account = None if merchant_pay else from_accounts[to_u]
+        docs.append({
+            "_id": ids[i],
+            "transaction_id": transaction_ids[i],
+            "user_id": users[u],
+            "from_account": from_accounts[u],
+            "to_account": to_account,
+            "merchant": merchant,
+            "amount": amt,
+            "currency": cur,
+            "transaction_type": transaction_types[ty],
+            "transaction_mode": transaction_modes[mo],
+            "status": status,
+            "initiated_at": init_at,
+            "completed_at": settle_at if status in ("success", "refunded") else None,
+            "failed_at": settle_at if status == "failed" else None,
+            "remarks": f"{merchant['type']} expense" if merchant_pay else remarks[r],
+            "description": f"Payment to {merchant['name']}" if merchant_pay else f"Transfer to {to_account['user_name'] or 'Recipient'}",
+            "reference_number": refs[i * 24:(i + 1) * 24],
+            "order_id": order_ids[i] if merchant_pay else None,
+            "created_at": init_at,
+            "updated_at": now,
+        })
+    return docs
+
+def _insert_unordered(docs):
+    return len(_worker["collection"].insert_many(docs, ordered=False).inserted_ids)
+
+def _generate_chunk(chunk_index, rows, batch_size, seed):
+    rng = np.random.default_rng([seed, chunk_index])
+    written = 0
+    pending = None
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        for start in range(0, rows, batch_size):
+            docs = _vectorized_batch(rng, min(batch_size, rows - start))
+            # At most one batch in flight, so memory stays bounded while generation continues
+            if pending:
+                written += pending.result()
+            pending = writer.submit(_insert_unordered, docs)
+        if pending:
+            written += pending.result()
+    return written
+
+def create_transactions_scaled(user_ids, accounts, merchants, rows, seed, workers, batch_size=SCALE_BATCH_SIZE):
+    users_by_id = {u["_id"]: u.get("name") for u in users_collection.find({}, {"_id": 1, "name": 1})}
+    remarks = [fake.sentence(nb_words=3) for _ in range(REMARKS_POOL_SIZE)]
+    now = datetime.now().replace(microsecond=0)
+
+    chunks = workers * SCALE_CHUNKS_PER_WORKER
+    sizes = [rows // chunks + (1 if i < rows % chunks else 0) for i in range(chunks)]
+
+    total = 0
+    started = time.perf_counter()
+    # spawn: a forked child would inherit this process's MongoClient
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(user_ids, accounts, users_by_id, merchants, remarks, now),
+    ) as pool:
+        futures = [pool.submit(_generate_chunk, i, size, batch_size, seed) for i, size in enumerate(sizes) if size]
+        for future in as_completed(futures):
+            total += future.result()
+            elapsed = time.perf_counter() - started
+            print(f"{total:>12,} / {rows:,} rows  {total / elapsed:,.0f} rows/s")
+
+    elapsed = time.perf_counter() - started
+    print(f"Inserted {total:,} transactions in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s, {workers} workers)")
+    return total
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed users, accounts, merchants and transactions")
+    parser.add_argument("--scale-factor", type=float,
+                        help=f"generate scale_factor x {ROWS_PER_SCALE_FACTOR:,} transactions with the vectorized process-pool generator")
+    parser.add_argument("--seed", type=int, help="seed for reproducible data (scale-factor mode: with the same --workers and --batch-size)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="generator processes in scale-factor mode")
+    parser.add_argument("--batch-size", type=int, default=SCALE_BATCH_SIZE, help="rows per insert_many in scale-factor mode")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.SystemRandom().randrange(2 ** 32)
+    random.seed(seed)
+    Faker.seed(seed)
+
     users_collection.drop()
     transactions_collection.drop()
 
-    user_ids = create_users_if_empty()
-    accounts = create_accounts(user_ids)
-    merchants = create_merchants()
-    total = create_transactions_merged(user_ids, accounts, merchants)
+    if args.scale_factor:
+        rows = int(args.scale_factor * ROWS_PER_SCALE_FACTOR)
+        user_ids = create_users_if_empty(max(30, rows // 1000))
+        accounts = create_accounts(user_ids)
+        merchants = create_merchants()
+        total = create_transactions_scaled(user_ids, accounts, merchants, rows, seed, args.workers, args.batch_size)
+    else:
+        user_ids = create_users_if_empty()
+        accounts = create_accounts(user_ids)
+        merchants = create_merchants()
+        started = time.perf_counter()
+        total = create_transactions_merged(user_ids, accounts, merchants)
+        print(f"Inserted {total:,} transactions ({total / (time.perf_counter() - started):,.0f} rows/s)")
+
+    # Build indexes once after the bulk load rather than maintaining them per insert
+    ensure_indexes(db)
+
+    # Monthly totals for whole-month breakdowns and trends
+    rebuild_rollups(db)
+
+    # Invalidate cached counts and results derived from the previous data set
+    try:
+        for uid in user_ids:
+            bump_data_version(uid)
+    except Exception as e:
+        print(f"Skipped cache invalidation, Redis unavailable: {e}")
 
     print(f"Generated {len(user_ids)} users, {len(accounts)} accounts, "
-          f"{len(merchants)} merchants, and {total} transactions")
+          f"{len(merchants)} merchants, and {total} transactions (seed {seed})")
@@ -0,0 +1,28 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connection import mongo_conn
+from db.indexes import ensure_indexes
+from services.rollups import rebuild_rollups
+from utils.data_version import bump_data_version
+
+if __name__ == "__main__":
+    db = mongo_conn.connect()
+
+    # --user <id> rebuilds a single user's rows, e.g. after updating or deleting their transactions
+    user_id = sys.argv[sys.argv.index("--user") + 1] if "--user" in sys.argv else None
+
+    count = rebuild_rollups(db, user_id)
+    ensure_indexes(db)
+
+    # Cached answers computed from the previous rollups are stale now
+    try:
+        for uid in [user_id] if user_id else db.transactions.distinct("user_id"):
+            bump_data_version(uid)
+    except Exception as e:
+        print(f"Skipped cache invalidation, Redis unavailable: {e}")
+
+    mongo_conn.close()
+    print(f"Rebuilt {count} rollup rows" + (f" for user {user_id}" if user_id else ""))
@@ -0,0 +1,101 @@
+import os
+import sys
+
+# Tests import the API modules the same way app.py does, from the api/ directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Offline defaults: nothing under test may reach a real LLM
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("LLM_CACHE_ENABLED", "False")
+
+import random
+from datetime import datetime, timedelta
+
+import fakeredis
+import mongomock
+import pytest
+
+from db.connection import mongo_conn
+from utils.redis_utils import redis_client
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    # In-memory Redis behind the shared client; both decoded and raw views see the same data
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis_client, "redis", fakeredis.FakeRedis(server=server, decode_responses=True))
+    monkeypatch.setattr(redis_client, "raw", fakeredis.FakeRedis(server=server))
+    return redis_client
+
+
+@pytest.fixture
+def mongo_db(monkeypatch):
+    # In-memory database returned by mongo_conn.connect()
+    db = mongomock.MongoClient().finadvisor
+    monkeypatch.setattr(mongo_conn, "_db", db)
+    return db
+
+
+@pytest.fixture(autouse=True)
+def _mongomock_bulk_writes(monkeypatch):
+    # mongomock's bulk_write does not accept current pymongo UpdateOne ops; apply them one by one
+    def bulk_write(self, ops, ordered=True):
+        for op in ops:
+            self.update_one(op._filter, op._doc, upsert=op._upsert)
+
+    monkeypatch.setattr(mongomock.collection.Collection, "bulk_write", bulk_write)
+
+
+USER = "u1"
+MERCHANTS = [("Swiggy", "Food"), ("Amazon", "Shopping"), ("Uber", "Travel"), ("Netflix", "Entertainment")]
+PAYEES = ["Alice", "Bob"]
+
+
+def sample_transactions(count: int = 300):
+    # Seeded mix of merchant payments and P2P transfers over ~200 days, mostly for USER
+    rng = random.Random(7)
+    start = datetime(2026, 4, 1)
+    docs = []
+    for i in range(count):
+        doc = {
+            "_id": f"t{i:04d}",
+            "user_id": USER if i % 10 else "u2",
+            "initiated_at": start + timedelta(minutes=rng.randint(0, 200 * 24 * 60)),
+            "amount": round(rng.uniform(1, 500), 2),
+            "transaction_mode": rng.choice(["UPI", "Card", "BankTransfer"]),
+            "currency": "INR",
+        }
+        if rng.random() < 0.7:
+            name, category = rng.choice(MERCHANTS)
+            doc["merchant"] = {"name": name, "category": category}
+        else:
+            doc["merchant"] = None
+            doc["to_account"] = {"user_name": rng.choice(PAYEES)}
+        docs.append(doc)
+    return docs
+
+
+@pytest.fixture
+def spending_db(mongo_db):
+    mongo_db.transactions.insert_many(sample_transactions())
+    return mongo_db
+
+
+def _without_round(stage):
+    # mongomock has no $round; tests compare the unrounded sums with approx instead
+    if isinstance(stage, dict):
+        if set(stage) == {"$round"}:
+            return _without_round(stage["$round"][0])
+        return {k: _without_round(v) for k, v in stage.items()}
+    if isinstance(stage, list):
+        return [_without_round(v) for v in stage]
+    return stage
+
+
+@pytest.fixture
+def aggregate_groups():
+    # Runs a mongo_query_tool group pipeline and returns (kept groups, totals over all groups)
+    def run(collection, pipeline):
+        out = list(collection.aggregate(_without_round(pipeline)))[0]
+        return out["groups"], out["totals"][0]
+    return run
@@ -0,0 +1,87 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import tools.category_mapper as category_mapper
+from tools.category_mapper import CATEGORY_CACHE_KEY, _categorize
+from tools.mongo_query_tool import _build_group_pipeline
+
+USER = "u1"  # owner of most rows in conftest.sample_transactions
+
+
+class StubLLM:
+    def __init__(self, answers):
+        self.answers = answers
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return SimpleNamespace(content=json.dumps(self.answers))
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    stub = StubLLM({})
+    monkeypatch.setattr(category_mapper, "llm", stub)
+    return stub
+
+
+def _cached(redis):
+    return redis.redis.hgetall(redis._namespaced_key(CATEGORY_CACHE_KEY))
+
+
+def test_payee_groups_are_flagged_as_transfers(spending_db, aggregate_groups):
+    groups, _ = aggregate_groups(spending_db.transactions, _build_group_pipeline({"user_id": USER}, "merchant"))
+    assert {g["label"]: g["transfer"] for g in groups} == {
+        "Swiggy": False, "Amazon": False, "Uber": False, "Netflix": False, "Alice": True, "Bob": True,
+    }
+
+
+def test_payee_groups_never_reach_the_llm_or_the_shared_cache(redis, llm):
+    llm.answers = {"Zomato": "Food"}
+    rows = [
+        {"label": "Alice Smith", "total_amount": 50, "transaction_count": 2, "transfer": True},
+        {"label": "Zomato", "total_amount": 20, "transaction_count": 1, "transfer": False},
+    ]
+
+    result = _categorize(rows, "merchant")
+
+    assert result["resolved"] == {"Alice Smith": "Transfers", "Zomato": "Food"}
+    assert "Alice Smith" not in llm.prompts[0]
+    assert _cached(redis) == {"zomato": "Food"}
+
+
+def test_cached_merchants_skip_the_llm_and_count_as_hits(redis, llm):
+    redis.set_hash_fields(CATEGORY_CACHE_KEY, {"swiggy": "Food"})
+    hits, misses = category_mapper.merchant_cache_counter.hits, category_mapper.merchant_cache_counter.misses
+
+    result = _categorize([{"label": "SWIGGY #123", "total_amount": 10}], "merchant")
+
+    assert result["resolved"] == {"SWIGGY #123": "Food"}
+    assert result["stats"]["cache_hits"] == 1 and not llm.prompts
+    assert category_mapper.merchant_cache_counter.hits == hits + 1
+    assert category_mapper.merchant_cache_counter.misses == misses
+
+
+def test_invalid_llm_answers_are_not_persisted(redis, llm):
+    llm.answers = {"Mystery Shop": "Gadgets"}
+
+    result = _categorize([{"label": "Mystery Shop", "total_amount": 5}, {"label": "Other Thing", "total_amount": 1}], "merchant")
+
+    assert result["resolved"] == {"Mystery Shop": "Others", "Other Thing": "Others"}
+    assert _cached(redis) == {}
+
+
+def test_raw_rows_use_embedded_categories_and_teach_the_cache(redis, llm):
+    rows = [
+        {"amount": 12.0, "merchant": {"name": "Uber", "category": "Travel"}},
+        {"amount": 30.0, "merchant": None, "to_account": {"user_name": "Bob"}},
+    ]
+
+    result = _categorize(rows, None)
+
+    assert result["resolved"] == {"Uber": "Travel", "Bob": "Transfers"}
+    assert result["category_totals"] == {"Travel": 12.0, "Transfers": 30.0}
+    assert not llm.prompts
+    assert _cached(redis) == {"uber": "Travel"}
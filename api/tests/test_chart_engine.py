@@ -0,0 +1,84 @@
+import pytest
+
+from utils.chart_engine import ChartSpec, aggregate, infer_chart_spec
+
+ROWS = [
+    {"merchant": {"name": "Swiggy", "category": "Food"}, "to_account": None, "amount": 300.0, "initiated_at": "2026-09-02T10:00:00"},
+    {"merchant": None, "to_account": {"user_name": "Alice"}, "amount": 1000.0, "initiated_at": "2026-09-15T12:00:00"},
+    {"merchant": {"name": "Uber", "category": "Travel"}, "to_account": None, "amount": 150.0, "initiated_at": "2026-10-01T08:00:00"},
+    {"merchant": {"name": "Swiggy", "category": "Food"}, "to_account": None, "amount": 200.0, "initiated_at": "2026-10-03T20:00:00"},
+]
+
+
+@pytest.mark.parametrize("objective, dimension", [
+    ("Categorize my spendings in the last two months", "category"),
+    ("spending categorization for september", "category"),
+    ("spending by category", "category"),
+    ("top merchants last month", "merchant"),
+    ("monthly spending trend", "time"),
+    ("show my biggest purchases", None),
+])
+def test_dimension_keywords(objective, dimension):
+    assert infer_chart_spec(objective).dimension == dimension
+
+
+def test_pie_and_bar_without_a_dimension_default_to_category():
+    assert infer_chart_spec("spending breakdown last month", "pie").dimension == "category"
+    assert infer_chart_spec("spending breakdown last month", "bar").dimension == "category"
+    assert infer_chart_spec("spending last month", "line").dimension == "time"
+
+
+def test_mixed_merchant_rows_flatten_to_the_same_columns():
+    table = aggregate(ROWS, ChartSpec(chart_type="table"))
+
+    assert table["headers"] == ["merchant.name", "merchant.category", "to_account.user_name", "amount", "initiated_at"]
+    assert table["rows"][0][:3] == ["Swiggy", "Food", None]
+    assert table["rows"][1][:3] == [None, None, "Alice"]
+    assert all(isinstance(cell, (str, int, float, type(None))) for row in table["rows"] for cell in row)
+
+
+def test_nested_dicts_flatten_at_any_depth():
+    rows = [{"merchant": None}, {"merchant": {"name": "Uber", "geo": {"city": "Pune"}}}]
+
+    table = aggregate(rows, ChartSpec(chart_type="table"))
+
+    assert table["headers"] == ["merchant.name", "merchant.geo.city"]
+    assert table["rows"] == [[None, None], ["Uber", "Pune"]]
+
+
+def test_pie_groups_transfers_separately_and_sorts_by_value():
+    result = aggregate(ROWS, ChartSpec(chart_type="pie", dimension="category"))
+
+    assert result["data"] == [
+        {"label": "Transfers", "value": 1000.0},
+        {"label": "Food", "value": 500.0},
+        {"label": "Travel", "value": 150.0},
+    ]
+
+
+def test_line_buckets_by_month_in_order():
+    result = aggregate(ROWS, ChartSpec(chart_type="line", dimension="time", granularity="month"))
+
+    assert result["granularity"] == "month"
+    assert result["data"] == [{"label": "2026-09", "value": 1300.0}, {"label": "2026-10", "value": 350.0}]
+
+
+def test_long_tail_folds_into_other():
+    rows = [{"merchant": {"name": f"m{i}"}, "amount": float(100 - i)} for i in range(20)]
+
+    data = aggregate(rows, ChartSpec(chart_type="bar", dimension="merchant", top_n=5))["data"]
+
+    assert [d["label"] for d in data] == ["m0", "m1", "m2", "m3", "Other"]
+    assert data[-1]["value"] == sum(100 - i for i in range(4, 20))
+
+
+def test_pre_aggregated_groups_use_their_totals():
+    rows = [
+        {"label": "Food", "total_amount": 500.0, "transaction_count": 2},
+        {"label": "Travel", "total_amount": 150.0, "transaction_count": 1},
+    ]
+
+    table = aggregate(rows, ChartSpec(chart_type="table", dimension="category", measure="count"), pre_aggregated=True)
+
+    assert table["headers"] == ["Category", "Transactions", "Total Amount"]
+    assert table["rows"] == [["Food", 2, 500.0], ["Travel", 1, 150.0]]
@@ -0,0 +1,65 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import tools.query_planner as query_planner
+from tools.query_planner import _plan_query
+from utils.context import (
+    RequestCancelled, current_cancel_event, current_tool_timings, has_event_sink, raise_if_cancelled, tool_scope,
+)
+from utils.tool_runner import ToolCall, run_concurrently
+
+
+@pytest.fixture
+def cancelled():
+    event = threading.Event()
+    token = current_cancel_event.set(event)
+    event.set()
+    yield event
+    current_cancel_event.reset(token)
+
+
+def _swallowing_tool():
+    try:
+        raise_if_cancelled()
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def test_cancellation_passes_through_tool_error_handling(cancelled):
+    with pytest.raises(RequestCancelled):
+        _swallowing_tool()
+
+
+def test_cancelled_plan_does_not_fall_back(redis, cancelled, monkeypatch):
+    # An LLM call interrupted by the client going away must not start the fallback tools
+    def invoke(prompt):
+        raise_if_cancelled()
+
+    monkeypatch.setattr(query_planner, "llm", SimpleNamespace(with_structured_output=lambda schema: SimpleNamespace(invoke=invoke)))
+    monkeypatch.setattr(query_planner, "_fallback_plan", lambda query: pytest.fail("fell back"))
+
+    with pytest.raises(RequestCancelled):
+        _plan_query("show my biggest purchases")
+
+
+def test_cancellation_in_a_worker_reaches_the_caller(cancelled):
+    with pytest.raises(RequestCancelled):
+        run_concurrently([ToolCall("cancelled", _swallowing_tool), ToolCall("ok", lambda: 1)])
+
+
+def test_tool_timings_are_recorded_without_an_event_sink():
+    @tool_scope("bench_tool")
+    def tool():
+        assert not has_event_sink()
+
+    timings = {}
+    token = current_tool_timings.set(timings)
+    try:
+        tool()
+        tool()
+    finally:
+        current_tool_timings.reset(token)
+
+    assert list(timings) == ["bench_tool"] and timings["bench_tool"] >= 0
@@ -0,0 +1,67 @@
+from datetime import date
+
+import pytest
+
+from utils.date_parser import parse_date_range
+
+TODAY = date(2026, 10, 18)  # a Sunday
+
+
+@pytest.mark.parametrize("query, start, end", [
+    ("spending in the last 30 days", date(2026, 9, 19), date(2026, 10, 18)),
+    ("past two weeks", date(2026, 10, 5), date(2026, 10, 18)),
+    ("last 6 months by category", date(2026, 5, 1), date(2026, 10, 18)),
+    ("last 2 quarters", date(2026, 7, 1), date(2026, 10, 18)),
+    ("last two years", date(2025, 1, 1), date(2026, 10, 18)),
+    ("past month", date(2026, 9, 19), date(2026, 10, 18)),
+    ("last week", date(2026, 10, 5), date(2026, 10, 11)),
+    ("last month", date(2026, 9, 1), date(2026, 9, 30)),
+    ("this month", date(2026, 10, 1), date(2026, 10, 18)),
+    ("year to date", date(2026, 1, 1), date(2026, 10, 18)),
+    ("Q2 2024", date(2024, 4, 1), date(2024, 6, 30)),
+    ("March 2024", date(2024, 3, 1), date(2024, 3, 31)),
+    ("spending in December", date(2025, 12, 1), date(2025, 12, 31)),
+    ("for 2024", date(2024, 1, 1), date(2024, 12, 31)),
+    ("2024", date(2024, 1, 1), date(2024, 12, 31)),
+    ("what did I spend in 2024?", date(2024, 1, 1), date(2024, 12, 31)),
+    ("transactions over 2000 last month", date(2026, 9, 1), date(2026, 9, 30)),
+    ("2024-01-01 to 2024-03-31", date(2024, 1, 1), date(2024, 3, 31)),
+    ("since 2026-10-01", date(2026, 10, 1), date(2026, 10, 18)),
+    ("on 2026-10-01", date(2026, 10, 1), date(2026, 10, 1)),
+    ("expenses since last month", date(2026, 9, 1), date(2026, 10, 18)),
+    ("spending after last month", date(2026, 10, 1), date(2026, 10, 18)),
+    ("since March", date(2026, 3, 1), date(2026, 10, 18)),
+    ("since 2025", date(2025, 1, 1), date(2026, 10, 18)),
+    ("yesterday", date(2026, 10, 17), date(2026, 10, 17)),
+])
+def test_rules(query, start, end):
+    parsed = parse_date_range(query, TODAY)
+    assert (parsed.start, parsed.end) == (start, end)
+
+
+@pytest.mark.parametrize("n", [1, 7, 30, 90])
+def test_last_n_days_spans_n_days(n):
+    parsed = parse_date_range(f"last {n} days", TODAY)
+    assert (parsed.end - parsed.start).days + 1 == n
+
+
+@pytest.mark.parametrize("n", [1, 3, 12])
+def test_last_n_months_start_on_a_month_boundary(n):
+    parsed = parse_date_range(f"last {n} months", TODAY)
+    assert parsed.start.day == 1
+    assert (parsed.end.year - parsed.start.year) * 12 + parsed.end.month - parsed.start.month + 1 == n
+
+
+@pytest.mark.parametrize("query", [
+    "",
+    "show my biggest purchases",
+    "January vs February",
+    "2024-02-31 to 2024-03-01",
+    "2024-03-01 to 2024-01-01",
+    "expenses before March",
+    "until 2026-10-01",
+    "since 2027",
+    "payments under 1999",
+])
+def test_unparsed_queries_go_to_the_llm(query):
+    assert parse_date_range(query, TODAY) is None
@@ -0,0 +1,71 @@
+import pytest
+
+import services.insights as insights
+from agents.memory import conversation_memory
+from services.insights import CACHE_BYPASS, CACHE_HIT, CACHE_MISS, get_insight
+from utils.data_version import bump_data_version
+
+USER = "u1"
+QUERY = "Spending by category last month"
+
+
+class StubAgent:
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    def process_query(self, query, session_id, preferred_chart=None):
+        self.calls.append(query)
+        return self.result
+
+
+@pytest.fixture
+def agent(redis, monkeypatch):
+    stub = StubAgent({"visualization": {"type": "pie", "data": [{"label": "Food", "value": 500.0}], "text_summary": "Food led."}})
+    monkeypatch.setattr(insights, "finance_agent", stub)
+    # The history check must not build the prompt context
+    monkeypatch.setattr(conversation_memory, "get_context", lambda session_id: pytest.fail("context built"))
+    return stub
+
+
+def test_repeat_queries_are_served_from_cache(agent):
+    first, status = get_insight(QUERY, "s1", USER)
+    assert status == CACHE_MISS
+
+    # Normalized text matches; the hit is recorded in the new session's history
+    second, status = get_insight("  spending by CATEGORY last month? ", "s2", USER)
+    assert status == CACHE_HIT
+    assert second == first
+    assert len(agent.calls) == 1
+    assert conversation_memory.has_history("s2")
+
+
+def test_writes_invalidate_cached_answers(agent):
+    get_insight(QUERY, "s1", USER)
+    bump_data_version(USER)
+
+    assert get_insight(QUERY, "s1", USER)[1] == CACHE_MISS
+    assert len(agent.calls) == 2
+
+
+def test_bypass_recomputes(agent):
+    get_insight(QUERY, "s1", USER)
+
+    assert get_insight(QUERY, "s1", USER, bypass_cache=True)[1] == CACHE_BYPASS
+    assert len(agent.calls) == 2
+
+
+def test_follow_ups_are_never_cached(agent):
+    conversation_memory.add_interaction("s1", QUERY, "Food led.")
+
+    for _ in range(2):
+        assert get_insight("what about the previous month", "s1", USER)[1] == CACHE_MISS
+    assert len(agent.calls) == 2
+
+
+def test_failed_answers_are_not_cached(agent):
+    agent.result = {"error": "planner failed"}
+    get_insight(QUERY, "s1", USER)
+
+    assert get_insight(QUERY, "s1", USER)[1] == CACHE_MISS
+    assert len(agent.calls) == 2
@@ -0,0 +1,154 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+from langchain.schema import AIMessage, HumanMessage
+
+import agents.memory as memory_module
+from agents.memory import SESSIONS_KEY, ConversationMemory
+from utils.tokens import count_message_tokens
+
+
+@pytest.fixture
+def memory(redis):
+    # Summary folds are covered separately; verbatim_turns above max_history never starts one
+    return ConversationMemory(max_history=4, session_ttl=600, max_sessions=3, verbatim_turns=10)
+
+
+def _ttl(redis, key):
+    return redis.redis.ttl(redis._namespaced_key(key))
+
+
+def test_history_keeps_the_newest_turns(memory):
+    for i in range(6):
+        memory.add_interaction("s1", f"q{i}", f"a{i}")
+
+    assert [t["user_input"] for t in memory.get_history("s1")] == ["q2", "q3", "q4", "q5"]
+    assert memory.has_history("s1") and not memory.has_history("s2")
+
+
+def test_sessions_expire_and_reads_extend_them(memory, redis):
+    memory.add_interaction("s1", "q", "a")
+    assert 0 < _ttl(redis, "conv:s1") <= 600
+
+    redis.redis.expire(redis._namespaced_key("conv:s1"), 5)
+    memory.get_history("s1")
+    assert _ttl(redis, "conv:s1") > 5
+
+
+def test_least_recently_used_sessions_are_evicted(memory, redis, monkeypatch):
+    # Strictly increasing access times, so the order of calls alone decides recency
+    clock = itertools.count(1_000_000)
+    monkeypatch.setattr(memory_module.time, "time", lambda: next(clock))
+
+    for session in ["s1", "s2", "s3"]:
+        memory.add_interaction(session, "q", "a")
+    memory.get_history("s1")  # s2 is now the least recently used
+    memory.add_interaction("s4", "q", "a")
+
+    assert memory.session_count() == 3
+    assert not memory.has_history("s2")
+    assert all(memory.has_history(s) for s in ["s1", "s3", "s4"])
+
+
+def test_clear_drops_the_session(memory, redis):
+    memory.add_interaction("s1", "q", "a")
+
+    assert memory.clear("s1") is True
+    assert memory.get_history("s1") == []
+    assert redis.redis.zscore(redis._namespaced_key(SESSIONS_KEY), "s1") is None
+    assert memory.clear("s1") is False
+
+
+def test_redis_failures_degrade_to_no_history(memory, monkeypatch, redis):
+    def down(*args, **kwargs):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(redis, "get_list", down)
+    monkeypatch.setattr(redis, "list_length", down)
+
+    assert memory.get_history("s1") == []
+    assert memory.has_history("s1") is False
+
+
+# Token budget and rolling summary
+
+class StubLLM:
+    def __init__(self, text="", error=None):
+        self.text, self.error = text, error
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        if self.error:
+            raise self.error
+        return SimpleNamespace(content=self.text)
+
+
+@pytest.fixture
+def folds(monkeypatch):
+    # Records fold submissions instead of running them on the background pool
+    submitted = []
+    monkeypatch.setattr(memory_module.summary_executor, "submit", lambda fn, *args: submitted.append(args))
+    return submitted
+
+
+def _pair_cost(i):
+    return count_message_tokens([HumanMessage(content=f"q{i}"), AIMessage(content=f"a{i}")])
+
+
+def test_context_keeps_the_newest_turns_that_fit_the_budget(redis):
+    memory = ConversationMemory(verbatim_turns=10, token_budget=_pair_cost(3) + _pair_cost(4))
+    for i in range(5):
+        memory.add_interaction("s1", f"q{i}", f"a{i}")
+
+    messages, stats = memory.get_context_with_stats("s1")
+
+    assert [m.content for m in messages] == ["q3", "a3", "q4", "a4"]
+    assert stats["turns_verbatim"] == 2 and stats["turns_dropped"] == 3 and stats["turns_summarized"] == 0
+    assert stats["history_tokens"] == count_message_tokens(messages)
+
+
+def test_older_turns_are_folded_into_the_summary(redis, folds, monkeypatch):
+    llm = StubLLM("User compared food spending in September and October.")
+    monkeypatch.setattr(memory_module, "llm", llm)
+    memory = ConversationMemory(verbatim_turns=2)
+    for i in range(4):
+        memory.add_interaction("s1", f"q{i}", f"a{i}")
+
+    memory._run_fold("s1")
+
+    # Only the turns outside the verbatim window reach the summarizer
+    assert "q1" in llm.prompts[0] and "q2" not in llm.prompts[0]
+    messages, stats = memory.get_context_with_stats("s1")
+    assert messages[0].content == f"Summary of the earlier conversation: {llm.text}"
+    assert [m.content for m in messages[1:]] == ["q2", "a2", "q3", "a3"]
+    assert stats["turns_summarized"] == 2 and stats["summary_tokens"] > 0
+
+
+def test_one_fold_runs_per_session_at_a_time(redis, folds, monkeypatch):
+    monkeypatch.setattr(memory_module, "llm", StubLLM("summary"))
+    memory = ConversationMemory(verbatim_turns=1)
+
+    for i in range(4):
+        memory.add_interaction("s1", f"q{i}", f"a{i}")
+    assert len(folds) == 1
+
+    # Finishing the fold releases the marker for the next interaction
+    memory._run_fold("s1")
+    memory.add_interaction("s1", "q4", "a4")
+    assert len(folds) == 2
+
+
+def test_failed_fold_keeps_the_turns_verbatim(redis, folds, monkeypatch):
+    monkeypatch.setattr(memory_module, "llm", StubLLM(error=RuntimeError("llm down")))
+    memory = ConversationMemory(verbatim_turns=1)
+    for i in range(3):
+        memory.add_interaction("s1", f"q{i}", f"a{i}")
+
+    memory._run_fold("s1")
+
+    messages, stats = memory.get_context_with_stats("s1")
+    assert [m.content for m in messages] == ["q0", "a0", "q1", "a1", "q2", "a2"]
+    assert stats["summary_tokens"] == 0
+    assert not redis.exists(memory._fold_marker_key("s1"))
@@ -0,0 +1,26 @@
+from tools.mongo_query_tool import _build_group_pipeline, settings
+
+USER = "u1"  # owner of most rows in conftest.sample_transactions
+
+
+def test_time_groups_keep_the_latest_periods_and_total_everything(spending_db, aggregate_groups, monkeypatch):
+    monkeypatch.setattr(settings, "LIMIT_GROUP_ROWS", 5)
+
+    groups, totals = aggregate_groups(spending_db.transactions, _build_group_pipeline({"user_id": USER}, "day"))
+    labels = [g["label"] for g in groups]
+    all_days = sorted({t["initiated_at"].strftime("%Y-%m-%d") for t in spending_db.transactions.find({"user_id": USER})})
+
+    assert labels == all_days[-5:]
+    assert totals["group_count"] == len(all_days)
+    assert totals["transaction_count"] == spending_db.transactions.count_documents({"user_id": USER})
+
+
+def test_breakdowns_keep_the_largest_groups(spending_db, aggregate_groups, monkeypatch):
+    monkeypatch.setattr(settings, "LIMIT_GROUP_ROWS", 2)
+
+    groups, totals = aggregate_groups(spending_db.transactions, _build_group_pipeline({"user_id": USER}, "merchant"))
+    amounts = [g["total_amount"] for g in groups]
+
+    assert len(groups) == 2 and amounts == sorted(amounts, reverse=True)
+    assert totals["group_count"] == 6
+    assert totals["total_amount"] > sum(amounts)
@@ -0,0 +1,40 @@
+import pytest
+
+from utils.payload_codec import CODECS, MAGIC, encode_payload, decode_payload
+
+PAYLOAD = {
+    "handle": "mq:abc",
+    "group_by": None,
+    "metrics": {"transaction_count": 3, "total_amount": 61.5, "truncated": False},
+    "data": [
+        {"amount": 12.5, "initiated_at": "2026-10-01T09:00:00", "merchant": {"name": "Swiggy", "category": "Food"}},
+        {"amount": 40.0, "initiated_at": "2026-10-02T18:30:00", "to_account": {"user_name": "Alice"}},
+        {"amount": 9.0, "initiated_at": "2026-10-03T12:00:00", "description": "Café ☕"},
+    ],
+}
+
+
+@pytest.mark.parametrize("codec", sorted(CODECS))
+def test_round_trip(codec):
+    blob = encode_payload(PAYLOAD, codec)
+    assert blob.startswith(MAGIC)
+
+    decoded = decode_payload(blob)
+    # Columnar storage fills absent fields with None
+    columns = {key for row in PAYLOAD["data"] for key in row}
+    assert decoded["data"] == [{c: row.get(c) for c in columns} for row in PAYLOAD["data"]]
+    assert {k: v for k, v in decoded.items() if k != "data"} == {k: v for k, v in PAYLOAD.items() if k != "data"}
+
+
+@pytest.mark.parametrize("codec", sorted(CODECS))
+def test_round_trip_empty_rows(codec):
+    assert decode_payload(encode_payload({**PAYLOAD, "data": []}, codec))["data"] == []
+
+
+def test_legacy_json_payloads_still_decode():
+    assert decode_payload('{"handle": "mq:old", "data": [{"amount": 1}]}') == {"handle": "mq:old", "data": [{"amount": 1}]}
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError, match="Unknown handle codec"):
+        encode_payload(PAYLOAD, "gzip")
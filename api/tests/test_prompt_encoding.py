@@ -0,0 +1,63 @@
+import pytest
+
+import utils.prompt_encoding as prompt_encoding
+from utils.prompt_encoding import encode_rows, encode_object, encode_for_prompt, timestamp_precision
+
+
+@pytest.mark.parametrize("value, text", [
+    (123456.78, "123456.78"),
+    (1834567.25, "1834567.25"),
+    (98765432.1, "98765432.1"),
+    (12.5, "12.5"),
+    (40.0, "40"),
+    (0.004, "0"),
+    (-0.001, "0"),
+    (-2500.456, "-2500.46"),
+])
+def test_amounts_keep_every_integer_digit(value, text):
+    assert encode_rows([{"amount": value}]) == f"amount\n{text}"
+
+
+def test_rows_share_a_header_and_a_string_dictionary():
+    rows = [
+        {"merchant": {"name": "Swiggy Instamart", "category": "Food"}, "amount": 1250000.5, "initiated_at": "2026-10-01T09:15:42"},
+        {"merchant": {"name": "Swiggy Instamart", "category": "Food"}, "amount": 20.0, "initiated_at": "2026-10-02T18:30:00"},
+        {"merchant": {"name": "Uber", "category": "Travel"}, "amount": 7.25, "initiated_at": "2026-10-03T07:05:00"},
+    ]
+
+    assert encode_rows(rows).splitlines() == [
+        "strings: #0=Swiggy Instamart",
+        "merchant.name | merchant.category | amount | initiated_at",
+        "#0 | Food | 1250000.5 | 2026-10-01",
+        "#0 | Food | 20 | 2026-10-02",
+        "Uber | Travel | 7.25 | 2026-10-03",
+    ]
+
+
+def test_timestamp_precision_follows_the_objective():
+    assert timestamp_precision("spending by hour of the day") == "minute"
+    assert timestamp_precision("spending by category") == "date"
+    assert encode_rows([{"at": "2026-10-01T09:15:42"}], "minute") == "at\n2026-10-01 09:15"
+    assert encode_rows([{"at": "2026-10-01T09:15:42"}], "full") == "at\n2026-10-01T09:15:42"
+
+
+def test_objects_drop_empty_sections():
+    encoded = encode_object({"objective": "trend", "patterns": [], "extra": None, "totals": {"Food": 1234567.5}})
+    assert encoded == "objective: trend\ntotals: Food=1234567.5"
+
+
+def test_token_stats_are_sampled(monkeypatch):
+    observed = []
+    monkeypatch.setattr(prompt_encoding.settings, "PROMPT_STATS_SAMPLE_RATE", 3)
+    monkeypatch.setattr(prompt_encoding, "count_tokens", lambda text: observed.append(text) or 1)
+
+    for _ in range(6):
+        assert encode_for_prompt([{"amount": 1.5}], "test") == "amount\n1.5"
+
+    # Two tokenizer passes (JSON and encoded) per measured call
+    assert len(observed) == 4
+
+    monkeypatch.setattr(prompt_encoding.settings, "PROMPT_STATS_SAMPLE_RATE", 0)
+    observed.clear()
+    encode_for_prompt([{"amount": 1.5}], "test")
+    assert observed == []
@@ -0,0 +1,66 @@
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+import tools.query_planner as query_planner
+from tools.query_planner import QueryPlan, _plan_query, _build_query_filter
+
+
+class StubPlanner:
+    def __init__(self, plan):
+        self.plan = plan
+
+    def with_structured_output(self, schema):
+        return SimpleNamespace(invoke=lambda prompt: self.plan)
+
+
+@pytest.fixture
+def planner_llm(monkeypatch):
+    def install(**plan):
+        monkeypatch.setattr(query_planner, "llm", StubPlanner(QueryPlan.model_validate({
+            "intent": "data", "filters": {}, "fields": ["amount", "merchant.name"], "objective": "spending", **plan,
+        })))
+    return install
+
+
+def test_rule_plan_groups_a_categorize_request_by_category(redis):
+    plan = _plan_query("Categorize my spendings in the last two months and suggest savings")
+
+    assert plan["source"] == "rules"
+    assert plan["group_by"] == "category"
+    assert plan["needs_categorization"] is True
+
+
+def test_llm_plan_without_group_by_takes_it_from_the_chart(redis, planner_llm):
+    planner_llm(group_by=None, preferred_chart="pie")
+
+    plan = _plan_query("Spending breakdown last month as a pie chart")
+
+    assert plan["source"] == "llm"
+    assert plan["preferred_chart"] == "pie"
+    assert plan["group_by"] == "category"
+
+
+def test_llm_group_by_is_kept(redis, planner_llm):
+    planner_llm(group_by="merchant", preferred_chart="bar")
+
+    assert _plan_query("Spending breakdown last month as a bar chart")["group_by"] == "merchant"
+
+
+def test_row_listings_stay_ungrouped(redis, planner_llm):
+    planner_llm(group_by=None)
+
+    assert _plan_query("show my biggest purchases")["group_by"] is None
+
+
+def test_ranges_ending_today_stay_open():
+    today = date.today()
+    start = today.replace(day=1).isoformat()
+
+    assert _build_query_filter({"start_date": start, "end_date": today.isoformat()}) == {
+        "initiated_at": {"$gte": start},
+    }
+    assert _build_query_filter({"start_date": "2024-01-01", "end_date": "2024-12-31"}) == {
+        "initiated_at": {"$gte": "2024-01-01", "$lt": "2025-01-01T00:00:00.000000"},
+    }
@@ -0,0 +1,70 @@
+import pytest
+
+from tools.mongo_query_tool import _build_group_pipeline, _build_rollup_pipeline, _build_mongo_filter
+from services.rollups import ROLLUPS_COLLECTION, rebuild_rollups, apply_transactions
+
+USER = "u1"  # owner of most rows in conftest.sample_transactions
+
+
+@pytest.mark.parametrize("initiated_at, months", [
+    ({"$gte": "2026-05-01T00:00:00", "$lt": "2026-11-01T00:00:00"}, {"$gte": "2026-05", "$lt": "2026-11"}),
+    ({"$gte": "2026-09-01T00:00:00"}, {"$gte": "2026-09"}),
+])
+def test_rollup_pipeline_for_whole_months(initiated_at, months):
+    query_filter = {"initiated_at": initiated_at, "merchant.category": {"$in": ["Food"]}}
+    pipeline = _build_rollup_pipeline(query_filter, USER, "category")
+    assert pipeline[0] == {"$match": {"user_id": USER, "month": months, "category": {"$in": ["Food"]}}}
+
+
+@pytest.mark.parametrize("query_filter, group_by", [
+    ({"initiated_at": {"$gte": "2026-09-19T00:00:00", "$lt": "2026-10-19T00:00:00"}}, "category"),
+    ({"initiated_at": {"$gte": "2026-09-01T12:00:00"}}, "category"),
+    ({"initiated_at": {"$lte": "2026-10-01T00:00:00"}}, "category"),
+    ({"status": "failed"}, "category"),
+    ({"transaction_mode": {"$nin": ["UPI"]}}, "mode"),
+    ({}, "day"),
+    ({}, "week"),
+])
+def test_rollup_pipeline_declines_partial_months_and_unknown_fields(query_filter, group_by):
+    assert _build_rollup_pipeline(query_filter, USER, group_by) is None
+
+
+# Rollups vs live $group on the same transactions
+
+def _comparable(groups):
+    return sorted(
+        (g["label"], pytest.approx(g["total_amount"]), g["transaction_count"], g["first_at"], g["last_at"], g.get("transfer"))
+        for g in groups
+    )
+
+
+@pytest.fixture(params=["full", "incremental"])
+def rollups(request, spending_db):
+    # Both upkeep paths must produce the same answers
+    if request.param == "full":
+        rebuild_rollups(spending_db)
+    else:
+        apply_transactions(spending_db.transactions.find({}), spending_db)
+    return spending_db[ROLLUPS_COLLECTION]
+
+
+@pytest.mark.parametrize("group_by", ["merchant", "category", "mode", "month"])
+@pytest.mark.parametrize("query_filter", [
+    {"initiated_at": {"$gte": "2026-05-01T00:00:00", "$lt": "2026-09-01T00:00:00"}},
+    {"initiated_at": {"$gte": "2026-06-01T00:00:00"}, "merchant.category": {"$in": ["Food", "Travel"]}},
+    {"transaction_mode": "UPI"},
+])
+def test_rollups_match_live_group(spending_db, rollups, aggregate_groups, query_filter, group_by):
+    rollup_pipeline = _build_rollup_pipeline(query_filter, USER, group_by)
+    assert rollup_pipeline is not None
+
+    live_groups, live_totals = aggregate_groups(
+        spending_db.transactions, _build_group_pipeline(_build_mongo_filter(query_filter, USER), group_by)
+    )
+    rollup_groups, rollup_totals = aggregate_groups(rollups, rollup_pipeline)
+
+    assert live_groups
+    assert _comparable(rollup_groups) == _comparable(live_groups)
+    assert rollup_totals["transaction_count"] == live_totals["transaction_count"]
+    assert rollup_totals["total_amount"] == pytest.approx(live_totals["total_amount"])
+    assert rollup_totals["group_count"] == live_totals["group_count"]
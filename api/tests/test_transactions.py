@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from services.transactions import encode_cursor, decode_cursor, count_transactions, _count_cache_key
+from utils.data_version import bump_data_version
+
+
+@pytest.mark.parametrize("doc_id", [ObjectId(), "txn-000123"])
+def test_cursor_round_trip(doc_id):
+    initiated_at = datetime(2026, 10, 18, 9, 30, 15, 123000)
+    seek = decode_cursor(encode_cursor({"_id": doc_id, "initiated_at": initiated_at}))
+
+    assert seek == {
+        "initiated_at": {"$lte": initiated_at},
+        "$or": [
+            {"initiated_at": {"$lt": initiated_at}},
+            {"_id": {"$lt": doc_id}},
+        ],
+    }
+    assert type(seek["$or"][1]["_id"]["$lt"]) is type(doc_id)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "eyJ0IjoxfQ"])
+def test_decode_cursor_rejects_garbage(cursor):
+    with pytest.raises(ValueError, match="Invalid pagination cursor"):
+        decode_cursor(cursor)
+
+
+def _seed(db, user_id, count, status="success"):
+    db.transactions.insert_many([
+        {"user_id": user_id, "status": status, "initiated_at": datetime(2026, 10, 1), "amount": 1.0}
+        for _ in range(count)
+    ])
+
+
+def test_count_cache_key_follows_data_version(redis):
+    query = {"user_id": "u1", "status": "failed", "initiated_at": {"$gte": datetime(2026, 9, 1)}}
+
+    key = _count_cache_key("u1", query)
+    assert key.startswith("txcount:u1:v0:")
+    # Key order and user_id do not change the filter identity
+    assert _count_cache_key("u1", dict(reversed(list(query.items())))) == key
+
+    bump_data_version("u1")
+    bumped = _count_cache_key("u1", query)
+    assert bumped.startswith("txcount:u1:v1:")
+    assert bumped.split(":")[-1] == key.split(":")[-1]
+
+    assert _count_cache_key("u1", {**query, "status": "success"}) != bumped
+
+
+def test_counts_are_cached_until_the_data_version_changes(redis, mongo_db):
+    _seed(mongo_db, "u1", 3)
+    _seed(mongo_db, "u1", 2, status="failed")
+    _seed(mongo_db, "u2", 4)
+
+    assert count_transactions(mongo_db.transactions, "u1", {"user_id": "u1"}) == (5, True)
+    assert count_transactions(mongo_db.transactions, "u1", {"user_id": "u1", "status": "failed"}) == (2, True)
+
+    # A write the version does not know about is not seen: the cached count is served
+    _seed(mongo_db, "u1", 1)
+    assert count_transactions(mongo_db.transactions, "u1", {"user_id": "u1"}) == (5, True)
+
+    bump_data_version("u1")
+    assert count_transactions(mongo_db.transactions, "u1", {"user_id": "u1"}) == (6, True)
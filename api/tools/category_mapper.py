@@ -1,13 +1,32 @@
 from langchain.tools import StructuredTool
 from pydantic import BaseModel, Field, model_validator
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from utils.logger import setup_logger
+from utils.context import tool_scope
 from agents.llm import llm
-import json
-from utils.helper import _load_data_from_handle
+import json, re
+from utils.helper import _load_payload_from_handle
+from utils.redis_utils import redis_client
+from utils.constants import merchant_categories
+from utils.counters import get_counter
+from utils.prompt_encoding import encode_for_prompt, PROMPT_DATA_NOTE
 
 logger = setup_logger(__name__)
 
+# Shared across users: merchant names repeat, so one LLM answer serves every later request
+CATEGORY_CACHE_KEY = "merchant_categories"
+TRANSFER_CATEGORY = "Transfers"
+CATEGORY_CHOICES = list(merchant_categories.keys()) + [TRANSFER_CATEGORY]
+_category_norm = {c.lower(): c for c in CATEGORY_CHOICES}
+
+# Used for this request only when the LLM gives no valid category
+FALLBACK_CATEGORY = "Others"
+
+merchant_cache_counter = get_counter("merchant_category_cache")
+
+# mongo_query_tool group_by values whose rows are not merchants
+NON_MERCHANT_GROUPS = {"mode", "day", "week", "month"}
+
 class CategoryMapperInput(BaseModel):
     handle: str = Field(
         ...,
@@ -23,48 +42,209 @@ class CategoryMapperInput(BaseModel):
         if not self.handle:
             raise ValueError("Field 'handle' is required and cannot be empty.")
         return self
-    
 
-def _map_categories(handle: str) -> Dict[str, Any]:
 
-    logger.info("Calling LLM to map transaction categories")
+def _merchant_key(name: str) -> str:
+    # "Payment to Acme Cafe #123" and "payment to acme cafe" share one cache entry
+    text = re.sub(r"\d+", " ", name.lower())
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
 
-    data = _load_data_from_handle(handle)
 
-    if not data:
-        return {
-            "category_mapping": {},
-            "unnecessary_patterns": [],
-            "recommendations": [],
-            "note": "No transactions available for analysis."
-        }
+def _row_merchant(row: Dict[str, Any], group_by: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    # Returns (display name, embedded category or None)
+    if group_by:
+        label = row.get("label")
+        if group_by == "category":
+            return label, label
+        if row.get("transfer"):
+            # Labelled from the payee: a person, never sent to the LLM or the shared cache
+            return label, TRANSFER_CATEGORY
+        return label, None
 
-    if isinstance(data, str):
-        data = json.loads(data)
+    merchant = row.get("merchant") or {}
+    if merchant.get("category"):
+        return merchant.get("name") or merchant.get("category"), merchant["category"]
+    if row.get("to_account"):
+        name = (row["to_account"] or {}).get("user_name") or row.get("description") or "Transfer"
+        return name, TRANSFER_CATEGORY
+    return merchant.get("name") or row.get("description") or row.get("remarks"), None
+
+
+def _classify_unseen(names: List[str]) -> Dict[str, Optional[str]]:
+
+    logger.info(f"Calling LLM to categorize {len(names)} unseen merchants/descriptions")
+
+    prompt = (
+        "Assign each merchant or transaction description to exactly one spending category.\n"
+        f"Allowed categories: {json.dumps(CATEGORY_CHOICES)}\n"
+        "Respond ONLY with a JSON object mapping each input string, unchanged, to its category. No code fences or prose.\n"
+        f"Inputs: {json.dumps(names, ensure_ascii=False)}"
+    )
+
+    response = llm.invoke(prompt)
+    logger.debug(f"LLM raw response: {response.content}")
+    answer = json.loads(response.content)
+
+    # None for a missing or unknown answer; the caller falls back without persisting it
+    return {name: _category_norm.get(str(answer.get(name, "")).strip().lower()) for name in names}
+
+
+def _categorize(rows: List[Dict[str, Any]], group_by: Optional[str]) -> Dict[str, Any]:
+    # name -> category, plus per-category and per-merchant totals for the analysis prompt
+    resolved: Dict[str, str] = {}
+    pending: Dict[str, str] = {}
+    amounts: Dict[str, float] = {}
+    counts: Dict[str, int] = {}
+
+    embedded = 0
+    for row in rows:
+        name, category = _row_merchant(row, group_by)
+        if not name:
+            continue
+        amount = float(row.get("total_amount", row.get("amount", 0)) or 0)
+        amounts[name] = amounts.get(name, 0.0) + amount
+        counts[name] = counts.get(name, 0) + int(row.get("transaction_count", 1) or 1)
+        if category:
+            embedded += 1
+            resolved[name] = category
+        elif name not in resolved:
+            pending[name] = _merchant_key(name)
+
+    # Write-through embedded categories so description-only rows can reuse them later
+    learned = {_merchant_key(n): c for n, c in resolved.items() if c != TRANSFER_CATEGORY} if group_by != "category" else {}
+
+    cache_hits = 0
+    unseen: List[str] = []
+    pending_names = [n for n in pending if n not in resolved]
+    if pending_names:
+        cached = redis_client.get_hash_fields(CATEGORY_CACHE_KEY, [pending[n] for n in pending_names])
+        for name, category in zip(pending_names, cached):
+            if category:
+                cache_hits += 1
+                resolved[name] = category
+            elif learned.get(pending[name]):
+                resolved[name] = learned[pending[name]]
+            else:
+                unseen.append(name)
+
+    if unseen:
+        classified = _classify_unseen(unseen)
+        # The shared hash has no TTL, so only validated answers go into it
+        learned.update({pending[n]: c for n, c in classified.items() if c})
+        resolved.update({n: c or FALLBACK_CATEGORY for n, c in classified.items()})
+
+    if learned:
+        redis_client.set_hash_fields(CATEGORY_CACHE_KEY, learned)
+
+    # Hit rate of the shared cache itself; embedded categories never reach Redis
+    merchant_cache_counter.hit(cache_hits)
+    merchant_cache_counter.miss(len(pending_names) - cache_hits)
+
+    category_totals: Dict[str, float] = {}
+    for name, category in resolved.items():
+        category_totals[category] = category_totals.get(category, 0.0) + amounts.get(name, 0.0)
+
+    return {
+        "resolved": resolved,
+        "category_totals": category_totals,
+        "merchant_amounts": amounts,
+        "merchant_counts": counts,
+        "stats": {
+            "rows": len(rows),
+            "embedded": embedded,
+            "cache_hits": cache_hits,
+            "llm_classified": len(unseen),
+        },
+    }
+
+
+def _analyze_spending(breakdown_name: str, breakdown: Dict[str, float], merchant_amounts: Dict[str, float], merchant_counts: Dict[str, int]) -> Dict[str, Any]:
+
+    top_merchants = sorted(merchant_amounts.items(), key=lambda kv: kv[1], reverse=True)[:15]
+    recurring = [
+        {"merchant": name, "transactions": merchant_counts[name], "total": round(merchant_amounts[name], 2)}
+        for name in merchant_counts if merchant_counts[name] >= 3
+    ][:15]
+
+    summary = {
+        breakdown_name: {k: round(v, 2) for k, v in sorted(breakdown.items(), key=lambda kv: kv[1], reverse=True)},
+        "top_merchants": [{"merchant": n, "total": round(a, 2), "transactions": merchant_counts.get(n, 0)} for n, a in top_merchants],
+        "recurring_merchants": recurring,
+    }
 
     prompt = (
-        f"""You are a finance assistant. Analyze the user's transaction data.
-        1. Categorize transactions into meaningful spending categories (e.g., Food, Shopping, Utilities, Transport, Rent, Entertainment, Healthcare, Fees, Transfers, Others).
-        2. Identify unnecessary spending patterns (duplicate subscriptions, excessive fees, impulse buys, etc.).
-        3. Suggest actionable recommendations to save money.
-        
+        f"""You are a finance assistant. Analyze the user's aggregated spending below.
+        1. Identify unnecessary spending patterns (duplicate subscriptions, excessive fees, impulse buys, etc.).
+        2. Suggest actionable recommendations to save money.
+
         Return output ONLY as a valid JSON object with keys:
         {{
-            "category_mapping": {{
-                "<Category>": ["Merchant/Description", ...]
-                }},
             "unnecessary_patterns": ["..."],
             "recommendations": ["..."]
         }}
-        Here is the transaction data (JSON): {data}
+        {PROMPT_DATA_NOTE}
+        Here is the aggregated spending:
+        {encode_for_prompt(summary, "spending_analysis")}
         CRITICAL: Respond ONLY with a single JSON object. No code fences or prose.
         """
     )
 
+    response = llm.invoke(prompt)
+    logger.debug(f"LLM raw response: {response.content}")
+    return json.loads(response.content)
+
+
+@tool_scope("category_mapper")
+def _map_categories(handle: str) -> Dict[str, Any]:
+
+    logger.info("Mapping transaction categories")
+
+    payload = _load_payload_from_handle(handle)
+    data = payload.get("data", [])
+    group_by = payload.get("group_by")
+
+    if not data:
+        return {
+            "category_mapping": {},
+            "unnecessary_patterns": [],
+            "recommendations": [],
+            "note": "No transactions available for analysis."
+        }
+
+    if isinstance(data, str):
+        data = json.loads(data)
+
     try:
-        response = llm.invoke(prompt)
-        logger.debug(f"LLM raw response: {response.content}")
-        return json.loads(response.content)
+        if group_by in NON_MERCHANT_GROUPS:
+            # Groups carry no merchant identity; only the group totals can be analyzed
+            category_mapping: Dict[str, List[str]] = {}
+            stats = {"rows": len(data), "embedded": 0, "cache_hits": 0, "llm_classified": 0}
+            totals = {str(row.get("label")): float(row.get("total_amount", 0) or 0) for row in data}
+            analysis = _analyze_spending(f"spend_by_{group_by}", totals, {}, {})
+        else:
+            result = _categorize(data, group_by)
+            stats = result["stats"]
+
+            category_mapping = {}
+            for name, category in result["resolved"].items():
+                category_mapping.setdefault(category, []).append(name)
+
+            logger.info(f"Categorized {len(result['resolved'])} merchants: {stats}")
+
+            analysis = _analyze_spending(
+                "spend_by_category",
+                result["category_totals"],
+                result["merchant_amounts"],
+                result["merchant_counts"],
+            )
+
+        return {
+            "category_mapping": category_mapping,
+            "unnecessary_patterns": analysis.get("unnecessary_patterns", []),
+            "recommendations": analysis.get("recommendations", []),
+            "cache_stats": stats,
+        }
     except Exception as e:
         logger.error(f"LLM category mapping failed: {e}")
         return {
@@ -82,6 +262,7 @@ def get_category_mapper_tool() -> StructuredTool:
         description=(
             "Analyzes transaction data (fetched using the provided handle) "
             "to generate category mappings, identify unnecessary spending patterns,and suggest recommendations. "
+            "Categories come from the transactions and a shared merchant cache; only unseen merchants go to the LLM. "
             "REQUIRES a valid 'handle' from mongo_query_tool."
         ),
         func=_map_categories,
@@ -2,10 +2,13 @@ from langchain.tools import StructuredTool
 from pydantic import BaseModel, Field, model_validator
 from typing import Dict, Any, Optional
 from utils.logger import setup_logger
+from utils.context import tool_scope, has_event_sink, emit_event
 from agents.llm import llm
 import json
-from utils.helper import _load_data_from_handle, normalize_chart_result
-from schemas.visualizations import VisualizationRouter
+from utils.helper import _load_payload_from_handle
+from utils.prompt_encoding import encode_for_prompt, timestamp_precision, PROMPT_DATA_NOTE
+from utils.chart_engine import infer_chart_spec, aggregate, describe_series, fallback_summary
+from schemas.visualizations import PieResult, BarResult, LineResult, TableResult
 
 logger = setup_logger(__name__)
 
@@ -22,8 +25,9 @@ class ChartDataInput(BaseModel):
         ...,
         description=(
             "Objective or intent for visualization, e.g., 'breakdown by category', "
-            "'trend over time', 'top merchants by spend'. "
-            "This helps the LLM decide grouping/aggregation logic."
+            "'trend over time', 'top merchants by spend', 'monthly spending', 'number of transactions by mode'. "
+            "The dimension (category, merchant, mode, status, recipient, time), the measure "
+            "(total, count, average) and the time granularity (daily, weekly, monthly) are read from it."
         )
     )
     preferred_chart: Optional[str] = Field(
@@ -44,6 +48,56 @@ class ChartDataInput(BaseModel):
             raise ValueError("Field 'handle' is required and cannot be empty.")
         return self
 
+RESULT_MODELS = {
+    "pie": PieResult,
+    "bar": BarResult,
+    "line": LineResult,
+    "table": TableResult,
+}
+
+def _summarize_chart(objective: str, facts: Dict[str, Any], metrics: Dict[str, Any], category_result: Optional[Dict[str, Any]]) -> str:
+
+    context = {
+        "objective": objective,
+        "aggregated": facts,
+        "transaction_count": metrics.get("transaction_count"),
+        "date_range": [metrics.get("date_min"), metrics.get("date_max")],
+    }
+    if metrics.get("truncated"):
+        # The series covers only the kept rows; transaction_count still counts every match
+        context["truncated"] = True
+    if category_result and category_result.get("unnecessary_patterns"):
+        context["spending_patterns"] = category_result.get("unnecessary_patterns")
+
+    prompt = (
+        "You are a personal finance assistant. Write a text_summary for the chart described below.\n"
+        "It must be 2-4 full sentences: state the main insight, highlight trends or patterns, and mention "
+        "notable categories, time ranges or outliers. Use ONLY the numbers given; do not recompute or invent figures.\n"
+        "Respond with the summary text only, no JSON and no code fences.\n"
+        f"{PROMPT_DATA_NOTE}\n\n"
+        f"{encode_for_prompt(context, 'chart_summary', timestamp_precision(objective))}"
+    )
+
+    try:
+        if has_event_sink():
+            # A streaming client renders the summary while the model writes it
+            parts = []
+            for chunk in llm.stream(prompt):
+                if chunk.content:
+                    parts.append(chunk.content)
+                    emit_event("summary_token", {"text": chunk.content})
+            text = "".join(parts).strip()
+        else:
+            response = llm.invoke(prompt)
+            text = (response.content or "").strip()
+        if text:
+            return text
+    except Exception as e:
+        logger.error(f"Chart summary generation failed: {e}")
+    return fallback_summary(facts)
+
+
+@tool_scope("chart_data_preparer")
 def _prepare_chart_data(
     handle: str,
     objective: str,
@@ -51,90 +105,33 @@ def _prepare_chart_data(
     category_result: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
 
-    logger.info("Preparing chart data with LLM")
+    logger.info("Preparing chart data with the aggregation engine")
 
-    data = _load_data_from_handle(handle)
-
-    if not data:
-        return {
-            "category_mapping": {},
-            "unnecessary_patterns": [],
-            "recommendations": [],
-            "note": "No transactions available for analysis."
-        }
+    payload = _load_payload_from_handle(handle)
+    data = payload.get("data", [])
+    group_by = payload.get("group_by")
+    metrics = payload.get("metrics", {})
 
     if isinstance(data, str):
-        data = json.loads(data)    
-
-    # Build prompt
-    preface = (
-        "You are a data visualization assistant. Given transaction-like records, "
-        "choose an appropriate representation and aggregate/group as needed to produce chart-ready data."
-    )
-
-    guidance = []
-    if preferred_chart:
-        guidance.append(f'Preferred chart type: "{preferred_chart}".')
-    if objective:
-        guidance.append(f'Objective: {objective}.')
-    if category_result:
-        guidance.append(
-            "You are also given optional categorization hints (category_mapping) that you MAY use for grouping:\n"
-            f"{json.dumps(category_result.get('category_mapping', {}), ensure_ascii=False)}"
-        )
-    guidance_text = "\n".join(guidance) if guidance else "If unclear, infer a sensible chart/table."
-
-    format_rules = (
-        "Output STRICT JSON for ONE visualization ONLY.\n"
-        "Allowed schemas:\n"
-        "- chart: { type: 'chart', chartType: 'pie'|'bar'|'line', data: [{label, value}], text_summary }\n"
-        "- table: { type: 'table', headers: string[], rows: (string|number|boolean|null)[][], text_summary }\n\n"
-        "TEXT SUMMARY RULE:\n"
-        "Always include a 'text_summary' that is 2-4 full sentences. "
-        "It should summarize the main insight, highlight trends or patterns, "
-        "and mention notable categories, time ranges, or outliers. "
-        "Avoid single-word or vague summaries.\n"
-        "Do not include any text outside JSON."
-    )
-    
-    prompt = f"""
-        {preface}
-
-        {guidance_text}
-
-        {format_rules}
-
-        Respond ONLY with strict JSON matching one of the schemas (pie/bar/line/table). 
-        Output JSON must match the keys exactly.
-
-        Raw data (JSON list of records):
-        {json.dumps(data, ensure_ascii=False)}
-    """
+        data = json.loads(data)
 
     try:
-        structured_llm = llm.with_structured_output(VisualizationRouter)
-        resp = structured_llm.invoke(prompt)
-        result = resp.visualization.model_dump()
-        logger.debug(f"LLM raw response (chart prep): {result}")
-
-        # Validation
-        if "type" not in result:
-            raise ValueError("Missing 'type' in LLM response.")
-        if result["type"] == "chart":
-            if "chartType" not in result:
-                raise ValueError("Missing 'chartType' for chart response.")
-            if "data" not in result:
-                raise ValueError("Missing 'data' for chart response.")
-        elif result["type"] == "table":
-            if "headers" not in result or "rows" not in result:
-                raise ValueError("Missing 'headers' or 'rows' for table response.")
-            
-        if result.get("type") == "chart":
-            result = normalize_chart_result(result, max_buckets=12)
-
-        if "text_summary" not in result:
-            result["text_summary"] = "Prepared chart/table data."
-
+        # Numbers come from the engine; the LLM only narrates the aggregated series
+        spec = infer_chart_spec(objective, preferred_chart, group_by)
+        aggregated = aggregate(data, spec, pre_aggregated=bool(group_by), category_result=category_result)
+        logger.info(f"Aggregated {len(data)} rows into {spec.chart_type} by {spec.dimension} ({spec.measure})")
+
+        # The numbers are final here; streaming clients can draw the chart before the summary exists
+        emit_event("chart", {k: v for k, v in aggregated.items() if k != "text_summary"})
+
+        if not data:
+            aggregated["text_summary"] = "No transactions matched your request, so there is nothing to chart yet."
+        else:
+            facts = describe_series(aggregated, spec)
+            aggregated["text_summary"] = _summarize_chart(objective, facts, metrics, category_result)
+
+        key = aggregated.get("chartType") if aggregated["type"] == "chart" else "table"
+        result = RESULT_MODELS[key].model_validate(aggregated).model_dump()
         return result
 
     except Exception as e:
@@ -158,6 +155,7 @@ def get_chart_data_preparer_tool():
             "Prepare the FINAL visualization JSON (chart or table). "
             "REQUIRES a valid 'handle' from mongo_query_tool to fetch data from Redis cache. "
             "Optionally accepts an objective (aggregation goal) and preferred_chart type. "
+            "Aggregation is computed deterministically from the handle's rows; the LLM only writes text_summary. "
             "Returns STRICT JSON for rendering a pie/bar/line chart or a table."
         ),
         func=_prepare_chart_data,
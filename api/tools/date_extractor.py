@@ -3,18 +3,37 @@ from pydantic import BaseModel, Field
 from typing import Dict, Any, Optional
 from datetime import datetime
 from utils.logger import setup_logger
+from utils.context import tool_scope
 from agents.llm import llm
+from utils.date_parser import parse_date_range
+from utils.counters import get_counter
 import json
 
 logger = setup_logger(__name__)
 
+date_parser_counter = get_counter("date_parser")
+
 class DateRangeInput(BaseModel):
     query: str = Field(..., description="Natural-language query to extract a start and end date from")
 
+@tool_scope("date_range_extractor")
 def _extract_date_range(query: str) -> Dict[str, Any]:
 
     logger.info(f"Extracting date range from: {query}")
 
+    # Deterministic fast path for common expressions; the LLM only sees what it cannot parse
+    parsed = parse_date_range(query)
+    if parsed:
+        date_parser_counter.hit()
+        logger.info(f"Date range resolved by rules from '{parsed.matched}'")
+        return {
+            "start_date": datetime.combine(parsed.start, datetime.min.time()).isoformat(timespec="microseconds"),
+            "end_date": datetime.combine(parsed.end, datetime.min.time()).isoformat(timespec="microseconds"),
+            "parsed_successfully": True,
+            "source": "rules",
+        }
+    date_parser_counter.miss()
+
     today = datetime.now().strftime("%Y-%m-%d")
 
     prompt = (
@@ -1,14 +1,23 @@
 from langchain.tools import StructuredTool
 from utils.logger import setup_logger
+from utils.context import tool_scope
 from agents.llm import llm
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional, Set
-import json
+from typing import List, Dict, Any, Optional, Set, Tuple
+import json, re, hashlib
+from functools import lru_cache
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import ChatPromptTemplate
+from utils.redis_utils import redis_client
+from utils.date_parser import parse_date_range
+from utils.counters import get_counter
+from config.settings import settings
 
 logger = setup_logger(__name__)
 
+projection_rules_counter = get_counter("projection_rules")
+projection_memo_counter = get_counter("projection_memo")
+
 FIELD_WHITELIST: Set[str] = {
     "_id",
     "transaction_id",
@@ -53,6 +62,44 @@ DEFAULT_INCLUDE: Set[str] = {"amount", "initiated_at"}
 
 EXCLUDE_ID_BY_DEFAULT = False
 
+# Projections for the recurring query shapes; a query matching one or more intents
+# gets the union of their fields without an LLM call.
+INTENT_PROJECTIONS: Dict[str, List[str]] = {
+    "category_breakdown": ["amount", "initiated_at", "currency", "merchant.category", "merchant.type", "transaction_type"],
+    "merchant_breakdown": ["amount", "initiated_at", "currency", "merchant.name", "merchant.category"],
+    "trend": ["amount", "initiated_at", "currency", "transaction_type"],
+    "p2p_transfers": ["amount", "initiated_at", "currency", "to_account.user_name", "to_account.account_number", "transaction_mode", "status", "remarks"],
+    "failed_transactions": ["amount", "initiated_at", "currency", "status", "failed_at", "transaction_mode", "reference_number", "merchant.name", "to_account.user_name"],
+}
+
+INTENT_KEYWORDS: Dict[str, re.Pattern] = {
+    "category_breakdown": re.compile(r"\bcategor(?:y|ies|ize|ise|ized|ised)\b|\bspending types?\b"),
+    "merchant_breakdown": re.compile(r"\bmerchants?\b|\bshops?\b|\bstores?\b|\bvendors?\b|\bbrands?\b"),
+    "trend": re.compile(r"\btrends?\b|\bover time\b|\b(?:daily|weekly|monthly)\b|\bper (?:day|week|month)\b|\bmonth over month\b"),
+    "p2p_transfers": re.compile(r"\bsent\b|\bp2p\b|\bpaid to\b|\btransfers? to\b|\brecipients?\b|\bfriends?\b|\bpeople\b"),
+    "failed_transactions": re.compile(r"\bfail(?:ed|ure|ures)?\b|\bdeclined\b|\bunsuccessful\b"),
+}
+
+# Whitelisted fields a query can name outright. A rule match adds the ones the query names, so
+# "description and order id of my merchant payments" keeps both alongside the merchant fields.
+FIELD_MENTIONS: Dict[str, re.Pattern] = {
+    "transaction_id": re.compile(r"\btransaction[ _]ids?\b"),
+    "order_id": re.compile(r"\border[ _]?(?:ids?|numbers?|nos?)\b"),
+    "reference_number": re.compile(r"\b(?:reference|ref)(?:[ _](?:numbers?|nos?|ids?))?\b"),
+    "description": re.compile(r"\bdescriptions?\b"),
+    "remarks": re.compile(r"\bremarks?\b|\bnotes?\b"),
+    "status": re.compile(r"\bstatus(?:es)?\b"),
+    "currency": re.compile(r"\bcurrenc(?:y|ies)\b"),
+    "transaction_mode": re.compile(r"\b(?:payment|transaction)[ _](?:modes?|methods?)\b|\btransaction_mode\b"),
+    "transaction_type": re.compile(r"\btransaction[ _]types?\b"),
+    "completed_at": re.compile(r"\bcompleted(?:[ _]at)?\b|\bcompletion\b"),
+    "failed_at": re.compile(r"\bfailed[ _]at\b|\bfailure (?:times?|dates?)\b"),
+    "merchant.name": re.compile(r"\bmerchant names?\b"),
+    "merchant.type": re.compile(r"\bmerchant types?\b"),
+    "to_account.account_number": re.compile(r"\baccount[ _](?:numbers?|nos?)\b"),
+    "to_account.user_name": re.compile(r"\brecipient names?\b|\bpayee names?\b"),
+}
+
 class ProjectionToolInput(BaseModel):
     query: str = Field(
         ...,
@@ -133,10 +180,108 @@ _prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
+def _build_projection(fields: List[str]) -> Tuple[List[str], Dict[str, int]]:
+    # Sanitize against whitelist
+    seen = set()
+    sanitized: List[str] = []
+    for f in fields:
+        if f in FIELD_WHITELIST and f not in seen:
+            seen.add(f)
+            sanitized.append(f)
+
+    # Ensure minimal defaults
+    for f in DEFAULT_INCLUDE:
+        if f in FIELD_WHITELIST and f not in seen:
+            seen.add(f)
+            sanitized.append(f)
+    
+    if not sanitized:
+        sanitized = list(DEFAULT_INCLUDE)
+
+    projection: Dict[str, int] = {f: 1 for f in sanitized}
+    if EXCLUDE_ID_BY_DEFAULT and "_id" not in sanitized:
+        projection["_id"] = 0
+
+    return sanitized, projection
+
+
+def _normalize_query(query: str) -> str:
+    # Date ranges and numbers do not change which fields are needed
+    parsed = parse_date_range(query)
+    text = re.sub(re.escape(parsed.matched), " ", query, flags=re.IGNORECASE) if parsed else query
+    text = re.sub(r"\d+", "#", text.lower())
+    text = re.sub(r"[^\w#\s]", " ", text)
+    return " ".join(text.split())
+
+
+@lru_cache(maxsize=64)
+def _projection_for_intents(intents: Tuple[str, ...], named: Tuple[str, ...] = ()) -> Tuple[Tuple[str, ...], Tuple[Tuple[str, int], ...]]:
+    fields = [f for intent in intents for f in INTENT_PROJECTIONS[intent]] + list(named)
+    sanitized, projection = _build_projection(fields)
+    return tuple(sanitized), tuple(projection.items())
+
+
+def _match_intents(normalized_query: str) -> Tuple[str, ...]:
+    return tuple(name for name, pattern in INTENT_KEYWORDS.items() if pattern.search(normalized_query))
+
+
+def _named_fields(normalized_query: str) -> Tuple[str, ...]:
+    return tuple(field for field, pattern in FIELD_MENTIONS.items() if pattern.search(normalized_query))
+
+
+def _memo_key(normalized_query: str) -> str:
+    return "projmemo:" + hashlib.sha256(normalized_query.encode("utf-8")).hexdigest()[:24]
+
+
+def _resolve_projection(query: str) -> Optional[Dict[str, Any]]:
+    normalized = _normalize_query(query)
+
+    intents = _match_intents(normalized)
+    if intents:
+        projection_rules_counter.hit()
+        covered = {f for intent in intents for f in INTENT_PROJECTIONS[intent]}
+        named = tuple(f for f in _named_fields(normalized) if f not in covered)
+        fields, projection = _projection_for_intents(intents, named)
+        reasoning = f"Resolved by intent rules: {', '.join(intents)}"
+        return {
+            "projection": dict(projection),
+            "selected_fields": list(fields),
+            "reasoning": reasoning + (f", plus named fields: {', '.join(named)}." if named else "."),
+            "parsed_successfully": True,
+            "source": "rules",
+        }
+    projection_rules_counter.miss()
+
+    try:
+        cached = redis_client.get_data(_memo_key(normalized))
+    except Exception as e:
+        logger.warning(f"[mongo_projection_tool] Projection memo unavailable: {e}")
+        cached = None
+
+    if cached:
+        projection_memo_counter.hit()
+        return {**json.loads(cached), "source": "memo"}
+    projection_memo_counter.miss()
+    return None
+
+
+def _remember_projection(query: str, result: Dict[str, Any]) -> None:
+    try:
+        redis_client.set_data(_memo_key(_normalize_query(query)), json.dumps(result), settings.PROJECTION_MEMO_TTL)
+    except Exception as e:
+        logger.warning(f"[mongo_projection_tool] Failed to memoize projection: {e}")
+
+
+@tool_scope("mongo_projection_tool")
 def _generate_mongo_projection(query: str) -> Dict[str, Any]:
     
     logger.info(f"[mongo_projection_tool] Building projection for query: {query}")
 
+    resolved = _resolve_projection(query)
+    if resolved:
+        logger.info(f"[mongo_projection_tool] Projection resolved from {resolved['source']}")
+        return resolved
+
     try:
         chain = _prompt | llm | _parser
         parsed: ProjectionChoice = chain.invoke(
@@ -153,33 +298,19 @@ def _generate_mongo_projection(query: str) -> Dict[str, Any]:
         elif isinstance(parsed, dict):
             result = ProjectionChoice.parse_obj(parsed)
 
-        # Sanitize against whitelist
-        seen = set()
-        sanitized: List[str] = []
-        for f in result.fields:
-            if f in FIELD_WHITELIST and f not in seen:
-                seen.add(f)
-                sanitized.append(f)
-
-        # Ensure minimal defaults
-        for f in DEFAULT_INCLUDE:
-            if f in FIELD_WHITELIST and f not in seen:
-                seen.add(f)
-                sanitized.append(f)
-        
-        if not sanitized:
-            sanitized = list(DEFAULT_INCLUDE)
-
-        projection: Dict[str, int] = {f: 1 for f in sanitized}
-        if EXCLUDE_ID_BY_DEFAULT and "_id" not in sanitized:
-            projection["_id"] = 0
-        
-        return {
+        sanitized, projection = _build_projection(result.fields)
+
+        result = {
             "projection": projection,
             "selected_fields": sanitized,
             "reasoning": result.reasoning,
             "parsed_successfully": True,
         }
+
+        # Only validated LLM answers are memoized, so a later hit skips the model entirely
+        _remember_projection(query, result)
+
+        return {**result, "source": "llm"}
     
     except Exception as e:
         logger.error(f"[mongo_projection_tool] Parsing failed: {e}")
@@ -1,18 +1,22 @@
 from langchain.tools import StructuredTool
 from pydantic import BaseModel, Field, model_validator
-from typing import Optional, Union, Dict, Any
+from typing import Optional, Union, Dict, Any, List, Literal
 from db.connection import mongo_conn
 from utils.logger import setup_logger
 import json, copy
-from utils.redis_utils import redis_client
 from config.settings import settings
 from datetime import datetime, timezone
-from utils.helper import _make_handle, _clean_for_json
-from utils.context import current_user_id
+from utils.helper import _make_handle, _clean_for_json, _store_handle_payload
+from utils.context import current_user_id, tool_scope
+from utils.prompt_encoding import encode_for_prompt
+from utils.counters import get_counter
+from services.rollups import ROLLUPS_COLLECTION
 import re
 
 logger = setup_logger(__name__)
 
+rollup_counter = get_counter("spending_rollups")
+
 class MongoQueryToolInput(BaseModel):
     query_filter: Any = Field(
         ...,
@@ -31,11 +35,176 @@ class MongoQueryToolInput(BaseModel):
             "Usually the direct output of the mongo projection tool."
         )
     )
-  
+    group_by: Optional[Literal["merchant", "category", "mode", "day", "week", "month"]] = Field(
+        default=None,
+        description=(
+            "Optional. Aggregate on the server instead of fetching raw rows. "
+            "Use 'merchant', 'category' or 'mode' for breakdowns and 'day', 'week' or 'month' for trends. "
+            "When set, the handle holds one row per group with total_amount and transaction_count, "
+            "covering ALL matching transactions rather than the first few rows."
+        )
+    )
+
+# Group key expression per supported dimension
+GROUP_BY_KEYS: Dict[str, Any] = {
+    "merchant": {"$ifNull": ["$merchant.name", "$to_account.user_name"]},
+    "category": {"$ifNull": ["$merchant.category", "Transfers"]},
+    "mode": "$transaction_mode",
+    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$initiated_at"}},
+    "week": {"$dateToString": {"format": "%G-W%V", "date": "$initiated_at"}},
+    "month": {"$dateToString": {"format": "%Y-%m", "date": "$initiated_at"}},
+}
+
+TIME_GROUPS = {"day", "week", "month"}
+
+# Per-group flag marking merchant groups labelled from the payee (P2P transfers), so consumers
+# never treat a person's name as a merchant. Rollup rows only keep the category, which is
+# "Transfers" exactly when a transaction has no merchant.
+MERCHANT_TRANSFER_FLAG = {"$max": {"$eq": [{"$ifNull": ["$merchant.name", None]}, None]}}
+ROLLUP_TRANSFER_FLAG = {"$max": {"$eq": ["$category", "Transfers"]}}
+
+# Group-bys and filter fields the monthly rollups can answer, with the rollup field for each
+ROLLUP_GROUP_KEYS = {"merchant": "$merchant", "category": "$category", "mode": "$mode", "month": "$month"}
+ROLLUP_FILTER_FIELDS = {"merchant.category": "category", "transaction_mode": "mode", "currency": "currency"}
+
+
+def _build_mongo_filter(query_filter: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+
+    mongo_query_filter = copy.deepcopy(query_filter)
+
+    # Map counterparty_name to a case-insensitive contains match on the payee side
+    name = mongo_query_filter.pop("counterparty_name", None)
+    if name:
+        mongo_query_filter["to_account.user_name"] = {
+            "$regex": re.escape(name), 
+            "$options": "i"            
+        }
+        mongo_query_filter["to_account._id"] = {"$exists": True}
+
+    # Add user_id filter
+    mongo_query_filter["user_id"] = user_id
+
+    # Convert ISO strings in `initiated_at` to actual datetime objects
+    if "initiated_at" in mongo_query_filter:
+        initiated = mongo_query_filter["initiated_at"]
+        mongo_query_filter["initiated_at"] = {
+            k: datetime.fromisoformat(v)
+            for k, v in initiated.items()
+        }
+
+    return mongo_query_filter
+
+
+def _group_stages(
+    group_key: Any, group_by: str, amount: Any, count: Any, first_at: Any, last_at: Any,
+    transfer_flag: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+
+    # Trends keep the most recent periods and read chronologically; breakdowns keep and read largest first
+    if group_by in TIME_GROUPS:
+        keep_stages = [{"$sort": {"_id": -1}}, {"$limit": settings.LIMIT_GROUP_ROWS}, {"$sort": {"_id": 1}}]
+    else:
+        keep_stages = [{"$sort": {"total_amount": -1, "_id": 1}}, {"$limit": settings.LIMIT_GROUP_ROWS}]
+
+    group_stage: Dict[str, Any] = {
+        "_id": group_key,
+        "total_amount": {"$sum": amount},
+        "transaction_count": {"$sum": count},
+        "first_at": {"$min": first_at},
+        "last_at": {"$max": last_at},
+    }
+    project_stage: Dict[str, Any] = {
+        "_id": 0,
+        "label": {"$ifNull": ["$_id", "Other"]},
+        "total_amount": {"$round": ["$total_amount", 2]},
+        "transaction_count": 1,
+        "first_at": 1,
+        "last_at": 1,
+    }
+    if group_by == "merchant" and transfer_flag:
+        group_stage["transfer"] = transfer_flag
+        project_stage["transfer"] = 1
+
+    return [
+        {"$group": group_stage},
+        # One document out: the kept groups, plus totals over every group so the limit never skews them
+        {
+            "$facet": {
+                "groups": keep_stages + [{"$project": project_stage}],
+                "totals": [
+                    {
+                        "$group": {
+                            "_id": None,
+                            "total_amount": {"$sum": "$total_amount"},
+                            "transaction_count": {"$sum": "$transaction_count"},
+                            "group_count": {"$sum": 1},
+                            "first_at": {"$min": "$first_at"},
+                            "last_at": {"$max": "$last_at"},
+                        }
+                    },
+                ],
+            }
+        },
+    ]
+
+
+def _read_groups(results: List[Dict[str, Any]]) -> tuple:
+    # (kept group rows, totals over all groups) from the single $facet document
+    out = results[0] if results else {}
+    totals = (out.get("totals") or [{}])[0]
+    return out.get("groups") or [], totals
 
-def _mongo_query(query_filter: Any, query_projection: Any) -> Dict[str, Any]:
+
+def _build_group_pipeline(mongo_query_filter: Dict[str, Any], group_by: str) -> List[Dict[str, Any]]:
+
+    if group_by not in GROUP_BY_KEYS:
+        raise ValueError(f"Unsupported group_by '{group_by}'. Use one of: {sorted(GROUP_BY_KEYS)}")
+
+    return [{"$match": mongo_query_filter}] + _group_stages(
+        GROUP_BY_KEYS[group_by], group_by, "$amount", 1, "$initiated_at", "$initiated_at", MERCHANT_TRANSFER_FLAG
+    )
+
+
+def _month_bound(value: Any) -> Optional[str]:
+    # "YYYY-MM" for a bound at midnight on the first of a month, else None
+    bound = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+    if bound.day != 1 or bound.time() != datetime.min.time():
+        return None
+    return bound.strftime("%Y-%m")
+
+
+def _build_rollup_pipeline(query_filter: Dict[str, Any], user_id: str, group_by: str) -> Optional[List[Dict[str, Any]]]:
+    # Rollup pipeline when the query lines up with whole months and rollup dimensions, else None
+
+    if group_by not in ROLLUP_GROUP_KEYS:
+        return None
+
+    match: Dict[str, Any] = {"user_id": user_id}
+    for field, value in query_filter.items():
+        if field == "initiated_at":
+            if not isinstance(value, dict) or set(value) - {"$gte", "$lt"}:
+                return None
+            months = {op: _month_bound(bound) for op, bound in value.items()}
+            if None in months.values():
+                return None
+            match["month"] = months
+        elif field in ROLLUP_FILTER_FIELDS:
+            if isinstance(value, dict) and set(value) != {"$in"}:
+                return None
+            match[ROLLUP_FILTER_FIELDS[field]] = value
+        else:
+            return None
+
+    return [{"$match": match}] + _group_stages(
+        ROLLUP_GROUP_KEYS[group_by], group_by, "$total_amount", "$transaction_count", "$first_at", "$last_at",
+        ROLLUP_TRANSFER_FLAG,
+    )
+
+
+@tool_scope("mongo_query_tool")
+def _mongo_query(query_filter: Any, query_projection: Any, group_by: Optional[str] = None) -> Dict[str, Any]:
     
-    logger.info(f"[mongo_query_tool]: Running MongoDB query with filter: {query_filter}")
+    logger.info(f"[mongo_query_tool]: Running MongoDB query with filter: {query_filter} (group_by={group_by})")
 
     try:
 
@@ -51,59 +220,71 @@ def _mongo_query(query_filter: Any, query_projection: Any) -> Dict[str, Any]:
         if not isinstance(query_projection, dict):
             raise ValueError("query_projection must be a dict or JSON string representing a dict")
         
-        mongo_query_filter = copy.deepcopy(query_filter)
-
-        # Map counterparty_name to a case-insensitive contains match on the payee side
-        name = mongo_query_filter.pop("counterparty_name", None)
-        if name:
-            mongo_query_filter["to_account.user_name"] = {
-                "$regex": re.escape(name), 
-                "$options": "i"            
-            }
-            mongo_query_filter["to_account._id"] = {"$exists": True}
-
-        # Add user_id filter
-        mongo_query_filter["user_id"] = user_id
-
-        # Convert ISO strings in `initiated_at` to actual datetime objects
-        if "initiated_at" in mongo_query_filter:
-            initiated = mongo_query_filter["initiated_at"]
-            mongo_query_filter["initiated_at"] = {
-                k: datetime.fromisoformat(v)
-                for k, v in initiated.items()
-            }
+        mongo_query_filter = _build_mongo_filter(query_filter, user_id)
 
         db = mongo_conn.connect()
         collection = db.transactions
 
         projection = query_projection
 
-        # Run the dynamic query
-        results = list(collection.find(mongo_query_filter, projection).sort("initiated_at", -1).limit(settings.LIMIT_FETCH_ROWS))
+        if group_by:
+            # Whole-month breakdowns and trends read the monthly rollups; an empty answer is
+            # re-checked against transactions in case the user's rollups were never built
+            rollup_pipeline = _build_rollup_pipeline(query_filter, user_id, group_by) if settings.ROLLUPS_ENABLED else None
+            results, totals = _read_groups(list(db[ROLLUPS_COLLECTION].aggregate(rollup_pipeline)) if rollup_pipeline else [])
+            if results:
+                rollup_counter.hit()
+                logger.info(f"[mongo_query_tool]: answered '{group_by}' from {ROLLUPS_COLLECTION}")
+            else:
+                rollup_counter.miss()
+                # Aggregate on the server so the handle covers the full range in a bounded number of rows
+                results, totals = _read_groups(list(collection.aggregate(_build_group_pipeline(mongo_query_filter, group_by), allowDiskUse=True)))
+
+            total_amount = round(totals.get("total_amount", 0), 2)
+            transaction_count = totals.get("transaction_count", 0)
+            truncated = totals.get("group_count", 0) > len(results)
 
-        total_amount = sum(t.get("amount", 0) for t in results)
-        transaction_count = len(results)
+            cleanedResult = [_clean_for_json(r) for r in results]
 
-        cleanedResult = [_clean_for_json(r) for r in results]
+            logger.info(
+                f"Aggregated {transaction_count} transactions into {totals.get('group_count', 0)} '{group_by}' groups"
+                + (f", kept {len(cleanedResult)}" if truncated else "")
+            )
 
-        logger.info(f"Fetched {transaction_count} transactions for the given filter")
+            bounds = _clean_for_json({"first_at": totals.get("first_at"), "last_at": totals.get("last_at")})
+            min_date = bounds.get("first_at")
+            max_date = bounds.get("last_at")
 
-        # Compute quick date span & sample
-        if transaction_count:
-            dates = [datetime.fromisoformat(t["initiated_at"]) for t in cleanedResult if t.get("initiated_at")]
-            min_date = min(dates).isoformat() if dates else None
-            max_date = max(dates).isoformat() if dates else None
+            fields = ["label", "total_amount", "transaction_count", "first_at", "last_at"]
         else:
-            min_date = max_date = None
+            # Run the dynamic query
+            results = list(collection.find(mongo_query_filter, projection).sort("initiated_at", -1).limit(settings.LIMIT_FETCH_ROWS))
+
+            total_amount = sum(t.get("amount", 0) for t in results)
+            transaction_count = len(results)
+
+            cleanedResult = [_clean_for_json(r) for r in results]
+
+            logger.info(f"Fetched {transaction_count} transactions for the given filter")
+
+            # Compute quick date span & sample
+            if transaction_count:
+                dates = [datetime.fromisoformat(t["initiated_at"]) for t in cleanedResult if t.get("initiated_at")]
+                min_date = min(dates).isoformat() if dates else None
+                max_date = max(dates).isoformat() if dates else None
+            else:
+                min_date = max_date = None
 
-        fields = list(projection.keys())
-        fields = [f for f, inc in projection.items() if inc]
+            fields = [f for f, inc in projection.items() if inc]
+            truncated = transaction_count >= settings.LIMIT_FETCH_ROWS
 
-        sample_n = 3 if transaction_count >= 3 else transaction_count
-        sample = cleanedResult[:sample_n]
+        sample_n = 3 if len(cleanedResult) >= 3 else len(cleanedResult)
+        # The agent reads this summary in its prompt, so the sample goes out in the compact row encoding
+        sample = encode_for_prompt(cleanedResult[:sample_n], "query_sample", "minute")
 
         now_iso = datetime.now(timezone.utc).isoformat()
-        handle = _make_handle(query_filter, projection, now_iso)
+        handle_filter = {**query_filter, "$group_by": group_by} if group_by else query_filter
+        handle = _make_handle(handle_filter, projection, now_iso)
 
         # Redis payload
         cache_payload = {
@@ -112,33 +293,38 @@ def _mongo_query(query_filter: Any, query_projection: Any) -> Dict[str, Any]:
             "ttl_seconds": settings.REDIS_TTL,
             "query_filter": query_filter,
             "projection": projection,
+            "group_by": group_by,
             "metrics": {
                 "transaction_count": transaction_count,
                 "total_amount": total_amount,
                 "date_min": min_date,
                 "date_max": max_date,
+                "truncated": truncated,
             },
             "data": cleanedResult,
         }
 
-        redis_client.set_data(handle, json.dumps(cache_payload))
+        payload_bytes = _store_handle_payload(handle, cache_payload)
 
-        logger.info(f"[mongo_query_tool]: stored {transaction_count} rows under {handle}")
+        logger.info(f"[mongo_query_tool]: stored {len(cleanedResult)} rows ({payload_bytes} bytes) under {handle}")
 
         return {
-            "query_type": "dynamic_filter_query",
+            "query_type": "aggregated_query" if group_by else "dynamic_filter_query",
             "handle": handle,
             "summary": {
                 "transaction_count": transaction_count,
                 "total_amount": total_amount,
                 "date_min": min_date,
                 "date_max": max_date,
+                "group_by": group_by,
                 "fields": fields,
+                "truncated": truncated,
                 "sample": sample,
             },
             "query_echo": {
                 "filter": query_filter,
                 "projection": projection,
+                "group_by": group_by,
             },
         }
 
@@ -156,7 +342,9 @@ def get_mongo_query_tool() -> StructuredTool:
             "Downstream tools should use the handle to page or re-use results. "
             "The input should be a valid MongoDB query object. "
             "For date filtering, use the 'initiated_at' field with $gte and $lt."
-            "For recipient name search, pass 'counterparty_name': '<name>' to match case-insensitive substrings in 'to_account.user_name'."
+            "For recipient name search, pass 'counterparty_name': '<name>' to match case-insensitive substrings in 'to_account.user_name'. "
+            "For breakdowns and trends, set 'group_by' (merchant, category, mode, day, week, month) so the database "
+            "aggregates every matching transaction and the handle holds only the grouped totals."
             ),  
         func=_mongo_query,
         args_schema=MongoQueryToolInput
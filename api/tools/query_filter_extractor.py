@@ -3,12 +3,18 @@ from pydantic import BaseModel, Field
 from typing import Dict, Any, Optional, Iterable, List, Union
 from datetime import datetime
 from utils.logger import setup_logger
+from utils.context import tool_scope
 from agents.llm import llm
-import json
+import json, re
 from utils.constants import merchant_categories
+from utils.date_parser import parse_date_range
+from utils.counters import get_counter
 
 logger = setup_logger(__name__)
 
+date_parser_counter = get_counter("date_parser")
+filter_fast_path_counter = get_counter("filter_fast_path")
+
 CATEGORY_ENUM = list(merchant_categories.keys())
 TYPE_ENUM = sorted({t for types in merchant_categories.values() for t in types})
 TYPE_TO_CATEGORY = {t: cat for cat, types in merchant_categories.items() for t in types}
@@ -16,6 +22,31 @@ TYPE_TO_CATEGORY = {t: cat for cat, types in merchant_categories.items() for t i
 _category_norm = {c.lower(): c for c in CATEGORY_ENUM}
 _type_norm = {t.lower(): t for t in TYPE_ENUM}
 
+MODE_ENUM = ["Card", "UPI", "BankTransfer", "Cash"]
+STATUS_ENUM = ["initiated", "success", "failed", "refunded"]
+CURRENCY_ENUM = ["INR", "USD", "EUR"]
+
+MODE_ALIASES = {
+    "bank transfer": "BankTransfer",
+    "banktransfer": "BankTransfer",
+    "debit": "Card",
+    "credit": "Card",
+}
+
+# Words that mean the query carries filters beyond a date range, so the LLM must read it
+_FILTER_HINT_WORDS = (
+    [c.lower() for c in CATEGORY_ENUM]
+    + [t.lower() for t in TYPE_ENUM]
+    + ["card", "upi", "cash", "neft", "imps"] + list(MODE_ALIASES)
+    + ["initiated", "success", "successful", "failed", "failure", "refund", "refunded", "pending", "declined"]
+    + ["inr", "usd", "eur", "rupee", "rupees", "dollar", "dollars", "euro", "euros"]
+    + ["above", "below", "over", "under", "more than", "less than", "greater", "between", "at least", "at most"]
+    + ["sent", "paid", "transfer", "transfers", "received", "to", "from", "with"]
+)
+_FILTER_HINT_PATTERN = re.compile(
+    r"\d|[₹$€]|\b(?:" + "|".join(re.escape(w) for w in sorted(set(_FILTER_HINT_WORDS), key=len, reverse=True)) + r")s?\b"
+)
+
 class QueryFilterInput(BaseModel):
     query: str = Field(..., description="The user's natural language question to extract filters from")
 
@@ -48,10 +79,100 @@ def _normalize_many(values: Iterable[str], norm_map: Dict[str, str]) -> List[str
             out.append(norm)
     return out
 
+def _empty_filters() -> Dict[str, Any]:
+    return {
+        "start_date": None,
+        "end_date": None,
+        "transaction_mode": [],
+        "currency": None,
+        "amount_min": None,
+        "amount_max": None,
+        "status": None,
+        "merchant_category": [],
+        "merchant_type": [],
+        "counterparty_name": None
+    }
+
+def _rule_based_filters(query: str, parsed) -> Optional[Dict[str, Any]]:
+    # Only answer when the date range is the sole filter in the query
+    residual = re.sub(re.escape(parsed.matched), " ", query, flags=re.IGNORECASE).lower()
+    if _FILTER_HINT_PATTERN.search(residual):
+        return None
+    return {
+        **_empty_filters(),
+        "start_date": parsed.start.isoformat(),
+        "end_date": parsed.end.isoformat(),
+    }
+
+def _normalize_filters(result: Dict[str, Any], parsed=None) -> Dict[str, Any]:
+    # Rule-parsed dates win over the LLM's reading of the same expression
+    if parsed:
+        result["start_date"] = parsed.start.isoformat()
+        result["end_date"] = parsed.end.isoformat()
+
+    # Normalize dates
+    result["start_date"] = to_iso(result.get("start_date"))
+    result["end_date"] = to_iso(result.get("end_date"))
+
+    raw_mc = _ensure_list(result.get("merchant_category"))
+    raw_mt = _ensure_list(result.get("merchant_type"))
+    raw_modes = _ensure_list(result.get("transaction_mode"))
+
+    mc = _normalize_many(raw_mc, _category_norm)
+    mt = _normalize_many(raw_mt, _type_norm)
+
+    # If types present, add their parent categories to merchant_category
+    implied_categories = []
+    for t in mt:
+        parent = TYPE_TO_CATEGORY.get(t)
+        if parent:
+            implied_categories.append(parent)
+    implied_categories = _normalize_many(implied_categories, _category_norm)
+
+    combined_mc = mc + [c for c in implied_categories if c not in mc]
+
+    # Normalize transaction modes
+    modes = []
+    for m in raw_modes:
+        m_clean = m.strip()
+        alias = MODE_ALIASES.get(m_clean.lower(), m_clean)
+        if alias in MODE_ENUM and alias not in modes:
+            modes.append(alias)
+
+    result["merchant_category"] = combined_mc
+    result["merchant_type"] = mt
+    result["transaction_mode"] = modes
+
+    if result.get("status") not in STATUS_ENUM:
+        result["status"] = None
+    if result.get("currency") not in CURRENCY_ENUM:
+        result["currency"] = None
+
+    return result
+
+@tool_scope("query_filter_extractor")
 def _extract_filters(query: str) -> Dict[str, Any]:
 
     logger.info(f"Extracting structured filters from query: {query}")
 
+    parsed = parse_date_range(query)
+    if parsed:
+        date_parser_counter.hit()
+        fast = _rule_based_filters(query, parsed)
+        if fast:
+            filter_fast_path_counter.hit()
+            logger.info(f"Filters resolved by rules from '{parsed.matched}' without an LLM call")
+            fast["start_date"] = to_iso(fast["start_date"])
+            fast["end_date"] = to_iso(fast["end_date"])
+            return {
+                "parsed_successfully": True,
+                "source": "rules",
+                **fast
+            }
+    else:
+        date_parser_counter.miss()
+    filter_fast_path_counter.miss()
+
     today = datetime.now().strftime("%Y-%m-%d")
     category_union = " | ".join(f'"{c}"' for c in CATEGORY_ENUM)
     type_union = " | ".join(f'"{t}"' for t in TYPE_ENUM)
@@ -68,7 +189,7 @@ def _extract_filters(query: str) -> Dict[str, Any]:
         '  "amount_max": number | null,\n'
         '  "status": "initiated" | "success" | "failed" | "refunded" | null,\n'
         f'  "merchant_category": [{category_union}, ...] | [],\n'
-        f'  "merchant_type": [{type_union}, ...] | []\n',
+        f'  "merchant_type": [{type_union}, ...] | [],\n'
         '  "counterparty_name": string | null\n'
         "}\n\n"
         "Rules:\n"
@@ -86,44 +207,7 @@ def _extract_filters(query: str) -> Dict[str, Any]:
 
         result = json.loads(response.content)
 
-        # Normalize dates
-        result["start_date"] = to_iso(result.get("start_date"))
-        result["end_date"] = to_iso(result.get("end_date"))
-
-        raw_mc = _ensure_list(result.get("merchant_category"))
-        raw_mt = _ensure_list(result.get("merchant_type"))
-        raw_modes = _ensure_list(result.get("transaction_mode"))
-
-        mc = _normalize_many(raw_mc, _category_norm)
-        mt = _normalize_many(raw_mt, _type_norm)
-
-        # If types present, add their parent categories to merchant_category
-        implied_categories = []
-        for t in mt:
-            parent = TYPE_TO_CATEGORY.get(t)
-            if parent:
-                implied_categories.append(parent)
-        implied_categories = _normalize_many(implied_categories, _category_norm)
-
-        combined_mc = mc + [c for c in implied_categories if c not in mc]
-
-        # Normalize transaction modes
-        MODE_ENUM = {"Card", "UPI", "BankTransfer", "Cash"}
-        modes = []
-        for m in raw_modes:
-            m_clean = m.strip()
-            alias = {
-                "bank transfer": "BankTransfer",
-                "banktransfer": "BankTransfer",
-                "debit": "Card",
-                "credit": "Card",
-            }.get(m_clean.lower(), m_clean)
-            if alias in MODE_ENUM and alias not in modes:
-                modes.append(alias)
-
-        result["merchant_category"] = combined_mc
-        result["merchant_type"] = mt
-        result["transaction_mode"] = modes
+        result = _normalize_filters(result, parsed)
 
         return {
             "parsed_successfully": True,
@@ -135,16 +219,7 @@ def _extract_filters(query: str) -> Dict[str, Any]:
         return {
             "parsed_successfully": False,
             "error": str(e),
-            "start_date": None,
-            "end_date": None,
-            "transaction_mode": [],
-            "currency": None,
-            "amount_min": None,
-            "amount_max": None,
-            "status": None,
-            "merchant_category": [],
-            "merchant_type": [],
-            "counterparty_name": None
+            **_empty_filters()
         }
 
 def get_query_filter_extractor_tool() -> StructuredTool:
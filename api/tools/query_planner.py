@@ -0,0 +1,246 @@
+from langchain.tools import StructuredTool
+from pydantic import BaseModel, Field
+from typing import Dict, Any, Optional, List, Literal
+from datetime import datetime, timedelta
+import re
+from utils.logger import setup_logger
+from utils.context import tool_scope
+from agents.llm import llm
+from utils.date_parser import parse_date_range
+from utils.chart_engine import infer_chart_spec
+from utils.counters import get_counter
+from utils.tool_runner import ToolCall, run_concurrently
+from tools.query_filter_extractor import (
+    CATEGORY_ENUM, TYPE_ENUM, MODE_ENUM, STATUS_ENUM, CURRENCY_ENUM,
+    _extract_filters, _normalize_filters, _empty_filters, _rule_based_filters,
+)
+from tools.mongo_projection_tool import (
+    allowed_fields_sorted, _build_projection, _resolve_projection, _generate_mongo_projection,
+)
+
+logger = setup_logger(__name__)
+
+planner_counter = get_counter("query_planner")
+
+GroupBy = Literal["merchant", "category", "mode", "day", "week", "month"]
+
+# chart_engine dimension -> mongo_query_tool group_by for rule-built plans
+DIMENSION_GROUP_BY = {
+    "merchant": "merchant",
+    "category": "category",
+    "mode": "mode",
+}
+
+CHART_HINT_PATTERN = re.compile(r"\b(pie|bar|line|table)\b")
+
+CATEGORIZATION_HINT = ("categor", "pattern", "recommend", "saving", "save", "habit", "where does my money")
+
+
+class QueryPlannerInput(BaseModel):
+    query: str = Field(..., description="The user's natural language question to plan a data query for")
+
+class PlanFilters(BaseModel):
+    start_date: Optional[str] = Field(None, description="Inclusive start date, YYYY-MM-DD")
+    end_date: Optional[str] = Field(None, description="Inclusive end date, YYYY-MM-DD")
+    transaction_mode: List[str] = Field(default_factory=list, description=f"Any of {MODE_ENUM}")
+    currency: Optional[str] = Field(None, description=f"One of {CURRENCY_ENUM}")
+    amount_min: Optional[float] = None
+    amount_max: Optional[float] = None
+    status: Optional[str] = Field(None, description=f"One of {STATUS_ENUM}")
+    merchant_category: List[str] = Field(default_factory=list, description=f"Any of {CATEGORY_ENUM}")
+    merchant_type: List[str] = Field(default_factory=list, description=f"Any of {TYPE_ENUM}")
+    counterparty_name: Optional[str] = Field(None, description="Person the money was sent to, if named")
+
+class QueryPlan(BaseModel):
+    intent: Literal["data", "other"] = Field(
+        ..., description="'data' if answering needs the user's transactions, otherwise 'other'"
+    )
+    filters: PlanFilters
+    fields: List[str] = Field(..., description="Minimal transaction fields needed to answer")
+    group_by: Optional[GroupBy] = Field(
+        None, description="Server-side grouping for breakdowns and trends; null for row listings"
+    )
+    preferred_chart: Optional[Literal["pie", "bar", "line", "table"]] = None
+    objective: str = Field(..., description="Short aggregation goal, e.g. 'spending by merchant last 30 days'")
+    needs_categorization: bool = Field(
+        False, description="True if the user asks for categorization, spending patterns or recommendations"
+    )
+
+
+def _build_query_filter(filters: Dict[str, Any]) -> Dict[str, Any]:
+    # Normalized planner filters -> mongo_query_tool query_filter
+    query_filter: Dict[str, Any] = {}
+
+    if filters.get("start_date") or filters.get("end_date"):
+        initiated = {}
+        if filters.get("start_date"):
+            initiated["$gte"] = filters["start_date"]
+        if filters.get("end_date"):
+            # end_date is inclusive, so bound by the start of the next day. A range ending
+            # today stays open, which lets month-aligned starts use the monthly rollups.
+            end = datetime.fromisoformat(filters["end_date"]) + timedelta(days=1)
+            if end <= datetime.now():
+                initiated["$lt"] = end.isoformat(timespec="microseconds")
+        query_filter["initiated_at"] = initiated
+
+    if filters.get("transaction_mode"):
+        query_filter["transaction_mode"] = {"$in": filters["transaction_mode"]}
+    if filters.get("currency"):
+        query_filter["currency"] = filters["currency"]
+    if filters.get("status"):
+        query_filter["status"] = filters["status"]
+
+    amount = {}
+    if filters.get("amount_min") is not None:
+        amount["$gte"] = filters["amount_min"]
+    if filters.get("amount_max") is not None:
+        amount["$lte"] = filters["amount_max"]
+    if amount:
+        query_filter["amount"] = amount
+
+    if filters.get("merchant_type"):
+        query_filter["merchant.type"] = {"$in": filters["merchant_type"]}
+    elif filters.get("merchant_category"):
+        query_filter["merchant.category"] = {"$in": filters["merchant_category"]}
+
+    if filters.get("counterparty_name"):
+        query_filter["counterparty_name"] = filters["counterparty_name"]
+
+    return query_filter
+
+
+def _chart_hint(query: str) -> Optional[str]:
+    m = CHART_HINT_PATTERN.search(query.lower())
+    return m.group(1) if m else None
+
+
+def _needs_categorization(query: str) -> bool:
+    text = query.lower()
+    return any(hint in text for hint in CATEGORIZATION_HINT)
+
+
+def _group_by_for(query: str, preferred_chart: Optional[str]) -> Optional[str]:
+    spec = infer_chart_spec(query, preferred_chart)
+    if spec.dimension == "time":
+        return spec.granularity or "month"
+    return DIMENSION_GROUP_BY.get(spec.dimension)
+
+
+def _plan_result(source: str, intent: str, filters: Dict[str, Any], projection: Dict[str, Any],
+                 group_by: Optional[str], preferred_chart: Optional[str], objective: str,
+                 needs_categorization: bool) -> Dict[str, Any]:
+    return {
+        "parsed_successfully": True,
+        "source": source,
+        "intent": intent,
+        "filters": filters,
+        "query_filter": _build_query_filter(filters),
+        "query_projection": projection["projection"],
+        "selected_fields": projection["selected_fields"],
+        "group_by": group_by,
+        "preferred_chart": preferred_chart,
+        "objective": objective,
+        "needs_categorization": needs_categorization,
+    }
+
+
+def _rule_based_plan(query: str) -> Optional[Dict[str, Any]]:
+    # Whole plan without an LLM: the date is the only filter and the shape is a known intent
+    parsed = parse_date_range(query)
+    filters = _rule_based_filters(query, parsed) if parsed else None
+    if not filters:
+        return None
+    projection = _resolve_projection(query)
+    if not projection or projection.get("source") != "rules":
+        return None
+
+    preferred_chart = _chart_hint(query)
+    filters = _normalize_filters(filters)
+    return _plan_result(
+        "rules", "data", filters, projection,
+        _group_by_for(query, preferred_chart), preferred_chart, query.strip(),
+        _needs_categorization(query),
+    )
+
+
+def _fallback_plan(query: str) -> Dict[str, Any]:
+    # Planner call failed: fall back to the single-purpose tools, which only need the query text
+    results, _ = run_concurrently([
+        ToolCall("query_filter_extractor", _extract_filters, (query,)),
+        ToolCall("mongo_projection_tool", _generate_mongo_projection, (query,)),
+    ])
+    filters = results["query_filter_extractor"]
+    projection = results["mongo_projection_tool"]
+    preferred_chart = _chart_hint(query)
+    result = _plan_result(
+        "fallback", "data", {k: v for k, v in filters.items() if k in _empty_filters()}, projection,
+        _group_by_for(query, preferred_chart), preferred_chart, query.strip(),
+        _needs_categorization(query),
+    )
+    result["parsed_successfully"] = filters.get("parsed_successfully", False)
+    return result
+
+
+@tool_scope("query_planner")
+def _plan_query(query: str) -> Dict[str, Any]:
+
+    logger.info(f"[query_planner] Planning query: {query}")
+
+    fast = _rule_based_plan(query)
+    if fast:
+        planner_counter.hit()
+        logger.info("[query_planner] Plan resolved by rules without an LLM call")
+        return fast
+    planner_counter.miss()
+
+    today = datetime.now().strftime("%Y-%m-%d")
+    prompt = (
+        f"Today is {today}.\n"
+        "Plan a MongoDB query over the user's 'transactions' collection for the question below.\n"
+        "Rules:\n"
+        "- Only use the allowed values listed in the schema descriptions; leave a filter empty/null if not mentioned.\n"
+        "- If merchant_type has values, also include their parent category(ies) in merchant_category.\n"
+        "- If the query mentions a person's name like 'John Doe', set counterparty_name to that name.\n"
+        f"- fields: choose the MINIMAL set from {allowed_fields_sorted}.\n"
+        "- group_by: 'merchant', 'category' or 'mode' for breakdowns, 'day', 'week' or 'month' for trends, null for row listings.\n"
+        "- preferred_chart: set only if the user asked for a pie, bar, line chart or a table.\n\n"
+        f"Query: '{query}'"
+    )
+
+    try:
+        plan: QueryPlan = llm.with_structured_output(QueryPlan).invoke(prompt)
+        if isinstance(plan, dict):
+            plan = QueryPlan.model_validate(plan)
+
+        filters = _normalize_filters(plan.filters.model_dump(), parse_date_range(query))
+        fields, projection = _build_projection(plan.fields)
+
+        # A null group_by for a chart with a groupable dimension would chart raw rows
+        preferred_chart = plan.preferred_chart or _chart_hint(query)
+        group_by = plan.group_by or _group_by_for(query, preferred_chart)
+
+        return _plan_result(
+            "llm", plan.intent, filters, {"projection": projection, "selected_fields": fields},
+            group_by, preferred_chart, plan.objective, plan.needs_categorization,
+        )
+
+    except Exception as e:
+        logger.error(f"[query_planner] Structured planning failed, using single-purpose tools: {e}")
+        return _fallback_plan(query)
+
+
+def get_query_planner_tool() -> StructuredTool:
+
+    return StructuredTool.from_function(
+        name="query_planner",
+        description=(
+            "Plans a transaction data query in ONE step. Returns query_filter and query_projection "
+            "(pass both unchanged to mongo_query_tool), group_by (pass to mongo_query_tool when not null), "
+            "preferred_chart and objective (pass to chart_data_preparer) and needs_categorization "
+            "(call category_mapper when true). Filters are validated against known categories, types, "
+            "modes, statuses and currencies."
+        ),
+        func=_plan_query,
+        args_schema=QueryPlannerInput,
+        return_direct=False,
+    )
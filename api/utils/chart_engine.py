@@ -0,0 +1,332 @@
+import re
+import numpy as np
+from typing import Dict, Any, List, Optional, Literal, Tuple
+from pydantic import BaseModel
+
+# Deterministic aggregation of handle rows into PieResult/BarResult/LineResult/TableResult
+# data. Grouping is vectorized with NumPy (np.unique + np.bincount), so cost grows with
+# row count only in the column extraction, and the LLM never sees individual rows.
+
+Dimension = Literal["category", "merchant", "mode", "status", "type", "counterparty", "currency", "time", "label"]
+
+class ChartSpec(BaseModel):
+    chart_type: Literal["pie", "bar", "line", "table"]
+    dimension: Optional[Dimension] = None
+    measure: Literal["sum", "count", "avg"] = "sum"
+    granularity: Optional[Literal["day", "week", "month"]] = None
+    top_n: int = 12
+
+TABLE_MAX_ROWS = 50
+
+DIMENSION_KEYWORDS: List[Tuple[str, re.Pattern]] = [
+    ("time", re.compile(r"\btrends?\b|\bover time\b|\b(?:daily|weekly|monthly)\b|\bper (?:day|week|month)\b|\bby (?:day|week|month|date)\b")),
+    ("category", re.compile(r"\bcategor\w*")),
+    ("merchant", re.compile(r"\bmerchants?\b|\bshops?\b|\bstores?\b|\bvendors?\b")),
+    ("counterparty", re.compile(r"\brecipients?\b|\bpeople\b|\bpersons?\b|\bpayees?\b|\bsent to\b|\bcounterpart(?:y|ies)\b")),
+    ("mode", re.compile(r"\bmodes?\b|\bpayment methods?\b|\bchannels?\b")),
+    ("status", re.compile(r"\bby status\b|\bstatus(?:es)?\b")),
+    ("type", re.compile(r"\btransaction types?\b|\bby type\b|\bcredit vs debit\b")),
+    ("currency", re.compile(r"\bcurrenc(?:y|ies)\b")),
+]
+
+GRANULARITY_KEYWORDS = {
+    "day": re.compile(r"\bdaily\b|\bper day\b|\bby (?:day|date)\b"),
+    "week": re.compile(r"\bweekly\b|\bper week\b|\bby week\b"),
+    "month": re.compile(r"\bmonthly\b|\bper month\b|\bby month\b|\bmonth over month\b"),
+}
+
+# mongo_query_tool group_by -> engine dimension for pre-aggregated handles
+GROUP_BY_DIMENSIONS = {
+    "merchant": "merchant",
+    "category": "category",
+    "mode": "mode",
+    "day": "time",
+    "week": "time",
+    "month": "time",
+}
+
+DIMENSION_LABELS = {
+    "category": "Category",
+    "merchant": "Merchant",
+    "mode": "Transaction Mode",
+    "status": "Status",
+    "type": "Transaction Type",
+    "counterparty": "Recipient",
+    "currency": "Currency",
+    "time": "Period",
+    "label": "Group",
+}
+
+MEASURE_LABELS = {"sum": "Total Amount", "count": "Transactions", "avg": "Average Amount"}
+
+
+def infer_chart_spec(objective: Optional[str], preferred_chart: Optional[str] = None, group_by: Optional[str] = None) -> ChartSpec:
+    text = (objective or "").lower()
+
+    if group_by:
+        dimension = GROUP_BY_DIMENSIONS.get(group_by, "label")
+    else:
+        dimension = next((name for name, pattern in DIMENSION_KEYWORDS if pattern.search(text)), None)
+
+    granularity = None
+    if dimension == "time":
+        if group_by in GRANULARITY_KEYWORDS:
+            granularity = group_by
+        else:
+            granularity = next((g for g, pattern in GRANULARITY_KEYWORDS.items() if pattern.search(text)), None)
+
+    if re.search(r"\bhow many\b|\bnumber of\b|\bcount\b|\bfrequen", text):
+        measure = "count"
+    elif re.search(r"\baverage\b|\bavg\b|\bmean\b", text):
+        measure = "avg"
+    else:
+        measure = "sum"
+
+    chart = (preferred_chart or "").lower()
+    if chart not in ("pie", "bar", "line", "table"):
+        if dimension is None:
+            chart = "table"
+        elif dimension == "time":
+            chart = "line"
+        elif dimension in ("merchant", "counterparty", "label"):
+            chart = "bar"
+        else:
+            chart = "pie"
+
+    # A line chart needs a time axis and a pie chart needs a dimension
+    if chart == "line" and dimension not in ("time", None):
+        chart = "bar"
+    if chart in ("pie", "bar", "line") and dimension is None:
+        dimension, granularity = ("time", None) if chart == "line" else ("category", None)
+
+    return ChartSpec(chart_type=chart, dimension=dimension, measure=measure, granularity=granularity)
+
+
+def _get_path(row: Dict[str, Any], path: str) -> Any:
+    value: Any = row
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _category_lookup(category_result: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    lookup: Dict[str, str] = {}
+    mapping = (category_result or {}).get("category_mapping") or {}
+    for category, members in mapping.items():
+        for member in members or []:
+            lookup[str(member).strip().lower()] = category
+    return lookup
+
+
+def _dimension_labels(rows: List[Dict[str, Any]], dimension: str, category_result: Optional[Dict[str, Any]]) -> List[str]:
+    if dimension == "label":
+        return [str(r.get("label") or "Other") for r in rows]
+    if dimension == "category":
+        lookup = _category_lookup(category_result)
+        labels = []
+        for r in rows:
+            category = _get_path(r, "merchant.category")
+            if not category:
+                key = str(_get_path(r, "merchant.name") or r.get("description") or "").strip().lower()
+                category = lookup.get(key) or ("Transfers" if r.get("to_account") else "Other")
+            labels.append(str(category))
+        return labels
+    if dimension == "merchant":
+        return [str(_get_path(r, "merchant.name") or _get_path(r, "to_account.user_name") or "Other") for r in rows]
+    if dimension == "counterparty":
+        return [str(_get_path(r, "to_account.user_name") or _get_path(r, "merchant.name") or "Other") for r in rows]
+
+    field = {"mode": "transaction_mode", "status": "status", "type": "transaction_type", "currency": "currency"}[dimension]
+    return [str(r.get(field) or "Other") for r in rows]
+
+
+def _auto_granularity(days: np.ndarray) -> str:
+    span = int((days.max() - days.min()).astype(int)) if days.size else 0
+    if span > 120:
+        return "month"
+    if span > 31:
+        return "week"
+    return "day"
+
+
+def _time_labels(rows: List[Dict[str, Any]], granularity: Optional[str]) -> Tuple[np.ndarray, str]:
+    # ISO timestamps -> day resolution; the first 10 chars are always YYYY-MM-DD
+    raw = [str(r.get("initiated_at") or "")[:10] for r in rows]
+    days = np.array([d if d else "NaT" for d in raw], dtype="datetime64[D]")
+    valid = days[~np.isnat(days)]
+    granularity = granularity or _auto_granularity(valid)
+
+    if granularity == "month":
+        buckets = days.astype("datetime64[M]").astype("datetime64[D]")
+    elif granularity == "week":
+        # 1970-01-01 was a Thursday; shift so buckets start on Monday
+        offsets = (days.astype("int64") + 3) % 7
+        buckets = days - offsets.astype("timedelta64[D]")
+    else:
+        buckets = days
+
+    labels = np.datetime_as_string(buckets, unit="D")
+    if granularity == "month":
+        labels = np.array([l[:7] for l in labels], dtype=object)
+    return labels.astype(object), granularity
+
+
+def _measures(rows: List[Dict[str, Any]], pre_aggregated: bool) -> Tuple[np.ndarray, np.ndarray]:
+    if pre_aggregated:
+        amounts = np.fromiter((float(r.get("total_amount") or 0) for r in rows), dtype=np.float64, count=len(rows))
+        counts = np.fromiter((int(r.get("transaction_count") or 0) for r in rows), dtype=np.int64, count=len(rows))
+    else:
+        amounts = np.fromiter((float(r.get("amount") or 0) for r in rows), dtype=np.float64, count=len(rows))
+        counts = np.ones(len(rows), dtype=np.int64)
+    return np.nan_to_num(amounts, nan=0.0, posinf=0.0, neginf=0.0), counts
+
+
+def _group(labels: np.ndarray, amounts: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    keys, inverse = np.unique(labels, return_inverse=True)
+    sums = np.bincount(inverse, weights=amounts, minlength=keys.size)
+    totals = np.bincount(inverse, weights=counts, minlength=keys.size).astype(np.int64)
+    return keys, sums, totals
+
+
+def _values(measure: str, sums: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    if measure == "count":
+        return counts.astype(np.float64)
+    if measure == "avg":
+        return np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+    return sums
+
+
+def _leaf_paths(value: Any, prefix: str) -> List[str]:
+    if isinstance(value, dict) and value:
+        return [path for k, v in value.items() for path in _leaf_paths(v, f"{prefix}.{k}")]
+    return [prefix]
+
+
+def _raw_table(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # Nested dicts become dotted columns at any depth. A key that is None in some rows
+    # (a P2P row's merchant) and a dict in others gets only the expanded columns.
+    headers: List[str] = []
+    for r in rows[:TABLE_MAX_ROWS]:
+        for k, v in r.items():
+            for key in _leaf_paths(v, k):
+                if key not in headers:
+                    headers.append(key)
+    # An expanded key's columns take the place of its bare column
+    flat: List[str] = []
+    for h in headers:
+        for key in [o for o in headers if o.startswith(f"{h}.")] or [h]:
+            if key not in flat and not any(o.startswith(f"{key}.") for o in headers):
+                flat.append(key)
+    headers = flat
+
+    table_rows = []
+    for r in rows[:TABLE_MAX_ROWS]:
+        cells = []
+        for h in headers:
+            value = _get_path(r, h)
+            cells.append(value if value is None or isinstance(value, (str, int, float, bool)) else str(value))
+        table_rows.append(cells)
+
+    return {"type": "table", "headers": headers, "rows": table_rows}
+
+
+def aggregate(
+    rows: List[Dict[str, Any]],
+    spec: ChartSpec,
+    pre_aggregated: bool = False,
+    category_result: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    if not rows:
+        return {"type": "table", "headers": [], "rows": []}
+
+    if spec.dimension is None:
+        return _raw_table(rows)
+
+    amounts, counts = _measures(rows, pre_aggregated)
+
+    granularity = spec.granularity
+    if spec.dimension == "time" and not pre_aggregated:
+        labels, granularity = _time_labels(rows, granularity)
+    else:
+        dimension = "label" if pre_aggregated else spec.dimension
+        labels = np.array(_dimension_labels(rows, dimension, category_result), dtype=object)
+
+    keys, sums, totals = _group(labels, amounts, counts)
+    values = _values(spec.measure, sums, totals)
+
+    if spec.dimension == "time":
+        # Chronological; np.unique already returns sorted ISO labels
+        order = np.arange(keys.size)
+    else:
+        order = np.argsort(-values, kind="stable")
+
+    keys, values, totals = keys[order], values[order], totals[order]
+
+    if spec.chart_type == "table":
+        # Grouped table: the requested measure plus the other natural one (total or count)
+        if spec.measure == "count":
+            headers, extra = ["Total Amount"], sums[order]
+        else:
+            headers, extra = ["Transactions"], totals
+        rows_out = []
+        for k, v, x in zip(keys[:TABLE_MAX_ROWS], values, extra):
+            rows_out.append([str(k), round(float(v), 2) if spec.measure != "count" else int(v), round(float(x), 2) if spec.measure == "count" else int(x)])
+        return {
+            "type": "table",
+            "headers": [DIMENSION_LABELS[spec.dimension], MEASURE_LABELS[spec.measure]] + headers,
+            "rows": rows_out,
+        }
+
+    data = [{"label": str(k), "value": round(float(v), 2)} for k, v in zip(keys, values)]
+
+    if spec.dimension != "time":
+        data = [d for d in data if d["value"] > 0]
+        if spec.top_n and len(data) > spec.top_n:
+            # Fold the long tail into "Other" (sums and counts only; an average tail is not additive)
+            head, tail = data[: spec.top_n - 1], data[spec.top_n - 1:]
+            data = head
+            if spec.measure != "avg":
+                data.append({"label": "Other", "value": round(sum(d["value"] for d in tail), 2)})
+
+    return {"type": "chart", "chartType": spec.chart_type, "data": data, "granularity": granularity}
+
+
+def describe_series(result: Dict[str, Any], spec: ChartSpec, max_items: int = 12) -> Dict[str, Any]:
+    # Compact facts about the aggregated series; this, not the rows, is what the LLM reads
+    if result.get("type") == "chart":
+        points = result.get("data", [])
+        values = np.array([p["value"] for p in points], dtype=np.float64)
+        # Averages are not additive, so they get no total or shares
+        total = float(values.sum()) if values.size and spec.measure != "avg" else 0.0
+        return {
+            "chart": result.get("chartType"),
+            "dimension": spec.dimension,
+            "measure": spec.measure,
+            "granularity": result.get("granularity"),
+            "points": len(points),
+            "total": round(total, 2) if total else None,
+            "series": [
+                {**p, "share_pct": round(100 * p["value"] / total, 1) if total else None}
+                for p in points[:max_items]
+            ],
+        }
+    return {
+        "table_headers": result.get("headers", []),
+        "table_rows": result.get("rows", [])[:max_items],
+        "row_count": len(result.get("rows", [])),
+    }
+
+
+def fallback_summary(facts: Dict[str, Any]) -> str:
+    series = [p for p in facts.get("series") or [] if p["label"] != "Other"]
+    if not series:
+        count = facts.get("row_count", 0)
+        return f"Showing {count} row{'s' if count != 1 else ''} for your request." if count else "No transactions matched the request."
+    top = max(series, key=lambda p: p["value"])
+    summary = f"The total across {facts['points']} groups is {facts['total']:,.2f}. " if facts.get("total") else ""
+    summary += f"The largest is {top['label']} at {top['value']:,.2f}"
+    if top.get("share_pct") is not None:
+        summary += f" ({top['share_pct']}% of the total)"
+    return summary + "."
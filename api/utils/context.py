@@ -1,3 +1,71 @@
 from contextvars import ContextVar
+from functools import wraps
+from threading import Event
+from typing import Any, Callable, Dict, List
+from utils.metrics import observe_tool
+import time
 
 current_user_id: ContextVar[str | None] = ContextVar("current_user_id", default=None)
+
+# Name of the tool whose code is running; lets shared layers (LLM cache) attribute their work
+current_tool: ContextVar[str | None] = ContextVar("current_tool", default=None)
+
+# Progress callback of a streaming request; None when nobody is listening
+current_event_sink: ContextVar[Callable[[str, Dict[str, Any]], None] | None] = ContextVar("current_event_sink", default=None)
+
+# Durations (ms) of MongoDB commands issued while serving the current request; None outside requests
+current_mongo_timings: ContextVar[List[float] | None] = ContextVar("current_mongo_timings", default=None)
+
+# Tool name -> total duration (ms) of its calls; set by the benchmark to time stages
+# without an event sink, which would switch chart summaries to streaming
+current_tool_timings: ContextVar[Dict[str, float] | None] = ContextVar("current_tool_timings", default=None)
+
+# Set when the client of a streaming request went away; checked between stages so the work stops early
+current_cancel_event: ContextVar[Event | None] = ContextVar("current_cancel_event", default=None)
+
+class RequestCancelled(BaseException):
+    """Raised inside a request's work once its client has disconnected.
+
+    A BaseException, like KeyboardInterrupt, so the tools' `except Exception` error
+    handling cannot turn a cancellation into an error result and keep working.
+    """
+
+def raise_if_cancelled() -> None:
+    cancel = current_cancel_event.get()
+    if cancel is not None and cancel.is_set():
+        raise RequestCancelled("client disconnected")
+
+def has_event_sink() -> bool:
+    return current_event_sink.get() is not None
+
+def emit_event(event: str, data: Dict[str, Any]) -> None:
+    sink = current_event_sink.get()
+    if sink is not None:
+        sink(event, data)
+
+def tool_scope(name: str):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            token = current_tool.set(name)
+            emit_event("tool_start", {"tool": name})
+            started = time.perf_counter()
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = not (isinstance(result, dict) and "error" in result)
+                return result
+            finally:
+                elapsed = time.perf_counter() - started
+                observe_tool(name, ok, elapsed)
+                timings = current_tool_timings.get()
+                if timings is not None:
+                    timings[name] = timings.get(name, 0.0) + elapsed * 1000
+                current_tool.reset(token)
+                emit_event("tool_end", {
+                    "tool": name,
+                    "ok": ok,
+                    "duration_ms": round(elapsed * 1000, 1),
+                })
+        return wrapper
+    return decorator
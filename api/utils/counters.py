@@ -0,0 +1,78 @@
+from threading import Lock
+from typing import Dict, Any
+
+class HitCounter:
+    """Thread-safe hit/miss counter for cache-like fast paths"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+
+    def hit(self, n: int = 1) -> None:
+        with self._lock:
+            self.hits += n
+
+    def miss(self, n: int = 1) -> None:
+        with self._lock:
+            self.misses += n
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else None,
+            }
+
+
+class ValueStats:
+    """Thread-safe running count/sum/min/max of observed values (timings, sizes)"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._values: Dict[str, Dict[str, float]] = {}
+        self._lock = Lock()
+
+    def observe(self, metric: str, value: float) -> None:
+        with self._lock:
+            entry = self._values.setdefault(metric, {"count": 0, "sum": 0.0, "min": value, "max": value})
+            entry["count"] += 1
+            entry["sum"] += value
+            entry["min"] = min(entry["min"], value)
+            entry["max"] = max(entry["max"], value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                metric: {
+                    "count": e["count"],
+                    "mean": round(e["sum"] / e["count"], 4),
+                    "min": round(e["min"], 4),
+                    "max": round(e["max"], 4),
+                }
+                for metric, e in self._values.items()
+            }
+
+
+_counters: Dict[str, Any] = {}
+_registry_lock = Lock()
+
+def get_counter(name: str) -> HitCounter:
+    with _registry_lock:
+        if name not in _counters:
+            _counters[name] = HitCounter(name)
+        return _counters[name]
+
+def get_stats(name: str) -> ValueStats:
+    with _registry_lock:
+        if name not in _counters:
+            _counters[name] = ValueStats(name)
+        return _counters[name]
+
+def counters_snapshot() -> Dict[str, Dict[str, Any]]:
+    with _registry_lock:
+        counters = list(_counters.values())
+    return {c.name: c.snapshot() for c in counters}
@@ -0,0 +1,14 @@
+from utils.redis_utils import redis_client
+
+# Per-user data version. Cache keys derived from a user's transactions embed this
+# number, so bumping it on any write makes every stale entry unreachable at once.
+
+def _version_key(user_id: str) -> str:
+    return f"dataver:{user_id}"
+
+def get_data_version(user_id: str) -> int:
+    value = redis_client.get_data(_version_key(user_id))
+    return int(value) if value else 0
+
+def bump_data_version(user_id: str) -> int:
+    return redis_client.incr(_version_key(user_id))
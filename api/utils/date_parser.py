@@ -0,0 +1,198 @@
+import re
+import calendar
+from datetime import date, timedelta
+from typing import NamedTuple, Optional, List, Tuple, Callable
+
+# Deterministic parser for common date expressions ("last 30 days", "this month",
+# "Q2 2024", "March", "2024", "2024-01-01 to 2024-03-31", "since last month"). It only
+# answers when exactly one expression is found; anything else is left to the LLM.
+
+class DateRange(NamedTuple):
+    start: date
+    end: date
+    matched: str
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+}
+
+MONTHS = {
+    "january": 1, "jan": 1, "february": 2, "feb": 2, "march": 3, "mar": 3, "april": 4, "apr": 4,
+    "may": 5, "june": 6, "jun": 6, "july": 7, "jul": 7, "august": 8, "aug": 8,
+    "september": 9, "sept": 9, "sep": 9, "october": 10, "oct": 10, "november": 11, "nov": 11,
+    "december": 12, "dec": 12,
+}
+
+_NUM = r"(\d{1,3}|" + "|".join(NUMBER_WORDS) + r")"
+_UNIT = r"(day|week|month|quarter|year)s?"
+_MONTH = r"(" + "|".join(sorted(MONTHS, key=len, reverse=True)) + r")"
+_YEAR = r"((?:19|20)\d{2})"
+_ISO = r"(\d{4}-\d{2}-\d{2})"
+# A bare number after these words is an amount ("over 2000"), not a year
+_NOT_AMOUNT = r"(?<![\d.,₹$])(?<!over )(?<!above )(?<!under )(?<!below )(?<!than )(?<!rs )(?<!rs\. )(?<!inr )(?<!usd )"
+# Words left of the masked match; since/after open the range up to today,
+# before/until have no start, so they are left to the LLM
+_OPEN_RANGE = re.compile(r"\b(since|from|after|before|until|till)\s+$")
+_CALENDAR_UNITS = ("month", "quarter", "year")
+
+
+def _add_months(d: date, months: int) -> date:
+    month_index = d.year * 12 + (d.month - 1) + months
+    year, month = divmod(month_index, 12)
+    day = min(d.day, calendar.monthrange(year, month + 1)[1])
+    return date(year, month + 1, day)
+
+def _month_bounds(year: int, month: int) -> Tuple[date, date]:
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+def _quarter_bounds(year: int, quarter: int) -> Tuple[date, date]:
+    start = date(year, 3 * (quarter - 1) + 1, 1)
+    return start, _add_months(start, 3) - timedelta(days=1)
+
+def _period_start(today: date, unit: str) -> date:
+    if unit == "day":
+        return today
+    if unit == "week":
+        return today - timedelta(days=today.weekday())
+    if unit == "month":
+        return today.replace(day=1)
+    if unit == "quarter":
+        return _quarter_bounds(today.year, (today.month - 1) // 3 + 1)[0]
+    return today.replace(month=1, day=1)
+
+def _shift(d: date, unit: str, n: int) -> date:
+    if unit == "day":
+        return d - timedelta(days=n)
+    if unit == "week":
+        return d - timedelta(weeks=n)
+    if unit == "month":
+        return _add_months(d, -n)
+    if unit == "quarter":
+        return _add_months(d, -3 * n)
+    return _add_months(d, -12 * n)
+
+def _to_number(token: str) -> int:
+    return NUMBER_WORDS[token] if token in NUMBER_WORDS else int(token)
+
+def _latest_month(today: date, month: int) -> int:
+    # A bare month name means its most recent occurrence
+    return today.year if month <= today.month else today.year - 1
+
+
+def _explicit_range(m, today):
+    start, end = date.fromisoformat(m.group(1)), date.fromisoformat(m.group(2))
+    return (start, end) if start <= end else None
+
+def _iso_day(m, today):
+    day = date.fromisoformat(m.group(1))
+    return day, day
+
+def _rolling(m, today):
+    # Days and weeks roll: "last 30 days" is today and the 29 days before it.
+    # Months, quarters and years are calendar periods counting the current one, so
+    # "last 6 months" starts on the 1st five months back and matches the monthly rollups.
+    n, unit = _to_number(m.group(1)), m.group(2)
+    if unit in _CALENDAR_UNITS:
+        return _shift(_period_start(today, unit), unit, n - 1), today
+    return _shift(today, unit, n) + timedelta(days=1), today
+
+def _previous_period(m, today):
+    unit = m.group(1)
+    if unit == "day":
+        return today - timedelta(days=1), today - timedelta(days=1)
+    start = _shift(_period_start(today, unit), unit, 1)
+    return start, _period_start(today, unit) - timedelta(days=1)
+
+def _past_period(m, today):
+    return _shift(today, m.group(1), 1) + timedelta(days=1), today
+
+def _current_period(m, today):
+    return _period_start(today, m.group(1)), today
+
+def _to_date(m, today):
+    token = m.group(1) or m.group(2)
+    unit = {"ytd": "year", "mtd": "month"}.get(token, token)
+    return _period_start(today, unit), today
+
+def _quarter(m, today):
+    quarter = int(m.group(1))
+    year = int(m.group(2)) if m.group(2) else today.year
+    return _quarter_bounds(year, quarter)
+
+def _month_year(m, today):
+    return _month_bounds(int(m.group(2)), MONTHS[m.group(1)])
+
+def _bare_month(m, today):
+    month = MONTHS[m.group(1)]
+    return _month_bounds(_latest_month(today, month), month)
+
+def _year(m, today):
+    year = int(m.group(1))
+    return date(year, 1, 1), date(year, 12, 31)
+
+def _today(m, today):
+    return today, today
+
+def _yesterday(m, today):
+    return today - timedelta(days=1), today - timedelta(days=1)
+
+
+# Ordered most specific first; matched text is masked so later rules cannot re-read it
+RULES: List[Tuple[re.Pattern, Callable]] = [
+    (re.compile(rf"\b(?:from|between)?\s*{_ISO}\s*(?:to|and|-|until|till)\s*{_ISO}\b"), _explicit_range),
+    (re.compile(rf"\b{_ISO}\b"), _iso_day),
+    (re.compile(rf"\b(?:last|past|previous)\s+{_NUM}\s+{_UNIT}\b"), _rolling),
+    (re.compile(rf"\b(?:last|previous)\s+(day|week|month|quarter|year)\b"), _previous_period),
+    (re.compile(rf"\bpast\s+(day|week|month|quarter|year)\b"), _past_period),
+    (re.compile(rf"\b(?:this|current)\s+(week|month|quarter|year)\b"), _current_period),
+    (re.compile(r"\b(year|month)[\s-]to[\s-]date\b|\b(ytd|mtd)\b"), _to_date),
+    (re.compile(rf"\bq([1-4])(?:\s+{_YEAR})?\b"), _quarter),
+    (re.compile(rf"\b{_MONTH}\s*,?\s*{_YEAR}\b"), _month_year),
+    (re.compile(rf"(?:\b(?:in|for|during|of)\s+|(?<=since |after |until )|(?<=from |till )|(?<=before )){_MONTH}\b"), _bare_month),
+    (re.compile(rf"{_NOT_AMOUNT}\b{_YEAR}\b(?![.,]?\d)"), _year),
+    (re.compile(r"\btoday\b"), _today),
+    (re.compile(r"\byesterday\b"), _yesterday),
+]
+
+
+def _open_range(prefix: str, bounds: Tuple[date, date], today: date) -> Optional[Tuple[date, date]]:
+    qualifier = _OPEN_RANGE.search(prefix)
+    if not qualifier:
+        return bounds
+    if qualifier.group(1) in ("since", "from"):
+        start = bounds[0]
+    elif qualifier.group(1) == "after":
+        start = bounds[1] + timedelta(days=1)
+    else:
+        return None
+    return (start, today) if start <= today else None
+
+
+def parse_date_range(query: str, today: Optional[date] = None) -> Optional[DateRange]:
+    if not query:
+        return None
+
+    today = today or date.today()
+    text = query.lower()
+    found: List[DateRange] = []
+
+    for pattern, resolve in RULES:
+        for m in pattern.finditer(text):
+            try:
+                bounds = resolve(m, today)
+            except ValueError:
+                # e.g. "2024-02-31" or "Q3 1899": leave it to the LLM
+                return None
+            if not bounds:
+                return None
+            bounds = _open_range(text[:m.start()], bounds, today)
+            if not bounds:
+                return None
+            found.append(DateRange(bounds[0], bounds[1], query[m.start():m.end()].strip()))
+            text = text[:m.start()] + " " * (m.end() - m.start()) + text[m.end():]
+
+    # Zero or several expressions ("January vs February") are not confident answers
+    if len(found) != 1:
+        return None
+    return found[0]
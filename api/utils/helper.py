@@ -1,6 +1,7 @@
 from typing import Dict, Any, List, Union, Optional
 import hashlib, json
 from utils.redis_utils import redis_client
+from utils.payload_codec import encode_payload, decode_payload
 from datetime import datetime, timezone
 from bson import ObjectId, Decimal128
 import math
@@ -14,11 +15,19 @@ def _make_handle(query_filter: Dict[str, Any], projection: Dict[str, int], now_i
     m.update(now_iso.encode("utf-8"))
     return "mq:" + m.hexdigest()[:24]
 
-def _load_data_from_handle(handle: str) -> List[Dict[str, Any]]:
-    cached = redis_client.get_data(handle)
+def _store_handle_payload(handle: str, payload: Dict[str, Any]) -> int:
+    blob = encode_payload(payload)
+    redis_client.set_bytes(handle, blob)
+    return len(blob)
+
+def _load_payload_from_handle(handle: str) -> Dict[str, Any]:
+    cached = redis_client.get_bytes(handle)
     if not cached:
         raise ValueError(f"Handle not found or expired: {handle}")
-    payload = json.loads(cached)
+    return decode_payload(cached)
+
+def _load_data_from_handle(handle: str) -> List[Dict[str, Any]]:
+    payload = _load_payload_from_handle(handle)
     return payload.get("data", [])
 
 def _clean_for_json(doc: Dict[str, Any]) -> Dict[str, Any]:
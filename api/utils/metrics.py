@@ -0,0 +1,176 @@
+from typing import Any, Callable, Dict, Optional
+from threading import Lock
+from functools import wraps
+from utils.logger import setup_logger
+import time
+
+try:
+    from prometheus_client import Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+except ImportError:  # optional: without it the helpers below are no-ops and /metrics reports 503
+    Histogram = None
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+from langchain_core.callbacks import BaseCallbackHandler
+from pymongo import monitoring
+
+logger = setup_logger(__name__)
+
+METRICS_ENABLED = Histogram is not None
+
+# Latency buckets (seconds) spanning sub-millisecond Redis calls to multi-second LLM turns
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+if METRICS_ENABLED:
+    REQUEST_LATENCY = Histogram(
+        "http_request_duration_seconds", "HTTP request latency by route",
+        ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+    )
+    REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+    TOOL_LATENCY = Histogram(
+        "tool_duration_seconds", "Agent tool execution time by tool",
+        ["tool", "status"], buckets=LATENCY_BUCKETS,
+    )
+    LLM_LATENCY = Histogram(
+        "llm_request_duration_seconds", "LLM call latency by calling tool",
+        ["tool", "model"], buckets=LATENCY_BUCKETS,
+    )
+    # The _sum series gives total tokens per tool
+    LLM_TOKENS = Histogram(
+        "llm_tokens", "Tokens per LLM call by calling tool",
+        ["tool", "kind"], buckets=TOKEN_BUCKETS,
+    )
+    MONGO_LATENCY = Histogram(
+        "mongo_command_duration_seconds", "MongoDB command time by command",
+        ["command", "status"], buckets=LATENCY_BUCKETS,
+    )
+    REDIS_LATENCY = Histogram(
+        "redis_operation_duration_seconds", "Redis operation time by RedisClient method",
+        ["operation"], buckets=LATENCY_BUCKETS,
+    )
+    MEMORY_SESSIONS = Gauge("conversation_memory_sessions", "Conversation sessions held in memory")
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    if METRICS_ENABLED:
+        REQUEST_LATENCY.labels(method, route, str(status)).observe(seconds)
+
+def request_started() -> None:
+    if METRICS_ENABLED:
+        REQUESTS_IN_FLIGHT.inc()
+
+def request_finished() -> None:
+    if METRICS_ENABLED:
+        REQUESTS_IN_FLIGHT.dec()
+
+def observe_tool(tool: str, ok: bool, seconds: float) -> None:
+    if METRICS_ENABLED:
+        TOOL_LATENCY.labels(tool, "ok" if ok else "error").observe(seconds)
+
+def observe_redis(operation: str, seconds: float) -> None:
+    if METRICS_ENABLED:
+        REDIS_LATENCY.labels(operation).observe(seconds)
+
+def track_memory_sessions(count: Callable[[], int]) -> None:
+    if not METRICS_ENABLED:
+        return
+
+    def _safe_count() -> float:
+        # Scrapes must not fail because Redis is briefly unavailable
+        try:
+            return float(count())
+        except Exception:
+            return 0.0
+
+    MEMORY_SESSIONS.set_function(_safe_count)
+
+def render_metrics() -> Optional[bytes]:
+    return generate_latest() if METRICS_ENABLED else None
+
+
+def redis_timed(fn):
+    # RedisClient method decorator: one histogram series per method name
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            observe_redis(fn.__name__, time.perf_counter() - started)
+    return wrapper
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """LangChain callback recording latency and token usage per LLM call, labelled by calling tool"""
+
+    def __init__(self):
+        self._started: Dict[Any, tuple] = {}
+        self._lock = Lock()
+
+    def _start(self, run_id, serialized) -> None:
+        # Imported here: utils.context imports this module for tool timing
+        from utils.context import current_tool
+        params = (serialized or {}).get("kwargs") or {}
+        model = params.get("model") or params.get("model_name") or "unknown"
+        with self._lock:
+            self._started[run_id] = (time.perf_counter(), current_tool.get() or "agent", model)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs) -> None:
+        self._start(run_id, serialized)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs) -> None:
+        self._start(run_id, serialized)
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        with self._lock:
+            started = self._started.pop(run_id, None)
+        if not started or not METRICS_ENABLED:
+            return
+        began, tool, model = started
+        LLM_LATENCY.labels(tool, model).observe(time.perf_counter() - began)
+
+        usage = _token_usage(response)
+        for kind in ("input", "output"):
+            if usage.get(kind):
+                LLM_TOKENS.labels(tool, kind).observe(usage[kind])
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        with self._lock:
+            self._started.pop(run_id, None)
+
+
+def _token_usage(response) -> Dict[str, int]:
+    # Chat models report usage_metadata on the message; older integrations use llm_output
+    for generations in response.generations or []:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return {"input": usage.get("input_tokens", 0), "output": usage.get("output_tokens", 0)}
+    token_usage = (response.llm_output or {}).get("token_usage") or {}
+    return {"input": token_usage.get("prompt_tokens", 0), "output": token_usage.get("completion_tokens", 0)}
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener recording server-side command time"""
+
+    def started(self, event) -> None:
+        pass
+
+    def _record(self, event, status: str) -> None:
+        # Listeners run on the thread that issued the command, so the request's context is visible
+        from utils.context import current_mongo_timings
+        timings = current_mongo_timings.get()
+        if timings is not None:
+            timings.append(event.duration_micros / 1000)
+        if METRICS_ENABLED:
+            MONGO_LATENCY.labels(event.command_name, status).observe(event.duration_micros / 1e6)
+
+    def succeeded(self, event) -> None:
+        self._record(event, "ok")
+
+    def failed(self, event) -> None:
+        self._record(event, "error")
+
+
+llm_metrics_callback = LLMMetricsCallback()
+mongo_command_metrics = MongoCommandMetrics()
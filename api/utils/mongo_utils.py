@@ -12,4 +12,14 @@ def serialize(doc):
         return {k: serialize(v) for k, v in doc.items()}
     if isinstance(doc, list):
         return [serialize(v) for v in doc]
-    return doc
\ No newline at end of file
+    return doc
+
+def json_default(value):
+    # json.dumps hook: converts BSON scalars while encoding, without a separate serialize pass
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return float(value.to_decimal())
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
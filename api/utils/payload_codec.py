@@ -0,0 +1,116 @@
+import json
+import struct
+import time
+from typing import Dict, Any, List
+from config.settings import settings
+from utils.counters import get_stats
+from utils.logger import setup_logger
+
+try:
+    import msgpack
+except ImportError:  # optional: only needed for the msgpack codecs
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for the zstd codecs
+    zstandard = None
+
+logger = setup_logger(__name__)
+
+# Handle payload encoding: b"FAP" | format version (1 byte) | codec id (1 byte) | body.
+# Rows are stored columnar (one key list + one value list per column), so field names
+# are written once per payload instead of once per row. Blobs without the magic
+# prefix are legacy plain-JSON payloads.
+
+MAGIC = b"FAP"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("!3sBB")
+
+CODECS = {
+    "json": 0,
+    "msgpack": 1,
+    "zstd": 2,
+    "msgpack+zstd": 3,
+}
+CODEC_NAMES = {v: k for k, v in CODECS.items()}
+
+codec_stats = get_stats("handle_codec")
+
+
+def _to_columnar(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    columns: List[str] = []
+    for row in rows:
+        for key in row:
+            if key not in columns:
+                columns.append(key)
+    return {
+        "columns": columns,
+        "values": [[row.get(c) for row in rows] for c in columns],
+        "length": len(rows),
+    }
+
+
+def _from_columnar(table: Dict[str, Any]) -> List[Dict[str, Any]]:
+    columns = table["columns"]
+    return [dict(zip(columns, values)) for values in zip(*table["values"])] if columns else [{} for _ in range(table["length"])]
+
+
+def _require(module, codec: str):
+    if module is None:
+        raise RuntimeError(f"Handle codec '{codec}' needs a package that is not installed")
+    return module
+
+
+def encode_payload(payload: Dict[str, Any], codec: str = None) -> bytes:
+    codec = codec or settings.HANDLE_CODEC
+    if codec not in CODECS:
+        raise ValueError(f"Unknown handle codec '{codec}'. Use one of: {sorted(CODECS)}")
+
+    started = time.perf_counter()
+    body = {**payload, "data": _to_columnar(payload.get("data") or [])}
+
+    if codec.startswith("msgpack"):
+        raw = _require(msgpack, codec).packb(body, use_bin_type=True)
+    else:
+        raw = json.dumps(body, separators=(",", ":")).encode("utf-8")
+
+    if codec.endswith("zstd"):
+        raw = _require(zstandard, codec).ZstdCompressor(level=settings.HANDLE_ZSTD_LEVEL).compress(raw)
+
+    blob = HEADER.pack(MAGIC, FORMAT_VERSION, CODECS[codec]) + raw
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    codec_stats.observe(f"{codec}.encode_ms", elapsed_ms)
+    codec_stats.observe(f"{codec}.bytes", len(blob))
+    logger.info(f"Encoded handle payload with {codec}: {len(payload.get('data') or [])} rows, {len(blob)} bytes in {elapsed_ms:.2f}ms")
+    return blob
+
+
+def decode_payload(blob) -> Dict[str, Any]:
+    if isinstance(blob, str):
+        blob = blob.encode("utf-8")
+
+    if not blob.startswith(MAGIC):
+        return json.loads(blob)
+
+    started = time.perf_counter()
+    _, version, codec_id = HEADER.unpack_from(blob)
+    if version != FORMAT_VERSION or codec_id not in CODEC_NAMES:
+        raise ValueError(f"Unsupported handle payload format v{version}/codec {codec_id}")
+
+    codec = CODEC_NAMES[codec_id]
+    raw = blob[HEADER.size:]
+
+    if codec.endswith("zstd"):
+        raw = _require(zstandard, codec).ZstdDecompressor().decompress(raw)
+
+    if codec.startswith("msgpack"):
+        body = _require(msgpack, codec).unpackb(raw, raw=False)
+    else:
+        body = json.loads(raw)
+
+    body["data"] = _from_columnar(body["data"])
+
+    codec_stats.observe(f"{codec}.decode_ms", (time.perf_counter() - started) * 1000)
+    return body
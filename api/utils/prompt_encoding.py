@@ -0,0 +1,146 @@
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional
+from utils.logger import setup_logger
+from utils.tokens import count_tokens
+from utils.counters import get_stats
+from config.settings import settings
+import itertools, json, re
+
+logger = setup_logger(__name__)
+
+# Compact text encoding for data embedded in LLM prompts. Lists of rows become one header
+# line plus "|"-separated value lines, strings repeated anywhere in a table are replaced by
+# #n references to a shared dictionary, and ISO timestamps are cut to what the question needs.
+
+encoding_stats = get_stats("prompt_encoding")
+
+# Counting tokens costs two tokenizer passes per prompt, so only every Nth encoding is measured
+_encode_calls = itertools.count()
+
+Precision = Literal["date", "minute", "full"]
+
+ISO_TIMESTAMP = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}")
+
+# Objectives that care about the time of day keep minutes on timestamps
+TIME_OF_DAY_PATTERN = re.compile(r"\bhours?\b|\bhourly\b|\btime of day\b|\bmorning\b|\bevening\b|\bnight\b|\blate\b|\bweekend\b")
+
+# Reading instructions prepended to prompts that embed encoded data
+PROMPT_DATA_NOTE = (
+    "Data format: tables are a header line of column names followed by '|'-separated rows; "
+    "#n stands for entry n on the 'strings:' line."
+)
+
+# Short strings are often a single token, cheaper inline than as a "#n" reference
+DICT_MIN_LENGTH = 6
+
+
+def timestamp_precision(objective: Optional[str]) -> Precision:
+    return "minute" if objective and TIME_OF_DAY_PATTERN.search(objective.lower()) else "date"
+
+
+def _flatten(row: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for key, value in row.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            out.update(_flatten(value, f"{name}."))
+        else:
+            out[name] = value
+    return out
+
+
+def _scalar(value: Any, precision: Precision) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float):
+        # Two decimals at most, never rounded to significant digits or exponent form:
+        # the prompts tell the model to repeat these numbers exactly
+        text = f"{value:.2f}".rstrip("0").rstrip(".")
+        return "0" if text == "-0" else text
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    if isinstance(value, str):
+        if precision != "full" and ISO_TIMESTAMP.match(value):
+            return value[:10] if precision == "date" else value[:16].replace("T", " ")
+        return value.replace("|", "/").replace("\n", " ")
+    if isinstance(value, (list, tuple)):
+        return ",".join(_scalar(v, precision) for v in value)
+    return str(value)
+
+
+def encode_rows(rows: List[Dict[str, Any]], precision: Precision = "date") -> str:
+    if not rows:
+        return "(no rows)"
+
+    flat = [_flatten(r) for r in rows]
+    columns: List[str] = []
+    for r in flat:
+        for key in r:
+            if key not in columns:
+                columns.append(key)
+
+    cells = [[_scalar(r.get(c), precision) for c in columns] for r in flat]
+
+    # Dictionary-encode strings that repeat anywhere in the table
+    counts = Counter(v for row in cells for v in row if len(v) >= DICT_MIN_LENGTH and not _is_number(v))
+    dictionary = [v for v, n in counts.most_common() if n > 1]
+    refs = {v: f"#{i}" for i, v in enumerate(dictionary)}
+
+    lines = []
+    if dictionary:
+        lines.append("strings: " + "; ".join(f"#{i}={v}" for i, v in enumerate(dictionary)))
+    lines.append(" | ".join(columns))
+    lines.extend(" | ".join(refs.get(v, v) for v in row) for row in cells)
+    return "\n".join(lines)
+
+
+def _is_number(text: str) -> bool:
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+def _encode_value(value: Any, precision: Precision, indent: str) -> str:
+    if isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+        return "\n" + "\n".join(indent + line for line in encode_rows(value, precision).splitlines())
+    if isinstance(value, list) and value and all(isinstance(v, list) for v in value):
+        return "\n" + "\n".join(indent + " | ".join(_scalar(c, precision) for c in row) for row in value)
+    if isinstance(value, dict):
+        if all(not isinstance(v, (dict, list)) for v in value.values()):
+            return " " + ", ".join(f"{k}={_scalar(v, precision)}" for k, v in value.items())
+        return "\n" + encode_object(value, precision, indent)
+    return " " + _scalar(value, precision)
+
+
+def encode_object(obj: Dict[str, Any], precision: Precision = "date", indent: str = "") -> str:
+    # Sections per key; empty values are left out entirely
+    lines = []
+    for key, value in obj.items():
+        if value is None or value == [] or value == {}:
+            continue
+        lines.append(f"{indent}{key}:{_encode_value(value, precision, indent + '  ')}")
+    return "\n".join(lines)
+
+
+def encode_for_prompt(obj: Any, label: str, precision: Precision = "date") -> str:
+    # Encodes rows or a nested object; a sample of calls records the token saving against plain JSON
+    encoded = encode_rows(obj, precision) if isinstance(obj, list) else encode_object(obj, precision)
+
+    rate = settings.PROMPT_STATS_SAMPLE_RATE
+    if rate <= 0 or next(_encode_calls) % rate:
+        return encoded
+
+    before = count_tokens(json.dumps(obj, ensure_ascii=False, default=str))
+    after = count_tokens(encoded)
+    saved_pct = round(100 * (before - after) / before, 1) if before else 0.0
+
+    encoding_stats.observe(f"{label}.json_tokens", before)
+    encoding_stats.observe(f"{label}.encoded_tokens", after)
+    encoding_stats.observe(f"{label}.saved_pct", saved_pct)
+    logger.info(f"Prompt data for {label}: {before} -> {after} tokens ({saved_pct}% fewer)")
+    return encoded
@@ -1,5 +1,6 @@
 import redis
 from config.settings import settings
+from utils.metrics import redis_timed
 
 class RedisClient:
     def __init__(self):
@@ -10,23 +11,123 @@ class RedisClient:
             password=settings.REDIS_PASSWORD,
             decode_responses=True
         )
+        # Binary payloads (compressed handle data) need undecoded responses
+        self.raw = redis.Redis(
+            host= settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            password=settings.REDIS_PASSWORD,
+            decode_responses=False
+        )
         self.default_ttl = int(settings.REDIS_TTL)
         self.namespace = settings.REDIS_NAMESPACE 
 
     def _namespaced_key(self, key: str) -> str:
         return f"{self.namespace}:{key}"
 
+    @redis_timed
     def set_data(self, key: str, value, ttl: int = None):
         namespaced_key = self._namespaced_key(key)
         ttl = ttl or self.default_ttl
         self.redis.setex(namespaced_key, ttl, value)
 
+    @redis_timed
     def get_data(self, key: str):
         namespaced_key = self._namespaced_key(key)
         return self.redis.get(namespaced_key)
 
+    @redis_timed
+    def set_bytes(self, key: str, value: bytes, ttl: int = None):
+        namespaced_key = self._namespaced_key(key)
+        ttl = ttl or self.default_ttl
+        self.raw.setex(namespaced_key, ttl, value)
+
+    @redis_timed
+    def get_bytes(self, key: str):
+        namespaced_key = self._namespaced_key(key)
+        return self.raw.get(namespaced_key)
+
+    @redis_timed
+    def set_if_absent(self, key: str, value, ttl: int = None) -> bool:
+        namespaced_key = self._namespaced_key(key)
+        ttl = ttl or self.default_ttl
+        return bool(self.redis.set(namespaced_key, value, ex=ttl, nx=True))
+
+    @redis_timed
     def exists(self, key: str) -> bool:
         namespaced_key = self._namespaced_key(key)
         return self.redis.exists(namespaced_key) > 0
 
+    @redis_timed
+    def incr(self, key: str) -> int:
+        namespaced_key = self._namespaced_key(key)
+        return self.redis.incr(namespaced_key)
+
+    @redis_timed
+    def get_hash_fields(self, key: str, fields: list) -> list:
+        namespaced_key = self._namespaced_key(key)
+        return self.redis.hmget(namespaced_key, fields) if fields else []
+
+    @redis_timed
+    def set_hash_fields(self, key: str, mapping: dict) -> None:
+        # Hashes are long-lived lookup tables, so no TTL is applied
+        namespaced_key = self._namespaced_key(key)
+        if mapping:
+            self.redis.hset(namespaced_key, mapping=mapping)
+
+    @redis_timed
+    def delete(self, key: str) -> None:
+        namespaced_key = self._namespaced_key(key)
+        self.redis.delete(namespaced_key)
+
+    @redis_timed
+    def delete_many(self, keys: list) -> None:
+        if keys:
+            self.redis.delete(*[self._namespaced_key(k) for k in keys])
+
+    @redis_timed
+    def append_capped_list(self, key: str, value: str, max_len: int, ttl: int = None) -> None:
+        # RPUSH + LTRIM + EXPIRE in one round trip; only the newest max_len items are kept
+        namespaced_key = self._namespaced_key(key)
+        pipe = self.redis.pipeline()
+        pipe.rpush(namespaced_key, value)
+        pipe.ltrim(namespaced_key, -max_len, -1)
+        pipe.expire(namespaced_key, ttl or self.default_ttl)
+        pipe.execute()
+
+    @redis_timed
+    def get_list(self, key: str, ttl: int = None) -> list:
+        # Reading a list also extends its TTL when one is given
+        namespaced_key = self._namespaced_key(key)
+        pipe = self.redis.pipeline()
+        pipe.lrange(namespaced_key, 0, -1)
+        if ttl:
+            pipe.expire(namespaced_key, ttl)
+        return pipe.execute()[0]
+
+    @redis_timed
+    def list_length(self, key: str) -> int:
+        return self.redis.llen(self._namespaced_key(key))
+
+    @redis_timed
+    def touch_member(self, key: str, member: str, score: float) -> None:
+        self.redis.zadd(self._namespaced_key(key), {member: score})
+
+    @redis_timed
+    def remove_members(self, key: str, members: list) -> None:
+        if members:
+            self.redis.zrem(self._namespaced_key(key), *members)
+
+    @redis_timed
+    def count_members(self, key: str) -> int:
+        return self.redis.zcard(self._namespaced_key(key))
+
+    @redis_timed
+    def members_below(self, key: str, max_score: float, limit: int = None) -> list:
+        # Lowest-scored members first, e.g. least recently used sessions
+        namespaced_key = self._namespaced_key(key)
+        if limit is None:
+            return self.redis.zrangebyscore(namespaced_key, "-inf", max_score)
+        return self.redis.zrangebyscore(namespaced_key, "-inf", max_score, start=0, num=limit)
+
 redis_client = RedisClient()
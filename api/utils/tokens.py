@@ -0,0 +1,38 @@
+from functools import lru_cache
+from typing import Any, Iterable
+from utils.logger import setup_logger
+import math
+
+logger = setup_logger(__name__)
+
+# gpt-4o-mini tokenizer; other providers only need a consistent estimate for budgeting
+ENCODING_NAME = "o200k_base"
+
+# Fallback when the tokenizer cannot be loaded (e.g. no network to fetch the BPE file)
+CHARS_PER_TOKEN = 4
+
+# Per-message overhead of the chat format (role and separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(ENCODING_NAME)
+    except Exception as e:
+        logger.warning(f"Tokenizer '{ENCODING_NAME}' unavailable, estimating tokens from length: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+
+def count_message_tokens(messages: Iterable[Any]) -> int:
+    return sum(count_tokens(str(getattr(m, "content", m))) + MESSAGE_OVERHEAD_TOKENS for m in messages)
@@ -0,0 +1,83 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from itertools import combinations
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+import contextvars, time
+from config.settings import settings
+from utils.logger import setup_logger
+from utils.counters import get_stats
+
+logger = setup_logger(__name__)
+
+tool_executor = ThreadPoolExecutor(max_workers=settings.TOOL_WORKERS, thread_name_prefix="tools")
+
+# Pool run_concurrently submits to when set; background work brings its own so it never
+# takes tool_executor threads from live requests
+current_tool_executor: ContextVar[ThreadPoolExecutor | None] = ContextVar("current_tool_executor", default=None)
+
+concurrency_stats = get_stats("tool_concurrency")
+
+class ToolCall(NamedTuple):
+    name: str
+    fn: Callable[..., Any]
+    args: Tuple[Any, ...] = ()
+
+
+def _timed_call(fn: Callable[..., Any], args: Tuple[Any, ...]) -> Tuple[Any, Any, float, float]:
+    started = time.perf_counter()
+    try:
+        return fn(*args), None, started, time.perf_counter()
+    except Exception as e:
+        return None, e, started, time.perf_counter()
+
+
+def run_concurrently(calls: List[ToolCall]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    # Runs independent tool calls at once and reports which overlapped and the time saved.
+    # Returns ({name: result}, report); re-raises the first failure after every call finished.
+    started = time.perf_counter()
+    executor = current_tool_executor.get() or tool_executor
+
+    futures = {}
+    for call in calls[:-1]:
+        # Workers start with an empty context; run each in a copy of the caller's so
+        # ContextVars such as current_user_id are visible to the tool
+        ctx = contextvars.copy_context()
+        futures[call.name] = executor.submit(ctx.run, _timed_call, call.fn, call.args)
+
+    # The last call runs on the calling thread instead of idling while it waits
+    outcomes = {}
+    if calls:
+        outcomes[calls[-1].name] = _timed_call(calls[-1].fn, calls[-1].args)
+    for name, future in futures.items():
+        outcomes[name] = future.result()
+
+    wall_ms = (time.perf_counter() - started) * 1000
+    spans = {
+        call.name: ((outcomes[call.name][2] - started) * 1000, (outcomes[call.name][3] - started) * 1000)
+        for call in calls
+    }
+    durations = {name: end - start for name, (start, end) in spans.items()}
+    serial_ms = sum(durations.values())
+
+    report = {
+        "calls": [call.name for call in calls],
+        "durations_ms": {name: round(ms, 1) for name, ms in durations.items()},
+        "overlapped": [
+            [a, b] for a, b in combinations(spans, 2)
+            if spans[a][0] < spans[b][1] and spans[b][0] < spans[a][1]
+        ],
+        "wall_ms": round(wall_ms, 1),
+        "serial_ms": round(serial_ms, 1),
+        "saved_ms": round(max(serial_ms - wall_ms, 0.0), 1),
+    }
+
+    concurrency_stats.observe("wall_ms", wall_ms)
+    concurrency_stats.observe("saved_ms", report["saved_ms"])
+    logger.info(f"Ran {report['calls']} concurrently in {report['wall_ms']}ms, saved {report['saved_ms']}ms (overlapped: {report['overlapped']})")
+
+    for call in calls:
+        error = outcomes[call.name][1]
+        if error is not None:
+            raise error
+
+    return {name: outcome[0] for name, outcome in outcomes.items()}, report
@@ -13,6 +13,40 @@ const api = {
 
   post: (url, data = {}, config = {}) =>
     apiClient.post(url, data, config),
+
+  // POST a JSON body and call onEvent(event, data) for every Server-Sent Event in the response
+  stream: async (url, data = {}, onEvent) => {
+    const resp = await fetch(`${apiClient.defaults.baseURL}${url}`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(data),
+    });
+    if (!resp.ok) {
+      throw new Error(`Request failed with status code ${resp.status}`);
+    }
+
+    const reader = resp.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      const frames = buffer.split("\n\n");
+      buffer = frames.pop();
+      for (const frame of frames) {
+        let event = "message";
+        let payload = "";
+        for (const line of frame.split("\n")) {
+          if (line.startsWith("event: ")) event = line.slice(7);
+          else if (line.startsWith("data: ")) payload += line.slice(6);
+        }
+        if (payload) onEvent(event, JSON.parse(payload));
+      }
+    }
+  },
 };
 
 export default api;
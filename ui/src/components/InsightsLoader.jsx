@@ -1,7 +1,7 @@
 import React from "react";
 import { Box, CircularProgress, Typography, Paper } from "@mui/material";
 
-const InsightsLoader = ({ query }) => {
+const InsightsLoader = ({ query, step }) => {
   return (
     <Box
       sx={{
@@ -24,6 +24,11 @@ const InsightsLoader = ({ query }) => {
       <Typography variant="h6" sx={{ mt: 2, fontWeight: 500 }}>
         Processing your query...
       </Typography>
+      {step && (
+        <Typography variant="body2" color="text.secondary" sx={{ mt: 1 }}>
+          Running {step.replaceAll("_", " ")}
+        </Typography>
+      )}
       <Typography
         variant="body1"
         color="text.secondary"
@@ -1,12 +1,27 @@
-import React, { createContext, useContext, useState } from "react";
+import React, { createContext, useCallback, useContext, useState } from "react";
+import api from "../api";
 
 const UserContext = createContext(undefined);
 
+const WARMUP_URI = "/insights/warmup";
+
 export const UserProvider = ({ children }) => {
-  const [user, setUser] = useState(null);
+  const [user, setCurrentUser] = useState(null);
+  const [suggestedQueries, setSuggestedQueries] = useState([]);
+
+  const setUser = useCallback((nextUser) => {
+    setCurrentUser(nextUser);
+    if (!nextUser?._id) return;
+
+    // Fire and forget: the API answers the standard questions in the background
+    api
+      .post(WARMUP_URI, { userId: nextUser._id })
+      .then((resp) => setSuggestedQueries(resp.data.data.queries || []))
+      .catch((e) => console.warn("Insight warm-up failed", e));
+  }, []);
 
   return (
-    <UserContext.Provider value={{ user, setUser }}>
+    <UserContext.Provider value={{ user, setUser, suggestedQueries }}>
       {children}
     </UserContext.Provider>
   );
@@ -7,7 +7,8 @@ import InsightsLoader from "../../components/InsightsLoader";
 import { MOCK_DATA } from "../../mock/dataSelector";
 
 function InsightsHub() {
-  const { fetchInsights, insightsData, insightsLoading } = useInsights();
+  const { fetchInsights, insightsData, insightsLoading, insightsStep } =
+    useInsights();
   const [showResponse, setshowResponse] = useState(false);
   const [userQuery, setuserQuery] = useState("");
 
@@ -39,9 +40,11 @@ function InsightsHub() {
         </Box>
       )}
 
-      {insightsLoading && <InsightsLoader query={userQuery} />}
+      {insightsLoading && (
+        <InsightsLoader query={userQuery} step={insightsStep} />
+      )}
 
-      {!insightsLoading && showResponse && (
+      {!insightsLoading && showResponse && insightsData && (
         <Insights
           data={insightsData.data}
           onTryAnother={() => {
@@ -6,10 +6,14 @@ import {
   TextField,
   Button,
   Paper,
+  Chip,
+  Stack,
 } from "@mui/material";
+import { useUser } from "../../context/UserContext";
 
 const PromptInput = ({ onSubmit }) => {
   const [prompt, setPrompt] = useState("");
+  const { suggestedQueries } = useUser();
 
   const handleSubmit = (e) => {
     e.preventDefault();
@@ -55,6 +59,21 @@ const PromptInput = ({ onSubmit }) => {
             Submit
           </Button>
         </Box>
+
+        {/* Answers to these are precomputed when the user is selected */}
+        {suggestedQueries.length > 0 && (
+          <Stack direction="row" sx={{ mt: 2, flexWrap: "wrap", gap: 1 }}>
+            {suggestedQueries.map((query) => (
+              <Chip
+                key={query}
+                label={query}
+                variant="outlined"
+                size="small"
+                onClick={() => onSubmit(query)}
+              />
+            ))}
+          </Stack>
+        )}
       </Paper>
     </Container>
   );
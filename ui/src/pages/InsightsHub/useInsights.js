@@ -6,22 +6,57 @@ function useInsights() {
   const [insightsData, setinsightsData] = useState(null);
   const [insightsLoading, setinsightsLoading] = useState(false);
   const [insightsError, setinsightsError] = useState(null);
+  const [insightsStep, setinsightsStep] = useState(null);
 
-  const INSIGHTS_URI = "/insights/query";
+  const INSIGHTS_STREAM_URI = "/insights/query/stream";
 
   const { user } = useUser();
 
   const fetchInsights = async (query) => {
     setinsightsLoading(true);
+    setinsightsError(null);
+    setinsightsStep(null);
 
     try {
       const payload = {
         session_id: user._id,
         query: query,
       };
-      const resp = await api.post(INSIGHTS_URI, payload);
 
-      setinsightsData(resp.data);
+      let summary = "";
+      await api.stream(INSIGHTS_STREAM_URI, payload, (event, data) => {
+        if (event === "tool_start") {
+          setinsightsStep(data.tool);
+        } else if (event === "chart") {
+          // Show the chart as soon as its numbers exist; the summary streams in afterwards
+          setinsightsData({
+            data: {
+              query,
+              analysis: {},
+              visualization: { ...data, text_summary: "" },
+            },
+          });
+          setinsightsLoading(false);
+        } else if (event === "summary_token") {
+          summary += data.text;
+          setinsightsData(
+            (prev) =>
+              prev && {
+                data: {
+                  ...prev.data,
+                  visualization: {
+                    ...prev.data.visualization,
+                    text_summary: summary,
+                  },
+                },
+              }
+          );
+        } else if (event === "result") {
+          setinsightsData(data);
+        } else if (event === "error") {
+          setinsightsError(data.error?.message);
+        }
+      });
     } catch (e) {
       setinsightsError(e.message);
     } finally {
@@ -33,6 +68,7 @@ function useInsights() {
     insightsData,
     insightsLoading,
     insightsError,
+    insightsStep,
     fetchInsights,
   };
 }